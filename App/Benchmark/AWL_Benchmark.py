@@ -0,0 +1,44 @@
+import os
+import sys
+import tempfile
+import time
+
+from App.Benchmark.S7_Generator import write_awl
+from App.S7_Parse.AWL_Parse import AWL_Parse
+
+LINE_COUNTS = (10000, 100000, 500000)
+
+
+def run(line_counts=LINE_COUNTS):
+    """ Time AWL_Parse on synthetic sources of the given sizes.
+
+    :param line_counts:
+    :return: list of result dictionaries
+    """
+    results = []
+    for line_count in line_counts:
+        handle, path = tempfile.mkstemp(suffix='.awl')
+        try:
+            with os.fdopen(handle, 'w') as awl_file:
+                lines = write_awl(awl_file, line_count)
+            size = os.path.getsize(path)
+            start = time.perf_counter()
+            awl = AWL_Parse(path)
+            elapsed = time.perf_counter() - start
+        finally:
+            os.remove(path)
+        results.append({
+            'lines': lines,
+            'bytes': size,
+            'blocks': len(awl.block_list),
+            'parse_s': elapsed,
+            'lines_per_s': lines / elapsed
+        })
+    return results
+
+
+if __name__ == "__main__":
+    line_counts = [int(arg) for arg in sys.argv[1:]] or LINE_COUNTS
+    for result in run(line_counts):
+        print("{lines:>8} lines {bytes:>10} bytes {blocks:>5} blocks  parse {parse_s:7.3f}s  "
+              "{lines_per_s:>10,.0f} lines/s".format(**result))
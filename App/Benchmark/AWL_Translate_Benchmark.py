@@ -0,0 +1,52 @@
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from App.Benchmark.S7_Generator import write_awl
+from App.S7_Translator.AWL_Translate import AWL_Translate
+from App.S7_Translator.Translation_Memory import Translation_Memory
+from App.S7_Translator.Translator_Backend import Stub_Backend
+
+LINE_COUNTS = (500000,)
+
+
+def run(line_counts=LINE_COUNTS):
+    """ Time the streaming AWL_Translate rewrite on synthetic sources of the given sizes. The translator is a
+    Stub_Backend without latency and the translation memory lives in memory, so only the rewrite is measured.
+
+    :param line_counts:
+    :return: list of result dictionaries
+    """
+    results = []
+    for line_count in line_counts:
+        root_dir = tempfile.mkdtemp() + os.sep
+        try:
+            with open(root_dir + 'BENCH.awl', 'w') as awl_file:
+                lines = write_awl(awl_file, line_count)
+            size = os.path.getsize(root_dir + 'BENCH.awl')
+            memory = Translation_Memory(':memory:')
+            start = time.perf_counter()
+            AWL_Translate(root_dir, 'BENCH', backend=Stub_Backend('de', 'en'), memory=memory)
+            elapsed = time.perf_counter() - start
+            memory.close()
+        finally:
+            shutil.rmtree(root_dir)
+        results.append({
+            'lines': lines,
+            'bytes': size,
+            'translate_s': elapsed,
+            'lines_per_s': lines / elapsed,
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        })
+    return results
+
+
+if __name__ == "__main__":
+    line_counts = [int(arg) for arg in sys.argv[1:]] or LINE_COUNTS
+    for result in run(line_counts):
+        print("{lines:>8} lines {bytes:>10} bytes  translate {translate_s:7.3f}s  {lines_per_s:>10,.0f} lines/s  "
+              "peak rss {peak_rss_mb:7.1f} MB".format(**result))
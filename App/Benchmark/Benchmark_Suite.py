@@ -0,0 +1,212 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from App.Benchmark import S7_Generator
+
+STEPS_PER_FB = 30  # Steps per generated sequence, the sample sequences have 20 to 40
+
+# Benchmark -> sizes, in function blocks for gr7_parse/drawio_export, rows for sdf_parse, lines for awl_parse
+# and awl_translate, racks for cfg_parse
+SIZES = {
+    'gr7_parse': (10, 100, 1000),
+    'sdf_parse': (10000, 100000, 1000000),
+    'awl_parse': (10000, 100000, 500000),
+    'awl_translate': (10000, 100000, 500000),
+    'cfg_parse': (1, 10, 100),
+    'drawio_export': (10, 100, 500),
+}
+QUICK_SIZES = {name: sizes[:1] for name, sizes in SIZES.items()}
+REGRESSION_RATIO = 1.2  # Slower or larger than the baseline by this factor is reported as a regression
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def prepare(name, size, work_dir, seed):
+    """ Generate the input of a benchmark, this is not timed.
+
+    :return: (path of the generated input, number of items it holds)
+    """
+    if name in ('gr7_parse', 'drawio_export'):
+        path = os.path.join(work_dir, 'GEN.gr7')
+        steps, _ = S7_Generator.write_gr7(path, size, STEPS_PER_FB, seed)
+        return path, steps
+    if name == 'sdf_parse':
+        path = os.path.join(work_dir, 'GEN.sdf')
+        return path, S7_Generator.write_sdf(path, size, seed)
+    if name in ('awl_parse', 'awl_translate'):
+        path = os.path.join(work_dir, 'GEN.awl')
+        with open(path, 'w', encoding=S7_Generator.EXPORT_ENCODING, newline='\r\n') as awl_file:
+            return path, S7_Generator.write_awl(awl_file, size, seed)
+    if name == 'cfg_parse':
+        path = os.path.join(work_dir, 'GEN.cfg')
+        return path, S7_Generator.write_cfg(path, size)
+    raise ValueError("Unknown benchmark: " + name)
+
+
+def measure(name, path, work_dir):
+    """ Run the timed stage of a benchmark. Parsers and their dependencies are imported before the clock starts.
+
+    :return: elapsed seconds
+    """
+    if name == 'gr7_parse':
+        from App.S7_Parse.GR7_Parse import GR7_Parse
+        start = time.perf_counter()
+        GR7_Parse(path)
+    elif name == 'sdf_parse':
+        from App.S7_Parse.SDF_Parse import SDF_Parse
+        start = time.perf_counter()
+        SDF_Parse(path)
+    elif name == 'awl_parse':
+        from App.S7_Parse.AWL_Parse import AWL_Parse
+        start = time.perf_counter()
+        AWL_Parse(path)
+    elif name == 'cfg_parse':
+        from App.S7_Parse.CFG_Parse import CFG_Parse
+        start = time.perf_counter()
+        # Index the sections and decode every body, the index alone does not read them
+        for section in CFG_Parse(path).section_list:
+            section.load()
+    elif name == 'awl_translate':
+        from App.S7_Translator.AWL_Translate import AWL_Translate
+        from App.S7_Translator.Translation_Memory import Translation_Memory
+        from App.S7_Translator.Translator_Backend import Stub_Backend
+        memory = Translation_Memory(':memory:')
+        start = time.perf_counter()
+        AWL_Translate(work_dir + os.sep, 'GEN', backend=Stub_Backend('de', 'en'), memory=memory)
+        elapsed = time.perf_counter() - start
+        memory.close()
+        return elapsed
+    elif name == 'drawio_export':
+        from App.DrawIO.DrawIO_Writer import DrawIO_Writer
+        from App.S7_Parse.GR7_Parse import GR7_Parse
+        seq_list = GR7_Parse(path).seq_list
+        start = time.perf_counter()
+        with DrawIO_Writer(os.path.join(work_dir, 'GEN.drawio')) as writer:
+            for sequence in seq_list:
+                writer.write_sequence(sequence)
+    else:
+        raise ValueError("Unknown benchmark: " + name)
+    return time.perf_counter() - start
+
+
+def run_case(name, size, seed=0):
+    """ Generate the input of one benchmark and time it. Every case runs in its own fresh process, so the peak
+    RSS is the peak of that case alone.
+
+    :param name: benchmark name, see SIZES
+    :param size:
+    :param seed: generator seed
+    :return: result dictionary
+    """
+    work_dir = tempfile.mkdtemp(prefix='s7bench_')
+    try:
+        path, items = prepare(name, size, work_dir, seed)
+        input_bytes = os.path.getsize(path)
+        rss_before = peak_rss_mb()
+        elapsed = measure(name, path, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'benchmark': name,
+        'size': size,
+        'items': items,
+        'input_bytes': input_bytes,
+        'seconds': elapsed,
+        'mb_per_s': input_bytes / elapsed / 1e6,
+        'items_per_s': items / elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_before_mb': rss_before
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes=SIZES, seed=0, benchmarks=None):
+    """ Run the suite, one fresh process per case.
+
+    :param sizes: benchmark -> sizes
+    :param seed: generator seed
+    :param benchmarks: names to run, all by default
+    :return: report dictionary
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for name, name_sizes in sizes.items():
+        if benchmarks and name not in benchmarks:
+            continue
+        for size in name_sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_case, name, size, seed).result()
+            results.append(result)
+            print("{benchmark:<14} {size:>8} {items:>9} items {input_bytes:>11} bytes {seconds:8.3f}s "
+                  "{mb_per_s:7.1f} MB/s  peak rss {peak_rss_mb:7.1f} MB".format(**result), flush=True)
+    return {
+        'commit': git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'results': results
+    }
+
+
+def compare(report, baseline):
+    """ Compare a report with the report of an earlier commit.
+
+    :param report:
+    :param baseline:
+    :return: list of (benchmark, size, seconds ratio, peak rss ratio, regression)
+    """
+    previous = {(result['benchmark'], result['size']): result for result in baseline['results']}
+    rows = []
+    for result in report['results']:
+        old = previous.get((result['benchmark'], result['size']))
+        if old is None:
+            continue
+        time_ratio = result['seconds'] / old['seconds']
+        rss_ratio = result['peak_rss_mb'] / old['peak_rss_mb']
+        rows.append((result['benchmark'], result['size'], time_ratio, rss_ratio,
+                     time_ratio > REGRESSION_RATIO or rss_ratio > REGRESSION_RATIO))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the S7 parsers and exports on synthetic projects.")
+    parser.add_argument('-o', '--output', help="write the report to this JSON file")
+    parser.add_argument('-b', '--baseline', help="compare against the JSON report of an earlier run")
+    parser.add_argument('-q', '--quick', action='store_true', help="only the smallest size of every benchmark")
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('benchmarks', nargs='*', help="benchmarks to run: " + ', '.join(SIZES))
+    args = parser.parse_args()
+
+    report = run(QUICK_SIZES if args.quick else SIZES, args.seed, args.benchmarks)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print('Against', baseline.get('commit'))
+        for name, size, time_ratio, rss_ratio, regression in compare(report, baseline):
+            print("{:<14} {:>8}  time x{:5.2f}  peak rss x{:5.2f}{}".format(
+                name, size, time_ratio, rss_ratio, '  REGRESSION' if regression else ''))
@@ -0,0 +1,80 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from App.S7_Parse.AWL_Parse import AWL_Block, AWL_Instruction, AWL_Network
+from App.S7_Parse.Cross_Reference import Cross_Reference
+from App.S7_Parse.SDF_Parse import Symbol
+
+SYMBOL_COUNTS = (10000, 50000)
+
+
+def make_project(symbol_count, references_per_symbol=4, seed=0):
+    """ Generate a symbol table of markers and AWL blocks that read random symbols by address or by name.
+
+    :param symbol_count:
+    :param references_per_symbol: average number of instructions using a symbol
+    :param seed:
+    :return: (symbol_data, block_list)
+    """
+    rng = random.Random(seed)
+    symbol_data = [Symbol('SYM_' + str(number), 'M', number // 8 + number % 8 / 10, 'BOOL', '', number // 8,
+                          number % 8) for number in range(symbol_count)]
+    block_list = []
+    instructions = symbol_count * references_per_symbol
+    for block_no in range(0, instructions, 1000):
+        block = AWL_Block('FUNCTION', 'FC ' + str(block_no // 1000 + 1))
+        network = AWL_Network()
+        block.networks.append(network)
+        for _ in range(min(1000, instructions - block_no)):
+            number = rng.randrange(symbol_count)
+            operand = 'M {}.{}'.format(number // 8, number % 8) if rng.random() < 0.8 else '"SYM_' + str(number) + '"'
+            network.instructions.append(AWL_Instruction('', rng.choice(('A', 'AN', 'O', '=')), operand, None, ''))
+        block_list.append(block)
+    return symbol_data, block_list
+
+
+def run(symbol_counts=SYMBOL_COUNTS, queries=1000):
+    """ Time building the cross reference index on disk and answering usage queries from it.
+
+    :param symbol_counts:
+    :param queries: number of random symbols looked up
+    :return: list of result dictionaries
+    """
+    results = []
+    for symbol_count in symbol_counts:
+        symbol_data, block_list = make_project(symbol_count)
+        handle, path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+        try:
+            xref = Cross_Reference(path)
+            start = time.perf_counter()
+            ref_count = xref.build(symbol_data, block_list=block_list)
+            build_s = time.perf_counter() - start
+
+            rng = random.Random(1)
+            start = time.perf_counter()
+            for _ in range(queries):
+                xref.usages('SYM_' + str(rng.randrange(symbol_count)))
+            query_ms = (time.perf_counter() - start) * 1000 / queries
+            xref.close()
+            index_mb = os.path.getsize(path) / 1e6
+        finally:
+            os.remove(path)
+        results.append({
+            'symbols': symbol_count,
+            'references': ref_count,
+            'build_s': build_s,
+            'query_ms': query_ms,
+            'index_mb': index_mb
+        })
+    return results
+
+
+if __name__ == "__main__":
+    symbol_counts = [int(arg) for arg in sys.argv[1:]] or SYMBOL_COUNTS
+    for result in run(symbol_counts):
+        print("{symbols:>8} symbols {references:>8} references  build {build_s:6.3f}s  usages {query_ms:6.3f}ms  "
+              "index {index_mb:6.1f}MB".format(**result))
@@ -0,0 +1,81 @@
+import os
+import re
+import sys
+import tempfile
+import time
+
+from App.S7_Parse.GR7_Parse import GR7_Parse
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data', 'B3Z11502.gr7')
+SCALES = (1, 10, 50)
+
+# Regex patterns of the previous multi-pass parser, kept as the baseline for comparison
+LEGACY_SEQUENCE_PATTERN = re.compile(
+    r"\(\*\$_COM\s+([^\n]+)\n(.*?)\)\s*\n\(\*\$_CMPSET\s+(.*?)\s*\)\s*\n\(\*\$_SETTINGS\s+(.*?)\s*\)\s*"
+    r"(VAR_INPUT\s+(.*?)\s+END_VAR)?\s*(PERM_CONDITION_AT_BEGIN\s+(.*?)\s+END_PERM_CONDITION)?", re.DOTALL)
+LEGACY_STEP_PATTERN = re.compile(
+    r"STEP\s+([A-Za-z0-9_]+)\s+\(\*\$_NUM\s+(\d+)\*\):\s+\(\*\$_COM\s+([^*]+)\*\)\s*(SUPERVISION\s+"
+    r"CONDITION\s*:=\s*(.*?)\s+END_SUPERVISION)?\s*(.*?)(?=END_STEP)", re.DOTALL)
+LEGACY_TRANSITION_PATTERN = re.compile(
+    r"TRANSITION\s+([A-Za-z0-9_]+)\s+\(\*\$_NUM\s+(\d+)\*\)\s+FROM\s+([A-Za-z0-9_]+)\s+TO\s+([A-Za-z0-9_]+)\s+"
+    r"CONDITION\s*:=\s*(.*?)\s+END_TRANSITION")
+
+
+def legacy_parse(gr7_data):
+    """ Run the regex passes of the previous parser over the gr7 text.
+
+    :param gr7_data:
+    :return: number of parsed sequences
+    """
+    count = 0
+    for sequence in gr7_data.split('END_FUNCTION_BLOCK')[:-1]:
+        for match in LEGACY_SEQUENCE_PATTERN.finditer(sequence):
+            sequence_data = sequence[match.end():]
+            list(LEGACY_STEP_PATTERN.finditer(sequence_data))
+            LEGACY_TRANSITION_PATTERN.findall(sequence_data)
+            count += 1
+    return count
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def run(scales=SCALES):
+    """ Time the single-pass GR7 parser against the legacy regexes on the sample file repeated n times.
+
+    :param scales: repeat counts for the sample file
+    :return: list of result dictionaries
+    """
+    with open(SAMPLE_FILE, 'r') as sample:
+        gr7_data = sample.read()
+
+    results = []
+    for scale in scales:
+        handle, path = tempfile.mkstemp(suffix='.gr7')
+        try:
+            with os.fdopen(handle, 'w') as scaled_file:
+                scaled_file.write(gr7_data * scale)
+            size = os.path.getsize(path)
+            parse_time, gr7 = time_call(GR7_Parse, path)
+            legacy_time, _ = time_call(legacy_parse, gr7_data * scale)
+        finally:
+            os.remove(path)
+        results.append({
+            'scale': scale,
+            'bytes': size,
+            'sequences': len(gr7.seq_list),
+            'parse_s': parse_time,
+            'legacy_s': legacy_time,
+            'mb_per_s': size / parse_time / 1e6
+        })
+    return results
+
+
+if __name__ == "__main__":
+    scales = [int(arg) for arg in sys.argv[1:]] or SCALES
+    for result in run(scales):
+        print("x{scale:<4} {bytes:>10} bytes {sequences:>5} sequences  parse {parse_s:8.3f}s  "
+              "legacy {legacy_s:8.3f}s  {mb_per_s:6.1f} MB/s".format(**result))
@@ -0,0 +1,64 @@
+import random
+import sys
+import time
+
+from App.DrawIO.Layered_Layout import Layered_Layout
+
+STEP_COUNTS = (100, 1000, 5000)
+
+
+def make_sequence(step_count, seed=0):
+    """ Build the step and transition edges of a synthetic GR7 sequence: a main chain with simultaneous
+    branches that join again and jumps back to earlier steps.
+
+    :param step_count:
+    :param seed:
+    :return: (steps, edges)
+    """
+    rng = random.Random(seed)
+    steps = ['S{}'.format(number) for number in range(1, step_count + 1)]
+    edges = []
+    number = 0
+    while number < step_count - 1:
+        width = rng.choice((1, 1, 1, 2, 3))
+        if width > 1 and number + width + 1 < step_count:
+            # Branch into width parallel steps and join again
+            for branch in range(1, width + 1):
+                edges.append((steps[number], steps[number + branch]))
+                edges.append((steps[number + branch], steps[number + width + 1]))
+            number += width + 1
+        else:
+            edges.append((steps[number], steps[number + 1]))
+            number += 1
+        if rng.random() < 0.05:
+            edges.append((steps[number], steps[rng.randrange(0, number + 1)]))
+    return steps, edges
+
+
+def run(step_counts=STEP_COUNTS):
+    """ Time Layered_Layout on synthetic sequences of the given sizes.
+
+    :param step_counts:
+    :return: list of result dictionaries
+    """
+    results = []
+    for step_count in step_counts:
+        steps, edges = make_sequence(step_count)
+        start = time.perf_counter()
+        layout = Layered_Layout(steps, edges)
+        elapsed = time.perf_counter() - start
+        results.append({
+            'steps': step_count,
+            'edges': len(edges),
+            'layers': len(layout.layers),
+            'crossings': layout.crossings,
+            'layout_s': elapsed
+        })
+    return results
+
+
+if __name__ == "__main__":
+    step_counts = [int(arg) for arg in sys.argv[1:]] or STEP_COUNTS
+    for result in run(step_counts):
+        print("{steps:>6} steps {edges:>6} edges {layers:>6} layers {crossings:>6} crossings  "
+              "layout {layout_s:7.3f}s".format(**result))
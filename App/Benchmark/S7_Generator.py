@@ -0,0 +1,233 @@
+import os
+import random
+import re
+import sys
+
+from App.S7_Parse.SDF_Parse import SDF_ENCODING, SDF_ROW_PATTERN
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data')
+SAMPLE_GR7 = os.path.join(SAMPLE_DIR, 'B3Z11502.gr7')
+SAMPLE_SDF = os.path.join(SAMPLE_DIR, 'B3Z11502.sdf')
+SAMPLE_CFG = os.path.join(SAMPLE_DIR, 'B3Z11502.cfg')
+EXPORT_ENCODING = 'cp1252'  # Written like Simatic Manager, Windows code page and CRLF line ends
+
+AWL_OPERATIONS = ('A', 'AN', 'O', 'ON', '=', 'S', 'R', 'L', 'T')
+AWL_AREAS = ('I', 'Q', 'M')
+WORDS = ('Zylinder', 'Ventil', 'Greifer', 'Förderband', 'Hubtisch', 'Drehteller', 'Schutztür', 'Lichtschranke',
+         'Störung', 'Grundstellung', 'vor', 'zurück', 'auf', 'ab', 'offen', 'geschlossen', 'Teil', 'prüfen')
+STEP_WORDS = ('Cylinder', 'Valve', 'Gripper', 'Conveyor', 'Lift', 'Turntable', 'Door', 'Wait', 'Release')
+CFG_RACK_PATTERN = re.compile(r"^RACK \d+", re.MULTILINE)
+
+
+def sentence(rng, word_count):
+    return ' '.join(rng.choice(WORDS) for _ in range(word_count))
+
+
+def bit_operand(rng, db):
+    """ A random bit operand as GR7 conditions write them.
+
+    :param rng:
+    :param db: data block of the sequence
+    :return: e.g. 'DB320.DBX152.1', 'I4512.3' or 'M2.1'
+    """
+    kind = rng.random()
+    if kind < 0.6:
+        return 'DB{}.DBX{}.{}'.format(db, rng.randint(130, 170), rng.randint(0, 7))
+    if kind < 0.85:
+        return 'I{}.{}'.format(rng.randint(0, 4600), rng.randint(0, 7))
+    return 'M{}.{}'.format(rng.randint(0, 600), rng.randint(0, 7))
+
+
+def condition(rng, db, term_count):
+    """ A transition condition of AND/OR/NOT terms with the occasional comparison.
+
+    :param rng:
+    :param db:
+    :param term_count:
+    :return: condition text
+    """
+    terms = []
+    for _ in range(term_count):
+        if rng.random() < 0.05:
+            terms.append('DB{}.DBW{} > {}'.format(db, rng.randint(200, 240) * 2, rng.randint(0, 500)))
+        else:
+            terms.append(('NOT ' if rng.random() < 0.3 else '') + bit_operand(rng, db))
+    text = terms[0]
+    for term in terms[1:]:
+        text += (' OR ' if rng.random() < 0.2 else ' AND ') + term
+    return '(' + text + ')' if term_count > 3 and rng.random() < 0.3 else text
+
+
+def sample_header(sample_file=SAMPLE_GR7):
+    """ The sequence header of the first function block of the sample, from its $_CMPSET pragma up to the
+    first step, used as the template for every generated block.
+
+    :param sample_file:
+    :return: header text
+    """
+    with open(sample_file, 'r', encoding=EXPORT_ENCODING, newline='') as sample:
+        text = sample.read()
+    return text[text.index('(*$_CMPSET'):text.index('INITIAL_STEP')].replace('\r\n', '\n')
+
+
+def write_gr7(gr7_file, fb_count, step_count, seed=0):
+    """ Write a synthetic .gr7 export of fb_count sequences with step_count steps each. Sequences are chains
+    with alternative branches, simultaneous branches that join again and jumps back, the headers come from the
+    sample export.
+
+    :param gr7_file: path
+    :param fb_count:
+    :param step_count: steps per sequence, at least 2
+    :param seed:
+    :return: (number of steps, number of transitions)
+    """
+    rng = random.Random(seed)
+    header = sample_header()
+    total_steps = total_transitions = 0
+    with open(gr7_file, 'w', encoding=EXPORT_ENCODING, newline='\r\n') as active_file:
+        write = active_file.write
+        for fb in range(fb_count):
+            db = 320 + fb
+            write('FUNCTION_BLOCK FB{}\n(*$_COM Station {:03d} Sequence\n->{}\n*)\n\n'.format(
+                400 + fb, fb, sentence(rng, 6)))
+            write(header)
+            names = ['INI'] + ['S{}_{}'.format(number, rng.choice(STEP_WORDS)) for number in range(2, step_count + 1)]
+            for number, name in enumerate(names, 1):
+                write('{} {} (*$_NUM {}*):\n(*$_COM {}@{}*)\n\n'.format(
+                    'INITIAL_STEP' if number == 1 else 'STEP', name, number, sentence(rng, 3), name))
+                if number > 1 and rng.random() < 0.5:
+                    write('SUPERVISION\n CONDITION := S{0:03d}.U > DB{1}.DBD220 AND NOT T{0:03d}.TT \n'
+                          'END_SUPERVISION\n'.format(number, db))
+                for _ in range(rng.randint(1, 3)):
+                    write('DB{}.DBX{}.{}   (N)\n'.format(db, rng.randint(150, 160), rng.randint(0, 7)))
+                write('END_STEP\n\n')
+
+            transitions = []
+            position = 0
+            while position < len(names) - 1:
+                branch = rng.random()
+                if branch < 0.1 and position + 3 < len(names):
+                    # Simultaneous branch into two steps that join again
+                    pair = '( {}, {})'.format(names[position + 1], names[position + 2])
+                    transitions.append((names[position], pair, ''))
+                    transitions.append((pair, names[position + 3], ''))
+                    position += 3
+                elif branch < 0.2 and position + 2 < len(names):
+                    # Alternative branch, the second transition skips a step
+                    transitions.append((names[position], names[position + 1], ''))
+                    transitions.append((names[position], names[position + 2], ''))
+                    position += 1
+                else:
+                    transitions.append((names[position], names[position + 1], ''))
+                    position += 1
+            transitions.append((names[-1], names[0], ' (*$_JUMP*)'))
+            for number, (from_step, to_step, jump) in enumerate(transitions, 1):
+                write('TRANSITION T{0} (*$_NUM {0}*)\n  FROM {1} \n  TO {2}{3}\nCONDITION := {4} \n'
+                      'END_TRANSITION\n\n'.format(number, from_step, to_step, jump,
+                                                  condition(rng, db, rng.randint(1, 8))))
+            write('END_FUNCTION_BLOCK\n\n')
+            total_steps += len(names)
+            total_transitions += len(transitions)
+    return total_steps, total_transitions
+
+
+def write_sdf(sdf_file, row_count, seed=0):
+    """ Write a synthetic .sdf symbol table. Address areas, data types and comments are drawn from the rows of
+    the sample table, names and addresses are unique.
+
+    :param sdf_file: path
+    :param row_count:
+    :param seed:
+    :return: number of rows
+    """
+    rng = random.Random(seed)
+    with open(SAMPLE_SDF, 'r', encoding=SDF_ENCODING) as sample:
+        templates = [(perph_type, bool(bit), data_type.strip(), comment.strip())
+                     for name, perph_type, byte, bit, data_type, comment in SDF_ROW_PATTERN.findall(sample.read())]
+    next_byte = {}
+    with open(sdf_file, 'w', encoding=SDF_ENCODING, newline='\r\n') as active_file:
+        rows = []
+        for number in range(row_count):
+            perph_type, is_bit, data_type, comment = rng.choice(templates)
+            # Hand out consecutive addresses per area, bits fill a byte before the next one is used
+            address = next_byte.get(perph_type, 0)
+            next_byte[perph_type] = address + (1 if is_bit else 2)
+            if is_bit:
+                address = '{}.{}'.format(address // 8, address % 8)
+            rows.append('"{:<24}","{:<4}{:>6} ","{:<10}","{:<80}"\n'.format(
+                'SYM{:07d}_{}'.format(number, perph_type)[:24], perph_type, address, data_type, comment[:80]))
+            if len(rows) == 10000:
+                active_file.writelines(rows)
+                rows = []
+        active_file.writelines(rows)
+    return row_count
+
+
+def write_awl(awl_file, line_count, seed=0):
+    """ Write a synthetic AWL source of about line_count lines made of function blocks with networks.
+
+    :param awl_file: open text file
+    :param line_count:
+    :param seed:
+    :return: number of lines written
+    """
+    rng = random.Random(seed)
+    lines = 0
+    block = 0
+    while lines < line_count:
+        block += 1
+        awl_file.write("FUNCTION_BLOCK FB {0}\nTITLE =Generated block {0}\n"
+                       "{{ S7_language := '9(7) English (USA)  13.08.2018  10:40:07' }}\n"
+                       "AUTHOR : 'BENCH'\nFAMILY : GEN\nNAME : 'FB{0}'\nVERSION : 0.1\n\n"
+                       "VAR_INPUT\n  Enable : BOOL ;\t//Enable\nEND_VAR\nVAR_TEMP\n  tmp : INT ;\t\nEND_VAR\n"
+                       "BEGIN\n".format(block))
+        lines += 16
+        for network in range(20):
+            awl_file.write("NETWORK\nTITLE =Network {0}\n//Kommentar Netzwerk {0}\n".format(network))
+            lines += 3
+            for _ in range(rng.randint(4, 12)):
+                awl_file.write("      {:<6}{:<5}{:>6}.{}; \t//Kommentar\n".format(
+                    rng.choice(AWL_OPERATIONS), rng.choice(AWL_AREAS), rng.randint(0, 4095), rng.randint(0, 7)))
+                lines += 1
+        awl_file.write("END_FUNCTION_BLOCK\n\n")
+        lines += 2
+    return lines
+
+
+def write_cfg(cfg_file, rack_count):
+    """ Write a synthetic .cfg hardware configuration: the sample station with its rack and module sections
+    repeated rack_count times under new rack numbers.
+
+    :param cfg_file: path
+    :param rack_count:
+    :return: number of sections
+    """
+    with open(SAMPLE_CFG, 'r', encoding=EXPORT_ENCODING, newline='') as sample:
+        text = sample.read().replace('\r\n', '\n')
+    first_rack = CFG_RACK_PATTERN.search(text).start()
+    head, racks = text[:first_rack], text[first_rack:]
+    with open(cfg_file, 'w', encoding=EXPORT_ENCODING, newline='\r\n') as active_file:
+        active_file.write(head)
+        for rack in range(rack_count):
+            active_file.write(CFG_RACK_PATTERN.sub('RACK ' + str(rack), racks))
+    return head.count('\nEND') + racks.count('\nEND') * rack_count
+
+
+def write_project(root_dir, fb_count=10, step_count=30, row_count=10000, line_count=10000, rack_count=1, seed=0):
+    """ Write one synthetic export of every kind into root_dir.
+
+    :return: dict of kind -> path
+    """
+    os.makedirs(root_dir, exist_ok=True)
+    files = {kind: os.path.join(root_dir, 'GEN00001.' + kind) for kind in ('gr7', 'sdf', 'awl', 'cfg')}
+    write_gr7(files['gr7'], fb_count, step_count, seed)
+    write_sdf(files['sdf'], row_count, seed)
+    with open(files['awl'], 'w', encoding=EXPORT_ENCODING, newline='\r\n') as awl_file:
+        write_awl(awl_file, line_count, seed)
+    write_cfg(files['cfg'], rack_count)
+    return files
+
+
+if __name__ == "__main__":
+    for kind, path in write_project(sys.argv[1] if len(sys.argv) > 1 else 'Generated').items():
+        print(kind, path, os.path.getsize(path), 'bytes')
@@ -0,0 +1,81 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from App.S7_Parse.GR7_Condition import compile_condition
+from App.S7_Parse.GR7_Parse import GR7_Parse
+from App.S7_Simulator.GR7_Simulator import GR7_Simulator, replay
+from App.S7_Simulator.Trace_Reader import write_binary_trace
+
+GR7_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data', 'B3Z11502.gr7')
+CYCLE_COUNTS = (10000, 100000)
+
+
+def make_rows(operands, cycle_count, flip_rate=0.0005, seed=0):
+    """ Generate recorded scan cycles where every signal keeps its value and flips now and then.
+
+    :param operands:
+    :param cycle_count:
+    :param flip_rate: chance of a signal changing in one scan
+    :param seed:
+    :return: generator of rows
+    """
+    rng = random.Random(seed)
+    state = [float(rng.random() < 0.5) for _ in operands]
+    for _ in range(cycle_count):
+        for column in range(len(state)):
+            if rng.random() < flip_rate:
+                state[column] = 1.0 - state[column]
+        yield state
+
+
+def run(cycle_counts=CYCLE_COUNTS, scan_limit=100000):
+    """ Time the block replay of a binary trace against scanning cycle by cycle for the sample sequences.
+
+    :param cycle_counts:
+    :param scan_limit: largest trace also run through the per scan loop
+    :return: list of result dictionaries
+    """
+    seq_list = GR7_Parse(GR7_FILE).seq_list
+    operands = sorted({operand for sequence in seq_list for transition in sequence.transition_data
+                       for operand in compile_condition(transition.condition).operands})
+    results = []
+    for cycle_count in cycle_counts:
+        handle, path = tempfile.mkstemp(suffix='.s7trace')
+        os.close(handle)
+        try:
+            write_binary_trace(path, operands, make_rows(operands, cycle_count))
+            start = time.perf_counter()
+            simulators = replay(seq_list, path)
+            replay_s = time.perf_counter() - start
+        finally:
+            os.remove(path)
+
+        scan_s = None
+        if cycle_count <= scan_limit:
+            scanners = [GR7_Simulator(sequence) for sequence in seq_list]
+            start = time.perf_counter()
+            for row in make_rows(operands, cycle_count):
+                values = dict(zip(operands, row))
+                for scanner in scanners:
+                    scanner.scan(values)
+            scan_s = time.perf_counter() - start
+        results.append({
+            'cycles': cycle_count,
+            'sequences': len(seq_list),
+            'fired': sum(simulator.fired for simulator in simulators),
+            'replay_s': replay_s,
+            'cycles_per_s': cycle_count / replay_s,
+            'scan_s': scan_s
+        })
+    return results
+
+
+if __name__ == "__main__":
+    cycle_counts = [int(arg) for arg in sys.argv[1:]] or CYCLE_COUNTS
+    for result in run(cycle_counts):
+        scan = '{:7.3f}s'.format(result['scan_s']) if result['scan_s'] is not None else '      -'
+        print("{cycles:>8} cycles {sequences:>4} sequences {fired:>6} fired  replay {replay_s:7.3f}s "
+              "{cycles_per_s:>10,.0f} cycles/s  per scan {scan}".format(scan=scan, **result))
@@ -1,11 +1,25 @@
+import os
+import sys
 import xml.etree.ElementTree as ET
 
+if not __package__:
+    # Run as a script, python App/DrawIO/DrawIO.py, the App package lives two directories up
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from App.DrawIO.DrawIO_Writer import DrawIO_Writer, graph_model_xml
+from App.DrawIO.Layered_Layout import Layered_Layout
+from App.S7_Parse.GR7_Parse import GR7_Parse
+
 class DrawIO:
-    def __init__(self, drawio_file):
-        # Generate the XML data and save as draw.io
-        self.drawio_file = '../../Parsed_Data/'  + self.filename[:-4] + 'GR7.drawio'
-        self.active_iofile = open(self.drawio_file, 'wb')
-        self.active_iofile.write(self.drawio_xml_data)
+    def __init__(self, gr7_file, output_dir='../../Parsed_Data/', compressed=False):
+        # Parse the sequences and save them as draw.io, one page per sequence
+        self.filename = os.path.basename(gr7_file)
+        self.drawio_file = os.path.join(output_dir, self.filename[:-4] + 'GR7.drawio')
+        self.seq_list = GR7_Parse(gr7_file).seq_list
+        os.makedirs(output_dir, exist_ok=True)
+        with DrawIO_Writer(self.drawio_file, compressed) as writer:
+            for sequence in self.seq_list:
+                writer.write_sequence(sequence)
 
     def create_drawio_xml_old(self, steps, transitions):
         """ This function will generate the xml data with step 7 steps and transitions information
@@ -49,64 +63,7 @@ class DrawIO:
 
     def create_drawio_xml(self, steps, transitions):
         """Converts step and transition data to draw.io XML format."""
-
-        # Initial XML template for draw.io
-        xml_template = '<mxGraphModel><root><mxCell id="0" /><mxCell id="1" parent="0" />'
-
-        # Template for creating a step (node)
-        node_template = '<mxCell id="{id}" value="{name}" style="rounded=1;whiteSpace=wrap;html=1;" vertex="1" \
-                         parent="1"><mxGeometry x="{x}" y="{y}" width="80" height="40" as="geometry" /></mxCell>'
-
-        # Template for creating a transition (edge)
-        edge_template = '<mxCell id="e{id}" value="{condition}" style="edgeStyle=orthogonalEdgeStyle;rounded=0;\
-                         orthogonalLoop=1;" edge="1" parent="1" source="{from_id}" target="{to_id}">\
-                         <mxGeometry relative="1" as="geometry" /></mxCell>'
-
-        # Starting positions for layout (modify these values for layout adjustments)
-        current_x = 100
-        current_y = 100
-        spacing_x = 200  # Horizontal space between steps
-        spacing_y = 150  # Vertical space between steps
-
-        # Create nodes for steps
-        nodes = {}
-        edges = []
-        node_id = 2
-        for step in steps:
-            step_name = step['number']
-            if step_name not in nodes:
-                # Add the step node (using current_x and current_y for positioning)
-                nodes[step_name] = {"id": node_id, "x": current_x, "y": current_y}
-                xml_template += node_template.format(id=node_id, name=step_name, x=current_x, y=current_y)
-                node_id += 1
-                current_y += spacing_y  # Move down for the next step
-
-                # Reset x for steps in a new column
-                if current_y > 500:
-                    current_y = 100
-                    current_x += spacing_x
-
-        # Create edges for transitions
-        for transition in transitions:
-            from_state = transition['from']
-            to_states = transition['to']
-            condition = transition['condition']
-
-            # for to_state in to_states:
-            #     from_id = nodes[from_state]['number']
-            #     to_id = nodes[to_state]['number']
-            #     edges.append(edge_template.format(id=node_id, condition=condition, from_id=from_id, to_id=to_id))
-            #     node_id += 1
-
-        # Append the edges (transitions) to the XML template
-        # for edge in edges:
-        #     xml_template += edge
-
-        # Close the XML
-        xml_template += '''        </root>
-        </mxGraphModel>'''
-
-        return xml_template
+        return graph_model_xml(steps, transitions, node_width=80, node_height=40)
 
     def test_graph_diagram(self, steps, transitions):
         import networkx as nx
@@ -129,56 +86,43 @@ class DrawIO:
         plt.show()
         pass
 
-    def graph_column_layout(self):
-        import networkx as nx
-        import matplotlib.pyplot as plt
-        G = nx.DiGraph()
-        G.add_edges_from([
-            ('Root', 'A'),
-            ('Root', 'B'),
-            ('A', 'C'),
-            ('A', 'D'),
-            ('B', 'E'),
-            ('B', 'F'),
-            ('C', 'G'),
-            ('D', 'H'),
-            ('E', 'I'),
-        ])
-        pos = {}  # Dictionary to store positions of nodes
-        layers = {}  # Dictionary to track which layer (column) each node is in
-
-        def assign_layers(node, layer=0):
-            """ Recursively assign nodes to columns (layers) """
-            if node not in layers:
-                layers[node] = layer
-            else:
-                layers[node] = max(layers[node], layer)
-
-            neighbors = list(G.successors(node))
-            if neighbors:
-                for i, neighbor in enumerate(neighbors):
-                    # Assign each child to the next layer
-                    assign_layers(neighbor, layer + 1 + i)
-
-        # Start assigning layers from the root
-        root = [n for n, d in G.in_degree() if d == 0][0]
-        assign_layers(root)
-
-        # Calculate the positions of nodes
-        max_layer = max(layers.values())
-        for node, layer in layers.items():
-            same_layer_nodes = [n for n, l in layers.items() if l == layer]
-            y_pos = same_layer_nodes.index(node)  # Place nodes in different rows in the same column
-            pos[node] = (layer, -y_pos)  # X is the layer (column), Y is the row
+    def graph_column_layout(self, steps, transitions, **options):
+        """ Lay out the steps in layers from the initial step downwards, every transition links each of its
+        from steps to each of its to steps.
 
-        # Draw the graph
-        plt.figure(figsize=(8, 6))
-        nx.draw(G, pos, with_labels=True, node_color='lightblue', node_size=3000, font_size=10, font_color='black',
-                edge_color='gray')
-        plt.show()
-        pass
+        :param steps:
+        :param transitions:
+        :param options: Layered_Layout keyword arguments
+        :return: Layered_Layout with the step positions
+        """
+        edges = [(from_step, to_step) for transition in transitions
+                 for from_step in transition['from'] for to_step in transition['to']]
+        return Layered_Layout([step['name'] for step in steps], edges, **options)
+
+
+def export_project(project, output_dir, compressed=False):
+    """ Write every .gr7 file of a parsed project to its own draw.io file, one page per sequence.
+
+    :param project: Project_Parse
+    :param output_dir:
+    :param compressed: deflate the pages like draw.io does
+    :return: list of written .drawio files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    drawio_files = []
+    for file, result in project.file_data.items():
+        if not file.lower().endswith('.gr7'):
+            continue
+        drawio_file = os.path.join(output_dir, os.path.basename(file)[:-4] + 'GR7.drawio')
+        with DrawIO_Writer(drawio_file, compressed) as writer:
+            for sequence in result:
+                writer.write_sequence(sequence)
+        drawio_files.append(drawio_file)
+    return drawio_files
 
 
 if __name__ == "__main__":
-    # Sample input from the previously decoded content
-    drawio = DrawIO("../../S7_Data/B3Z11502.gr7")
+    # Sample input from the previously decoded content, written to Parsed_Data next to S7_Data
+    root = os.path.join(os.path.dirname(__file__), '..', '..')
+    drawio = DrawIO(sys.argv[1] if len(sys.argv) > 1 else os.path.join(root, 'S7_Data', 'B3Z11502.gr7'),
+                    os.path.join(root, 'Parsed_Data'))
@@ -0,0 +1,196 @@
+import base64
+import io
+import re
+from urllib.parse import quote, unquote
+from xml.sax.saxutils import escape
+import zlib
+
+from App.DrawIO.Layered_Layout import Layered_Layout
+from App.S7_Parse.GR7_Parse import initial_step_names
+from App.S7_Parse.Instrumentation import add_count, timed_stage
+
+# Newlines and tabs are kept in attribute values as character references, draw.io shows them as line breaks
+XML_ATTR_ENTITIES = {'"': '&quot;', '\n': '&#10;', '\r': '', '\t': '&#9;'}
+# Characters XML 1.0 does not allow even as character references, e.g. control codes in PLC comments
+XML_INVALID_PATTERN = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+STEP_STYLE = 'rounded=0;whiteSpace=wrap;html=1;'
+INITIAL_STEP_STYLE = 'shape=ext;double=1;rounded=0;whiteSpace=wrap;html=1;'
+EDGE_STYLE = 'edgeStyle=orthogonalEdgeStyle;rounded=0;orthogonalLoop=1;html=1;'
+JUMP_STYLE = EDGE_STYLE + 'dashed=1;'  # Jumps back against the flow of the sequence
+
+VERTEX_TEMPLATE = ('<mxCell id="{id}" value="{value}" style="{style}" vertex="1" parent="1">'
+                   '<mxGeometry x="{x}" y="{y}" width="{width}" height="{height}" as="geometry" /></mxCell>')
+EDGE_TEMPLATE = ('<UserObject label="{value}" tooltip="{tooltip}" id="{id}">'
+                 '<mxCell style="{style}" edge="1" parent="1" source="{source}" target="{target}">'
+                 '<mxGeometry relative="1" as="geometry">{points}</mxGeometry></mxCell></UserObject>')
+POINTS_TEMPLATE = '<Array as="points">{}</Array>'
+POINT_TEMPLATE = '<mxPoint x="{:g}" y="{:g}" />'
+
+
+def escape_attr(value):
+    """ Escape text for a double quoted XML attribute value, characters XML does not allow are removed.
+
+    :param value:
+    :return: escaped text
+    """
+    return escape(XML_INVALID_PATTERN.sub('', str(value)), XML_ATTR_ENTITIES)
+
+
+def compress_diagram(graph_model):
+    """ Compress an mxGraphModel the way draw.io stores diagram pages: URI encoded, raw deflate, base64.
+
+    :param graph_model: mxGraphModel XML text
+    :return: compressed payload
+    """
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    data = compressor.compress(quote(graph_model, safe="~()*!.'").encode('ascii')) + compressor.flush()
+    return base64.b64encode(data).decode('ascii')
+
+
+def decompress_diagram(payload):
+    """ Reverse of compress_diagram.
+
+    :param payload:
+    :return: mxGraphModel XML text
+    """
+    return unquote(zlib.decompress(base64.b64decode(payload), -15).decode('ascii'))
+
+
+class DrawIO_Writer:
+    """DrawIO Writer will write GR7 sequences into a draw.io file incrementally, one diagram page per sequence.
+
+    Steps become vertices placed by Layered_Layout and every transition becomes one edge from each of its from
+    steps to each of its to steps, labelled with the transition name and with the condition as tooltip. Cells
+    are written straight to the output as they are formatted, only a compressed page is collected before it
+    is deflated.
+
+    Args:
+        output: Path of the .drawio file or an open text file / io.StringIO.
+        compressed (bool): Store the pages deflated and base64 encoded like draw.io does.
+        layout_options (dict): Layered_Layout keyword arguments.
+
+    Attributes:
+        pages (int): Number of diagram pages written.
+        cells (int): Number of vertices and edges written.
+    """
+
+    def __init__(self, output, compressed=False, layout_options=None):
+        self.compressed = compressed
+        self.layout_options = layout_options or {}
+        self.pages = 0
+        self.cells = 0
+        if isinstance(output, str):
+            self.output = open(output, 'w', encoding='utf-8', buffering=1 << 20)
+            self.owns_output = True
+        else:
+            self.output = output
+            self.owns_output = False
+        self.output.write('<mxfile host="S7_Parsing">')
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.output.write('</mxfile>\n')
+        if self.owns_output:
+            self.output.close()
+
+    def write_sequence(self, sequence, name=None):
+        """ Write one sequence as a diagram page.
+
+        :param sequence: Sequence record
+        :param name: page name, the FB and sequence name by default
+        """
+        if name is None:
+            name = ' '.join(part for part in (sequence.fb_name, sequence.seq_name) if part)
+        self.write_page(sequence.step_data, sequence.transition_data, name or 'Page-' + str(self.pages + 1))
+
+    def write_page(self, steps, transitions, name):
+        """ Write the steps and transitions as a diagram page.
+
+        :param steps: Step records or dictionaries
+        :param transitions: Transition records or dictionaries
+        :param name: page name
+        """
+        self.pages += 1
+        with timed_stage('drawio.page'):
+            self.output.write('<diagram name="{}" id="page-{}">'.format(escape_attr(name), self.pages))
+            if self.compressed:
+                buffer = io.StringIO()
+                cells = write_graph_model(buffer.write, steps, transitions, self.layout_options)
+                with timed_stage('drawio.compress'):
+                    self.output.write(compress_diagram(buffer.getvalue()))
+            else:
+                cells = write_graph_model(self.output.write, steps, transitions, self.layout_options)
+            self.output.write('</diagram>')
+        self.cells += cells
+        add_count('drawio.pages')
+        add_count('drawio.cells', cells)
+
+
+def write_graph_model(write, steps, transitions, layout_options=None):
+    """ Write the mxGraphModel of steps and transitions piece by piece.
+
+    :param write: write function of a text file or buffer
+    :param steps: Step records or dictionaries
+    :param transitions: Transition records or dictionaries
+    :param layout_options: Layered_Layout keyword arguments
+    :return: number of vertices and edges written
+    """
+    edges = [(from_step, to_step) for transition in transitions
+             for from_step in transition['from'] for to_step in transition['to']]
+    # The initial steps go first so the layout places them at the top
+    initial_steps = initial_step_names(steps)
+    nodes = initial_steps + [step['name'] for step in steps if step['name'] not in initial_steps]
+    with timed_stage('drawio.layout'):
+        layout = Layered_Layout(nodes, edges, **(layout_options or {}))
+    write('<mxGraphModel><root><mxCell id="0" /><mxCell id="1" parent="0" />')
+    steps_by_name = {step['name']: step for step in steps}
+    cell_ids = {}
+    for name, (x, y) in layout.positions.items():
+        cell_ids[name] = cell_id = 'step-' + str(len(cell_ids) + 1)
+        step = steps_by_name.get(name)
+        # Transitions may lead to steps that are not part of the step list, e.g. a truncated export
+        value = name if step is None else str(step['number']) + ' ' + name
+        write(VERTEX_TEMPLATE.format(id=cell_id, value=escape_attr(value),
+                                     style=INITIAL_STEP_STYLE if name in initial_steps else STEP_STYLE,
+                                     x=x, y=y, width=layout.node_width, height=layout.node_height))
+
+    edge_number = 0
+    for transition in transitions:
+        value = escape_attr('T' + str(transition['number']) + ' ' + transition['name'])
+        tooltip = escape_attr(transition['condition'])
+        for from_step in transition['from']:
+            for to_step in transition['to']:
+                edge_number += 1
+                edge = (from_step, to_step)
+                points = layout.edge_points.get(edge)
+                points = POINTS_TEMPLATE.format(''.join(POINT_TEMPLATE.format(*point) for point in points)) \
+                    if points else ''
+                write(EDGE_TEMPLATE.format(id='edge-' + str(edge_number), value=value, tooltip=tooltip,
+                                           style=JUMP_STYLE if edge in layout.back_edges else EDGE_STYLE,
+                                           source=cell_ids[from_step], target=cell_ids[to_step],
+                                           points=points))
+    write('</root></mxGraphModel>')
+    return len(cell_ids) + edge_number
+
+
+def graph_model_xml(steps, transitions, **layout_options):
+    """ Build the mxGraphModel XML text of steps and transitions.
+
+    :param steps:
+    :param transitions:
+    :param layout_options: Layered_Layout keyword arguments
+    :return: xml text
+    """
+    buffer = io.StringIO()
+    write_graph_model(buffer.write, steps, transitions, layout_options)
+    return buffer.getvalue()
@@ -0,0 +1,366 @@
+from collections import deque
+
+DUMMY_WIDTH = 0  # Dummy nodes carry long edges through a layer and only need the gap around them
+
+
+def count_crossings(upper_order, lower_order, edges):
+    """ Count the edge crossings between two adjacent layers in O(E log V) with an accumulator tree
+    (Barth, Juenger, Mutzel).
+
+    :param upper_order: node -> position in the upper layer
+    :param lower_order: node -> position in the lower layer
+    :param edges: list of (upper node, lower node)
+    :return: number of crossings
+    """
+    if len(edges) < 2:
+        return 0
+    positions = sorted((upper_order[upper], lower_order[lower]) for upper, lower in edges)
+    size = 1
+    while size < len(lower_order):
+        size *= 2
+    tree = [0] * (2 * size)
+    crossings = 0
+    for _, lower in positions:
+        index = lower + size
+        tree[index] += 1
+        while index > 1:
+            # Every edge already inserted further right in the lower layer crosses this one
+            if index % 2 == 0:
+                crossings += tree[index + 1]
+            index //= 2
+            tree[index] += 1
+    return crossings
+
+
+class Layered_Layout:
+    """Layered Layout will place a directed graph in horizontal layers (Sugiyama style) for the draw.io export,
+    with the flow running top to bottom like a GRAPH7 sequence.
+
+    The layout runs in four stages, each linear in the size of the graph apart from the per layer sorts:
+    cycles are broken by setting aside a small set of back edges, nodes are layered by longest path over a
+    topological order, long forward edges are split with dummy nodes and the order inside each
+    layer is improved with barycenter sweeps, keeping the order with the fewest crossings. The x coordinates
+    are then pulled towards the neighbours of each node while keeping the order and spacing of the layer.
+
+    Back edges are the jumps of a sequence, e.g. back to the initial step. Like GRAPH7 draws them as jump
+    arrows they take no part in the layering and ordering, so a few jumps over thousands of steps do not fill
+    every layer in between with dummy nodes. Their target always lies above their source.
+
+    Args:
+        nodes (list): Node keys, e.g. step names. The first node is placed first, e.g. the initial step.
+        edges (list(tuple)): (source, target) node keys, unknown keys are added as nodes.
+        node_width (int): Width of a node.
+        node_height (int): Height of a node.
+        spacing_x (int): Horizontal gap between two nodes of a layer.
+        spacing_y (int): Vertical gap between two layers.
+        sweeps (int): Number of down and up barycenter sweeps.
+
+    Attributes:
+        layers (list(list)): Node keys of every layer in their final order, dummy nodes excluded.
+        rank (dict): Node key -> layer index.
+        positions (dict): Node key -> (x, y) of the top left corner.
+        edge_points (dict): (source, target) -> list of (x, y) bend points of a forward edge through the layers
+            it crosses.
+        back_edges (set): (source, target) edges against the flow, left out of the layout.
+        crossings (int): Edge crossings of the final order.
+    """
+
+    def __init__(self, nodes, edges, node_width=120, node_height=60, spacing_x=40, spacing_y=80, sweeps=8):
+        self.node_width = node_width
+        self.node_height = node_height
+        self.spacing_x = spacing_x
+        self.spacing_y = spacing_y
+        self.sweeps = sweeps
+
+        # Work on integer ids, keys are only used again for the results
+        self.keys = list(dict.fromkeys(nodes))
+        self.index = {key: number for number, key in enumerate(self.keys)}
+        self.edges = []
+        seen = set()
+        for source, target in edges:
+            for key in (source, target):
+                if key not in self.index:
+                    self.index[key] = len(self.keys)
+                    self.keys.append(key)
+            edge = (self.index[source], self.index[target])
+            if edge[0] != edge[1] and edge not in seen:
+                seen.add(edge)
+                self.edges.append(edge)
+        self.node_count = len(self.keys)
+
+        self.back_edges = set()
+        self.rank = {}
+        self.layers = []
+        self.positions = {}
+        self.edge_points = {}
+        self.crossings = 0
+        if self.node_count:
+            self.layout()
+
+    def layout(self):
+        dag_edges = self.remove_cycles()
+        ranks = self.assign_layers(dag_edges)
+        layers, down, up, chains = self.insert_dummies(dag_edges, ranks)
+        layers = self.order_layers(layers, down, up)
+        x_positions = self.assign_coordinates(layers, down, up)
+
+        layer_height = self.node_height + self.spacing_y
+        for number, layer in enumerate(layers):
+            real_nodes = [node for node in layer if node < self.node_count]
+            self.layers.append([self.keys[node] for node in real_nodes])
+            for node in real_nodes:
+                key = self.keys[node]
+                self.rank[key] = number
+                self.positions[key] = (x_positions[node], number * layer_height)
+
+        # Bend points of long edges run through the centre of their dummy nodes
+        for (source, target), dummies in chains.items():
+            points = [(x_positions[dummy] + DUMMY_WIDTH / 2, ranks[dummy] * layer_height + self.node_height / 2)
+                      for dummy in dummies]
+            self.edge_points[(self.keys[source], self.keys[target])] = points
+
+    def remove_cycles(self):
+        """ Order the nodes topologically from the first node (the initial step) and set aside the edges pointing
+        back against that order. When no node is ready, a further node without predecessors is taken first,
+        and only when every remaining node still waits for a predecessor the node reached first is taken anyway
+        and its open incoming edges become back edges. Cycles are broken where the flow first runs into them,
+        which for a GR7 sequence are the jumps, and a graph without cycles keeps all of its edges.
+
+        :return: list of acyclic (source, target) edges
+        """
+        successors = [[] for _ in range(self.node_count)]
+        in_degree = [0] * self.node_count
+        for source, target in self.edges:
+            successors[source].append(target)
+            in_degree[target] += 1
+
+        order = [-1] * self.node_count
+        ready = deque()
+        roots = deque(node for node in range(self.node_count) if in_degree[node] == 0)
+        reached = deque()  # Nodes with at least one ordered predecessor, in the order they were reached
+        position = 0
+        next_root = 0
+        while position < self.node_count:
+            if ready:
+                node = ready.popleft()
+            else:
+                while roots and order[roots[0]] >= 0:
+                    roots.popleft()
+                while reached and order[reached[0]] >= 0:
+                    reached.popleft()
+                if roots and position:
+                    node = roots.popleft()
+                elif reached:
+                    node = reached.popleft()
+                else:
+                    # Nothing reached yet, start from the first node of the input that is not ordered
+                    while order[next_root] >= 0:
+                        next_root += 1
+                    node = next_root
+            if order[node] >= 0:
+                continue
+            order[node] = position
+            position += 1
+            for child in successors[node]:
+                if order[child] < 0:
+                    in_degree[child] -= 1
+                    if in_degree[child] == 0:
+                        ready.append(child)
+                    else:
+                        reached.append(child)
+
+        dag_edges = []
+        for source, target in self.edges:
+            if order[target] < order[source]:
+                self.back_edges.add((self.keys[source], self.keys[target]))
+            else:
+                dag_edges.append((source, target))
+        return dag_edges
+
+    def assign_layers(self, dag_edges):
+        """ Longest path layering over a topological order (Kahn), every edge points at least one layer down.
+
+        :param dag_edges:
+        :return: list of layer per node
+        """
+        successors = [[] for _ in range(self.node_count)]
+        in_degree = [0] * self.node_count
+        for source, target in dag_edges:
+            successors[source].append(target)
+            in_degree[target] += 1
+
+        ranks = [0] * self.node_count
+        queue = deque(node for node in range(self.node_count) if in_degree[node] == 0)
+        while queue:
+            node = queue.popleft()
+            for child in successors[node]:
+                if ranks[node] + 1 > ranks[child]:
+                    ranks[child] = ranks[node] + 1
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    queue.append(child)
+        return ranks
+
+    def insert_dummies(self, dag_edges, ranks):
+        """ Split edges spanning more than one layer into chains through dummy nodes, so every edge connects
+        adjacent layers. Dummy ids start at node_count.
+
+        :param dag_edges:
+        :param ranks: layer per node, extended with the dummy layers
+        :return: (layers, down, up, chains) with down/up the neighbours of each node in the next/previous
+                 layer and chains the dummy ids of each original (source, target) edge
+        """
+        down = [[] for _ in range(self.node_count)]
+        up = [[] for _ in range(self.node_count)]
+        chains = {}
+        for source, target in dag_edges:
+            previous = source
+            dummies = []
+            for rank in range(ranks[source] + 1, ranks[target]):
+                dummy = len(ranks)
+                ranks.append(rank)
+                down.append([])
+                up.append([])
+                down[previous].append(dummy)
+                up[dummy].append(previous)
+                dummies.append(dummy)
+                previous = dummy
+            down[previous].append(target)
+            up[target].append(previous)
+            if dummies:
+                chains[(source, target)] = dummies
+
+        # Initial order: breadth first from the top so connected nodes start out close to each other
+        layers = [[] for _ in range(max(ranks) + 1)]
+        placed = [False] * len(ranks)
+        for root in range(self.node_count):
+            if placed[root] or up[root]:
+                continue
+            placed[root] = True
+            queue = deque([root])
+            while queue:
+                node = queue.popleft()
+                layers[ranks[node]].append(node)
+                for child in down[node]:
+                    if not placed[child]:
+                        placed[child] = True
+                        queue.append(child)
+        for node in range(len(ranks)):
+            if not placed[node]:
+                layers[ranks[node]].append(node)
+        return layers, down, up, chains
+
+    def order_layers(self, layers, down, up):
+        """ Reduce crossings with alternating down and up barycenter sweeps and keep the best order seen.
+
+        :param layers:
+        :param down:
+        :param up:
+        :return: layers in their final order
+        """
+        best = [list(layer) for layer in layers]
+        best_crossings = self.total_crossings(layers, down)
+        for sweep in range(self.sweeps):
+            if best_crossings == 0:
+                break
+            if sweep % 2 == 0:
+                for number in range(1, len(layers)):
+                    layers[number] = self.barycenter_order(layers[number], layers[number - 1], up)
+            else:
+                for number in range(len(layers) - 2, -1, -1):
+                    layers[number] = self.barycenter_order(layers[number], layers[number + 1], down)
+            crossings = self.total_crossings(layers, down)
+            if crossings < best_crossings:
+                best = [list(layer) for layer in layers]
+                best_crossings = crossings
+        self.crossings = best_crossings
+        return best
+
+    def barycenter_order(self, layer, fixed_layer, neighbours):
+        order = {node: position for position, node in enumerate(fixed_layer)}
+        keys = []
+        for position, node in enumerate(layer):
+            linked = neighbours[node]
+            # Nodes without neighbours in the fixed layer keep their place
+            barycenter = sum(order[other] for other in linked) / len(linked) if linked else position
+            keys.append((barycenter, position, node))
+        keys.sort()
+        return [node for _, _, node in keys]
+
+    def total_crossings(self, layers, down):
+        crossings = 0
+        for number in range(len(layers) - 1):
+            upper_order = {node: position for position, node in enumerate(layers[number])}
+            lower_order = {node: position for position, node in enumerate(layers[number + 1])}
+            edges = [(node, child) for node in layers[number] for child in down[node]]
+            crossings += count_crossings(upper_order, lower_order, edges)
+        return crossings
+
+    def assign_coordinates(self, layers, down, up):
+        """ Pull every node towards the mean x of its neighbours in the adjacent layer, alternating down and up.
+        Each layer is placed once packed from the left and once from the right around the wanted positions and
+        the two are averaged, which keeps the order and the minimum spacing.
+
+        :param layers:
+        :param down:
+        :param up:
+        :return: list of x per node
+        """
+        widths = [self.node_width] * self.node_count + [DUMMY_WIDTH] * (len(down) - self.node_count)
+        x_positions = [0.0] * len(down)
+        for layer in layers:
+            x = 0.0
+            for node in layer:
+                x_positions[node] = x
+                x += widths[node] + self.spacing_x
+
+        for sweep in range(4):
+            if sweep % 2 == 0:
+                order, neighbours = range(1, len(layers)), up
+            else:
+                order, neighbours = range(len(layers) - 2, -1, -1), down
+            for number in order:
+                self.place_layer(layers[number], neighbours, widths, x_positions)
+
+        # Shift everything so the left most node starts at 0
+        offset = min(x_positions) if x_positions else 0
+        return [round(x - offset) for x in x_positions]
+
+    def place_layer(self, layer, neighbours, widths, x_positions):
+        # Work with centres so nodes and dummies of different widths line up
+        wanted = []
+        for node in layer:
+            linked = neighbours[node]
+            centre = x_positions[node] + widths[node] / 2
+            if linked:
+                centre = sum(x_positions[other] + widths[other] / 2 for other in linked) / len(linked)
+            wanted.append(centre)
+
+        count = len(layer)
+        left = [0.0] * count
+        right = [0.0] * count
+        for position in range(count):
+            left[position] = wanted[position]
+            if position:
+                gap = (widths[layer[position - 1]] + widths[layer[position]]) / 2 + self.spacing_x
+                left[position] = max(left[position], left[position - 1] + gap)
+        for position in range(count - 1, -1, -1):
+            right[position] = wanted[position]
+            if position < count - 1:
+                gap = (widths[layer[position]] + widths[layer[position + 1]]) / 2 + self.spacing_x
+                right[position] = min(right[position], right[position + 1] - gap)
+        for position, node in enumerate(layer):
+            x_positions[node] = (left[position] + right[position]) / 2 - widths[node] / 2
+
+
+def sequence_layout(sequence, **options):
+    """ Lay out the steps of a GR7 sequence with one edge per transition from every from step to every to step.
+
+    :param sequence: Sequence record
+    :param options: Layered_Layout keyword arguments
+    :return: Layered_Layout
+    """
+    nodes = [step.name for step in sequence.step_data]
+    edges = [(from_step, to_step) for transition in sequence.transition_data
+             for from_step in transition.from_steps for to_step in transition.to_steps]
+    return Layered_Layout(nodes, edges, **options)
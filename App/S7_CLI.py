@@ -0,0 +1,460 @@
+import argparse
+import json
+import os
+import sys
+
+# Only the standard library is imported up front. Parsers, the translator backend and the draw.io writer are
+# imported by the subcommand that needs them, so the CLI starts fast and --help never loads them.
+
+EXPORT_EXTS = ('.gr7', '.awl', '.sdf', '.cfg')
+OUTPUT_FORMATS = ('ndjson', 'csv', 'parquet')
+ROW_GROUP_SIZE = 65536  # Rows buffered per table before a Parquet row group is written
+
+# Flat tables of the csv and parquet formats, one row per record without nesting
+TABLE_COLUMNS = {
+    'sequences': ('file', 'fb_name', 'seq_name', 'comment', 'steps', 'transitions'),
+    'steps': ('file', 'fb_name', 'name', 'number', 'initial', 'supervision', 'condition', 'comment'),
+    'transitions': ('file', 'fb_name', 'name', 'number', 'from_steps', 'to_steps', 'condition'),
+    'blocks': ('file', 'block_type', 'name', 'title', 'networks', 'line_start', 'line_end'),
+    'instructions': ('file', 'block', 'network', 'label', 'operation', 'operand', 'comment'),
+    'symbols': ('file', 'name', 'area', 'byte', 'bit', 'data_type', 'comment'),
+    'sections': ('file', 'kind', 'header', 'body_offset', 'body_length'),
+    'usages': ('query', 'source', 'block', 'element', 'kind', 'operand'),
+}
+INTEGER_COLUMNS = {'steps', 'transitions', 'networks', 'line_start', 'line_end', 'network', 'byte', 'bit',
+                   'body_offset', 'body_length'}
+BOOLEAN_COLUMNS = {'initial'}
+
+
+def find_exports(paths, exts=EXPORT_EXTS):
+    """ Expand files and directories into the export files below them, directories are searched recursively.
+
+    :param paths:
+    :param exts: file extensions to keep
+    :return: list of files
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                dir_names.sort()
+                files.extend(os.path.join(dir_path, file_name) for file_name in sorted(file_names)
+                             if os.path.splitext(file_name)[1].lower() in exts)
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError("No such file or directory: " + path)
+    return files
+
+
+def iter_records(file):
+    """ Parse one export file, .gr7 and .awl files are streamed a record at a time.
+
+    :param file:
+    :return: generator of (kind, record) with kind 'sequence', 'block', 'symbol' or 'section'
+    """
+    ext = os.path.splitext(file)[1].lower()
+    if ext == '.gr7':
+        from App.S7_Parse.GR7_Parse import GR7_Parse
+        for sequence in GR7_Parse(file, stream=True).iter_sequences():
+            yield 'sequence', sequence
+    elif ext == '.awl':
+        from App.S7_Parse.AWL_Parse import AWL_Parse
+        for block in AWL_Parse(file, stream=True).iter_blocks():
+            yield 'block', block
+    elif ext == '.sdf':
+        from App.S7_Parse.SDF_Parse import SDF_Parse
+        for symbol in SDF_Parse(file).symbol_data:
+            yield 'symbol', symbol
+    elif ext == '.cfg':
+        from App.S7_Parse.CFG_Parse import CFG_Parse
+        for section in CFG_Parse(file).section_list:
+            yield 'section', section
+    else:
+        raise ValueError("No parser for " + file)
+
+
+def record_dict(kind, file, record):
+    """ The nested dictionary of a parsed record as written to NDJSON.
+
+    :param kind:
+    :param file:
+    :param record:
+    :return: dictionary
+    """
+    if kind == 'section':
+        attributes, lists = record.load()
+        data = {'kind': record.kind, 'header': record.header, 'location': record.location(),
+                'names': record.names(), 'attributes': attributes, 'lists': lists}
+    else:
+        data = record.to_dict()
+    return {'file': file, 'record': kind, **data}
+
+
+def table_rows(kind, file, record):
+    """ Flatten a parsed record into rows of the TABLE_COLUMNS tables.
+
+    :param kind:
+    :param file:
+    :param record:
+    :return: generator of (table, row tuple)
+    """
+    if kind == 'sequence':
+        yield 'sequences', (file, record.fb_name, record.seq_name, record.comment, len(record.step_data),
+                            len(record.transition_data))
+        for step in record.step_data:
+            condition = '\n'.join(step.condition) if isinstance(step.condition, list) else step.condition
+            yield 'steps', (file, record.fb_name, step.name, step.number, step.initial, step.supervision, condition,
+                            step.comment)
+        for transition in record.transition_data:
+            yield 'transitions', (file, record.fb_name, transition.name, transition.number,
+                                  ','.join(transition.from_steps), ','.join(transition.to_steps),
+                                  transition.condition)
+    elif kind == 'block':
+        yield 'blocks', (file, record.block_type, record.name, record.title, len(record.networks),
+                         record.line_start, record.line_end)
+        for network_no, network in enumerate(record.networks, 1):
+            for instruction in network.instructions:
+                yield 'instructions', (file, record.name, network_no, instruction.label, instruction.operation,
+                                       instruction.operand, instruction.comment)
+    elif kind == 'symbol':
+        yield 'symbols', (file, record.name, record.perph_type, record.byte, record.bit, record.data_type,
+                          record.comment)
+    elif kind == 'section':
+        yield 'sections', (file, record.kind, record.header, record.body_offset, record.body_length)
+
+
+class NDJSON_Writer:
+    """NDJSON Writer will write one JSON document per line, to a file or to stdout.
+
+    Args:
+        output (str): Output file, None or '-' for stdout.
+    """
+    nested = True
+
+    def __init__(self, output=None):
+        if output in (None, '-'):
+            self.output = sys.stdout
+            self.owns_output = False
+        else:
+            self.output = open(output, 'w', encoding='utf-8', newline='\n', buffering=1 << 20)
+            self.owns_output = True
+        self.encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+        self.records = 0
+
+    def write_record(self, record):
+        self.output.write(self.encoder.encode(record) + '\n')
+        self.records += 1
+
+    def write_row(self, table, row):
+        self.write_record(dict(zip(TABLE_COLUMNS[table], row)))
+
+    def close(self):
+        if self.owns_output:
+            self.output.close()
+        else:
+            self.output.flush()
+
+
+class CSV_Writer:
+    """CSV Writer will stream every table into <output_dir>/<table>.csv with a header line.
+
+    Args:
+        output_dir (str): Directory of the table files.
+    """
+    nested = False
+
+    def __init__(self, output_dir):
+        import csv
+        self.csv = csv
+        self.output_dir = output_dir
+        self.files = {}
+        self.writers = {}
+        self.records = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write_row(self, table, row):
+        writer = self.writers.get(table)
+        if writer is None:
+            self.files[table] = open(os.path.join(self.output_dir, table + '.csv'), 'w', encoding='utf-8',
+                                     newline='', buffering=1 << 20)
+            writer = self.writers[table] = self.csv.writer(self.files[table])
+            writer.writerow(TABLE_COLUMNS[table])
+        writer.writerow(row)
+        self.records += 1
+
+    def close(self):
+        for table_file in self.files.values():
+            table_file.close()
+
+
+class Parquet_Writer:
+    """Parquet Writer will stream every table into <output_dir>/<table>.parquet, one row group per
+    ROW_GROUP_SIZE rows. pyarrow is only needed for this format and is imported when the writer is created.
+
+    Args:
+        output_dir (str): Directory of the table files.
+    """
+    nested = False
+
+    def __init__(self, output_dir):
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.output_dir = output_dir
+        self.rows = {}
+        self.writers = {}
+        self.records = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def column_type(self, column):
+        if column in INTEGER_COLUMNS:
+            return self.pyarrow.int64()
+        if column in BOOLEAN_COLUMNS:
+            return self.pyarrow.bool_()
+        return self.pyarrow.string()
+
+    def schema(self, table):
+        return self.pyarrow.schema([(column, self.column_type(column)) for column in TABLE_COLUMNS[table]])
+
+    def write_row(self, table, row):
+        rows = self.rows.setdefault(table, [])
+        rows.append(row)
+        self.records += 1
+        if len(rows) >= ROW_GROUP_SIZE:
+            self.flush(table)
+
+    def flush(self, table):
+        rows = self.rows.pop(table, None)
+        if not rows:
+            return
+        schema = self.schema(table)
+        writer = self.writers.get(table)
+        if writer is None:
+            writer = self.writers[table] = self.parquet.ParquetWriter(
+                os.path.join(self.output_dir, table + '.parquet'), schema)
+        columns = [list(column) for column in zip(*rows)]
+        writer.write_table(self.pyarrow.Table.from_arrays(columns, schema=schema))
+
+    def close(self):
+        for table in list(self.rows):
+            self.flush(table)
+        for writer in self.writers.values():
+            writer.close()
+
+
+def open_writer(output_format, output):
+    """ Create the writer of an output format.
+
+    :param output_format: 'ndjson', 'csv' or 'parquet'
+    :param output: file for ndjson (stdout when None), directory for the table formats
+    :return: writer
+    """
+    if output_format == 'ndjson':
+        return NDJSON_Writer(output)
+    if output is None:
+        raise ValueError(output_format + " output needs a directory, use -o")
+    if output_format == 'csv':
+        return CSV_Writer(output)
+    try:
+        return Parquet_Writer(output)
+    except ImportError:
+        raise ValueError("The parquet format needs pyarrow, install it or use csv/ndjson") from None
+
+
+def write_records(writer, kind, file, record):
+    if writer.nested:
+        writer.write_record(record_dict(kind, file, record))
+    else:
+        for table, row in table_rows(kind, file, record):
+            writer.write_row(table, row)
+
+
+def parse_command(args):
+    files = find_exports(args.paths)
+    writer = open_writer(args.format, args.output)
+    failures = 0
+    try:
+        if args.workers == 1:
+            for file in files:
+                try:
+                    for kind, record in iter_records(file):
+                        write_records(writer, kind, file, record)
+                except BrokenPipeError:
+                    raise
+                except Exception as error:
+                    failures += 1
+                    print('{}: {}'.format(file, error), file=sys.stderr)
+        else:
+            # Whole files are parsed in the worker processes and written here as they come back
+            from concurrent.futures import ProcessPoolExecutor
+            from functools import partial
+            from App.S7_Parse import Instrumentation
+            from App.S7_Parse.Project_Parse import parse_file
+            kinds = {'seq_list': 'sequence', 'block_list': 'block', 'symbol_data': 'symbol',
+                     'section_list': 'section'}
+            worker = partial(parse_file, instrument=Instrumentation.ACTIVE is not None)
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                for file, attribute, result, elapsed, error, metrics in executor.map(worker, files):
+                    if metrics is not None:
+                        Instrumentation.ACTIVE.merge(metrics)
+                    if error is not None:
+                        failures += 1
+                        print('{}: {}'.format(file, error.strip().splitlines()[-1]), file=sys.stderr)
+                        continue
+                    for record in result:
+                        write_records(writer, kinds[attribute], file, record)
+    finally:
+        writer.close()
+    print('{} files, {} records, {} failed'.format(len(files), writer.records, failures), file=sys.stderr)
+    return 1 if failures else 0
+
+
+def translate_command(args):
+    from App.S7_Translator.AWL_Translate import AWL_Translate
+    from App.S7_Translator.Translation_Memory import DEFAULT_MEMORY_FILE, Translation_Memory
+    from App.S7_Translator.Translator_Backend import Stub_Backend
+
+    if args.offline:
+        # The stub placeholders must never reach a persistent memory, online runs would take them as translated
+        memory = Translation_Memory(':memory:')
+        backend = Stub_Backend(AWL_Translate.SOURCE_LANG, AWL_Translate.TARGET_LANG)
+    else:
+        memory = Translation_Memory(args.memory or DEFAULT_MEMORY_FILE)
+        backend = None
+    failures = 0
+    try:
+        # Translated copies of an earlier run are skipped when found in a directory, not when named
+        files = [file for file in find_exports(args.paths, ('.awl',))
+                 if file in args.paths or not os.path.splitext(file)[0].endswith('_EN')]
+        for file in files:
+            root_dir, file_name = os.path.split(os.path.abspath(file))
+            translation = AWL_Translate(os.path.join(root_dir, ''), os.path.splitext(file_name)[0],
+                                        backend=backend, memory=memory)
+            if translation.translated is None:
+                failures += 1
+                print('{}: translation failed, nothing written'.format(file), file=sys.stderr)
+            else:
+                print(translation.output_file)
+    finally:
+        memory.close()
+    return 1 if failures else 0
+
+
+def export_drawio_command(args):
+    from App.DrawIO.DrawIO_Writer import DrawIO_Writer
+    from App.S7_Parse.GR7_Parse import GR7_Parse
+
+    os.makedirs(args.output, exist_ok=True)
+    for file in find_exports(args.paths, ('.gr7',)):
+        drawio_file = os.path.join(args.output, os.path.splitext(os.path.basename(file))[0] + 'GR7.drawio')
+        with DrawIO_Writer(drawio_file, args.compressed) as writer:
+            for sequence in GR7_Parse(file, stream=True).iter_sequences():
+                writer.write_sequence(sequence)
+        print(drawio_file)
+    return 0
+
+
+def xref_command(args):
+    from App.S7_Parse.Cross_Reference import Cross_Reference, default_index_file
+
+    index_file = args.index or default_index_file(args.root_dir)
+    rebuild = args.rebuild or not os.path.isfile(index_file)
+    xref = Cross_Reference(index_file)
+    writer = open_writer(args.format, args.output)
+    try:
+        if rebuild:
+            from App.S7_Parse.Project_Parse import Project_Parse
+            project = Project_Parse(args.root_dir, workers=args.workers)
+            xref.build(project.symbol_data, project.seq_list, project.block_list)
+            print('{} symbols, {} references indexed in {}'.format(xref.symbol_count, xref.ref_count, index_file),
+                  file=sys.stderr)
+        for name in args.symbols:
+            for usage in xref.usages(name):
+                writer.write_row('usages', (name,) + tuple(usage))
+        for address in args.addresses:
+            for usage in xref.address_usages(address):
+                writer.write_row('usages', (address,) + tuple(usage))
+        if args.unused:
+            for name in xref.unused_symbols():
+                writer.write_row('usages', (name, None, None, None, 'unused', None))
+    finally:
+        writer.close()
+        xref.close()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='s7parse', description="Parse, translate and export Simatic Manager "
+                                                                 "Step 7 exports.")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="collect stage timings and counters, written as Prometheus text for .prom/.txt and "
+                             "JSON otherwise")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parse = commands.add_parser('parse', help="parse exports into NDJSON records or flat tables")
+    parse.add_argument('paths', nargs='+', help=".gr7/.awl/.sdf/.cfg files or directories")
+    parse.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default='ndjson')
+    parse.add_argument('-o', '--output', help="ndjson file (stdout by default) or csv/parquet directory")
+    parse.add_argument('-w', '--workers', type=int, default=1, help="worker processes, 0 for one per core")
+    parse.set_defaults(handler=parse_command)
+
+    translate = commands.add_parser('translate', help="translate the comments of .awl sources, written next to "
+                                                      "them as <name>_EN.awl")
+    translate.add_argument('paths', nargs='+', help=".awl files or directories")
+    translate.add_argument('-m', '--memory', help="translation memory file")
+    translate.add_argument('--offline', action='store_true',
+                           help="use the stub backend instead of the service, with a memory that is not persisted")
+    translate.set_defaults(handler=translate_command)
+
+    export = commands.add_parser('export-drawio', help="write every sequence of .gr7 files as draw.io pages")
+    export.add_argument('paths', nargs='+', help=".gr7 files or directories")
+    export.add_argument('-o', '--output', default='.', help="output directory")
+    export.add_argument('-c', '--compressed', action='store_true', help="deflate the pages like draw.io does")
+    export.set_defaults(handler=export_drawio_command)
+
+    xref = commands.add_parser('xref', help="build and query the symbol cross reference index of a project")
+    xref.add_argument('root_dir', help="project export directory")
+    xref.add_argument('-i', '--index', help="index file, kept per project in the parse cache directory by default")
+    xref.add_argument('-r', '--rebuild', action='store_true', help="rebuild an existing index")
+    xref.add_argument('-s', '--symbol', dest='symbols', action='append', default=[], help="usages of a symbol")
+    xref.add_argument('-a', '--address', dest='addresses', action='append', default=[],
+                      help="usages of an address, e.g. 'Q 24.5'")
+    xref.add_argument('-u', '--unused', action='store_true', help="symbols that are never used")
+    xref.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default='ndjson')
+    xref.add_argument('-o', '--output', help="ndjson file (stdout by default) or csv/parquet directory")
+    xref.add_argument('-w', '--workers', type=int, default=1, help="worker processes, 0 for one per core")
+    xref.set_defaults(handler=xref_command)
+    return parser
+
+
+def main(argv=None):
+    """ Run the s7parse command line.
+
+    :param argv: arguments, sys.argv[1:] by default
+    :return: exit status
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'workers', 1) == 0:
+        args.workers = None
+    instrumentation = None
+    if args.profile:
+        from App.S7_Parse import Instrumentation
+        instrumentation = Instrumentation.enable()
+    try:
+        status = args.handler(args)
+    except BrokenPipeError:
+        # The reader of stdout went away, e.g. | head. Point stdout at devnull so the exit flush is quiet.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (FileNotFoundError, ValueError) as error:
+        parser.exit(2, 's7parse: error: {}\n'.format(error))
+    if instrumentation is not None:
+        instrumentation.dump(args.profile)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
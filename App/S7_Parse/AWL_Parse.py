@@ -1,5 +1,325 @@
-
-
-class AWL_Parse:
-    def __init__(self):
-        pass
+from collections import namedtuple
+import os
+import re
+import sys
+
+from App.S7_Parse.Instrumentation import active_instrumentation, timed_stage
+from App.S7_Parse.Mapped_File import Mapped_File
+
+AWL_ENCODING = 'cp1252'  # Simatic Manager writes its exports with the Windows code page
+
+# Block headers, attributes and sections of an AWL (STL) source, see S7_Data/Parse_Info/KeywordsAWL.txt
+AWL_BLOCK_TYPES = ('FUNCTION_BLOCK', 'FUNCTION', 'DATA_BLOCK', 'ORGANIZATION_BLOCK', 'TYPE')
+AWL_BLOCK_ENDS = {'END_' + block_type: block_type for block_type in AWL_BLOCK_TYPES}
+AWL_ATTRIBUTES = ('TITLE', 'AUTHOR', 'FAMILY', 'NAME', 'VERSION', 'KNOW_HOW_PROTECT', 'CODE_VERSION1')
+AWL_VAR_SECTIONS = ('VAR_INPUT', 'VAR_OUTPUT', 'VAR_IN_OUT', 'VAR_TEMP', 'VAR', 'STRUCT')
+
+AWL_LABEL_PATTERN = re.compile(r"([A-Za-z_][A-Za-z0-9_]{0,3}):(?!=)\s*")
+
+# label is '' when the instruction has no jump label, parameters is a list of (formal, actual) for CALL
+AWL_Instruction = namedtuple('AWL_Instruction', ('label', 'operation', 'operand', 'parameters', 'comment'))
+AWL_Declaration = namedtuple('AWL_Declaration', ('name', 'data_type', 'initial', 'comment'))
+
+
+def find_comment(text):
+    """ Find the // that starts the trailing comment of a source line, // inside quoted strings is code.
+
+    :param text:
+    :return: position of the //, -1 without comment
+    """
+    position = text.find('//')
+    while position > -1 and text.count("'", 0, position) % 2:
+        position = text.find('//', position + 2)
+    return position
+
+
+def split_comment(text):
+    """ Split a source line into code and its trailing // comment, ignoring // inside quoted strings.
+
+    :param text:
+    :return: (code, comment)
+    """
+    position = find_comment(text)
+    if position < 0:
+        return text, ''
+    return text[:position].rstrip(), text[position + 2:].strip()
+
+
+def tokenize_awl(lines):
+    """ This function will tokenize AWL source lines in a single forward pass. The lines can be any iterable,
+    an open file streams the source without reading it whole.
+
+    Tokens are (kind, line_no, value) tuples with kind one of BLOCK, END_BLOCK, ATTRIBUTE, VAR_SECTION,
+    DECLARATION, END_VAR, BEGIN, NETWORK, TITLE, COMMENT, INSTRUCTION and ASSIGNMENT.
+
+    :param lines:
+    :return: generator of tokens
+    """
+    in_code = False
+    var_section = None
+    struct_path = []
+    call = None
+    for line_no, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text:
+            continue
+        if text.startswith('//'):
+            yield 'COMMENT', line_no, text[2:].strip()
+            continue
+
+        code, comment = split_comment(text)
+
+        # Collect the parameter lines of a multi-line CALL until its closing bracket
+        if call is not None:
+            closed = code.endswith(');') or code.endswith(')')
+            parameter = code.rstrip(';').rstrip(')').rstrip(',').strip()
+            if parameter:
+                formal, _, actual = parameter.partition(':=')
+                call[3].append((formal.strip(), actual.strip()))
+            if closed:
+                yield 'INSTRUCTION', call[0], AWL_Instruction(call[1], 'CALL', call[2], call[3], call[4])
+                call = None
+            continue
+
+        word, _, rest = code.partition(' ')
+        word = word.rstrip(';')
+        if word in AWL_BLOCK_TYPES:
+            name, _, return_type = rest.partition(' : ')
+            yield 'BLOCK', line_no, (word, name.strip(), return_type.strip())
+            in_code = False
+            var_section = None
+            continue
+        if word in AWL_BLOCK_ENDS:
+            yield 'END_BLOCK', line_no, AWL_BLOCK_ENDS[word]
+            in_code = False
+            var_section = None
+            continue
+
+        if in_code:
+            if word == 'NETWORK':
+                yield 'NETWORK', line_no, None
+            elif word == 'TITLE' or code.startswith('TITLE='):
+                yield 'TITLE', line_no, code.partition('=')[2].strip()
+            elif ':=' in code and not AWL_LABEL_PATTERN.match(code):
+                # Initial values in the BEGIN section of a data block
+                name, _, value = code.rstrip(';').partition(':=')
+                yield 'ASSIGNMENT', line_no, (name.strip(), value.strip())
+            else:
+                label = ''
+                match = AWL_LABEL_PATTERN.match(code) if ':' in code else None
+                if match:
+                    label = match.group(1)
+                    code = code[match.end():]
+                operation, _, operand = code.rstrip(';').strip().partition(' ')
+                operand = operand.strip()
+                if operation == 'CALL' and operand.endswith('('):
+                    call = [line_no, label, operand[:-1].strip(), [], comment]
+                    continue
+                if operation or label:
+                    yield 'INSTRUCTION', line_no, AWL_Instruction(label, operation, operand, None, comment)
+            continue
+
+        if var_section:
+            if word == 'END_VAR' or (word == 'END_STRUCT' and not struct_path and var_section == 'STRUCT'):
+                yield 'END_VAR', line_no, var_section
+                var_section = None
+                continue
+            if word == 'END_STRUCT':
+                if struct_path:
+                    struct_path.pop()
+                continue
+            name, _, declaration = code.partition(':')
+            data_type, _, initial = declaration.rstrip(';').partition(':=')
+            name = name.strip()
+            data_type = data_type.strip()
+            yield 'DECLARATION', line_no, AWL_Declaration('.'.join(struct_path + [name]), data_type,
+                                                          initial.strip(), comment)
+            # STRUCT and ARRAY [1..4] OF STRUCT both open a nested structure closed by END_STRUCT
+            if data_type == 'STRUCT' or data_type.endswith(' STRUCT'):
+                struct_path.append(name)
+            continue
+
+        if word in AWL_VAR_SECTIONS:
+            var_section = word
+            struct_path = []
+            yield 'VAR_SECTION', line_no, code
+        elif word == 'BEGIN':
+            yield 'BEGIN', line_no, None
+            in_code = True
+        elif word in AWL_ATTRIBUTES or code.startswith('TITLE='):
+            key, _, value = code.partition('=' if code.startswith('TITLE') else ':')
+            yield 'ATTRIBUTE', line_no, (key.strip(), value.strip().strip("'"))
+        elif code.startswith('{'):
+            # Block attribute list such as { S7_language := '...' }
+            for attribute in code.strip('{} ').split(';'):
+                key, _, value = attribute.partition(':=')
+                if key.strip():
+                    yield 'ATTRIBUTE', line_no, (key.strip(), value.strip().strip("'"))
+        else:
+            # Anything else in a block header, e.g. the FB an instance data block belongs to
+            yield 'ATTRIBUTE', line_no, ('INSTANCE_OF', code.rstrip(';').strip())
+
+
+class AWL_Network:
+    __slots__ = ('title', 'comment', 'instructions')
+
+    def __init__(self, title=''):
+        self.title = title
+        self.comment = []
+        self.instructions = []
+
+    def to_dict(self):
+        return {'title': self.title, 'comment': self.comment,
+                'instructions': [instruction._asdict() for instruction in self.instructions]}
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __repr__(self):
+        return 'AWL_Network' + repr(self.to_dict())
+
+
+class AWL_Block:
+    """ One FUNCTION/FUNCTION_BLOCK/DATA_BLOCK/ORGANIZATION_BLOCK/TYPE of an AWL source. var_sections maps
+    the section keyword to its declarations, assignments holds the initial values of a data block.
+    """
+    __slots__ = ('block_type', 'name', 'return_type', 'title', 'comment', 'attributes', 'var_sections',
+                 'networks', 'assignments', 'line_start', 'line_end')
+
+    def __init__(self, block_type, name, return_type='', line_start=0):
+        self.block_type = block_type
+        self.name = name
+        self.return_type = return_type
+        self.title = ''
+        self.comment = []
+        self.attributes = {}
+        self.var_sections = {}
+        self.networks = []
+        self.assignments = []
+        self.line_start = line_start
+        self.line_end = line_start
+
+    def to_dict(self):
+        block = {attr: getattr(self, attr) for attr in self.__slots__}
+        block['var_sections'] = {section: [declaration._asdict() for declaration in declarations]
+                                 for section, declarations in self.var_sections.items()}
+        block['networks'] = [network.to_dict() for network in self.networks]
+        return block
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __repr__(self):
+        return 'AWL_Block' + repr({'block_type': self.block_type, 'name': self.name,
+                                   'networks': len(self.networks)})
+
+
+class AWL_Parse:
+    CACHE_KIND = 'awl'
+
+    def __init__(self, awl_file, stream=False, cache=None):
+        self.file = awl_file
+        self.filename = os.path.basename(awl_file)
+
+        # Parse the blocks in one pass over the file. In stream mode the blocks are only parsed as
+        # iter_blocks() is consumed.
+        self.block_list = None
+        if not stream:
+            if cache is not None:
+                self.block_list = cache.get(self.file, self.CACHE_KIND)
+            if self.block_list is None:
+                with timed_stage('awl.parse'):
+                    self.block_list = list(self.iter_blocks())
+                if cache is not None:
+                    cache.put(self.file, self.CACHE_KIND, self.block_list)
+
+    def iter_blocks(self):
+        """ This generator will read the .awl file line by line and yield each block once its END_ line is
+        reached.
+
+        :return: generator of AWL_Block records
+        """
+        with timed_stage('awl.read'):
+            source = Mapped_File(self.file, default_encoding=AWL_ENCODING)
+        with source:
+            metrics = active_instrumentation()
+            if metrics is None:
+                yield from self.parse_blocks(source.lines())
+                return
+            blocks = networks = instructions = 0
+            for block in self.parse_blocks(source.lines()):
+                blocks += 1
+                networks += len(block.networks)
+                instructions += sum(len(network.instructions) for network in block.networks)
+                yield block
+            metrics.count('awl.bytes', source.size)
+            metrics.count('awl.blocks', blocks)
+            metrics.count('awl.networks', networks)
+            metrics.count('awl.instructions', instructions)
+
+    def parse_blocks(self, awl_data):
+        """ This function will build the AWL blocks from the token stream of the source lines.
+
+        :param awl_data: iterable of source lines, or the source text
+        :return: generator of AWL_Block records
+        """
+        if isinstance(awl_data, str):
+            awl_data = awl_data.splitlines()
+
+        block = None
+        network = None
+        for kind, line_no, value in tokenize_awl(awl_data):
+            if kind == 'BLOCK':
+                block = AWL_Block(value[0], value[1], value[2], line_no)
+                network = None
+                section = None
+            elif block is None:
+                continue
+            elif kind == 'INSTRUCTION':
+                if network is None:
+                    network = AWL_Network()
+                    block.networks.append(network)
+                network.instructions.append(value)
+            elif kind == 'DECLARATION':
+                section.append(value)
+            elif kind == 'NETWORK':
+                network = AWL_Network()
+                block.networks.append(network)
+            elif kind == 'COMMENT':
+                if network is not None:
+                    network.comment.append(value)
+                else:
+                    block.comment.append(value)
+            elif kind == 'TITLE':
+                if network is not None:
+                    network.title = value
+                else:
+                    block.title = value
+            elif kind == 'ATTRIBUTE':
+                if value[0] == 'TITLE':
+                    block.title = value[1]
+                else:
+                    block.attributes[value[0]] = value[1]
+            elif kind == 'VAR_SECTION':
+                section = block.var_sections.setdefault(value, [])
+            elif kind == 'ASSIGNMENT':
+                block.assignments.append(value)
+            elif kind == 'END_BLOCK':
+                block.line_end = line_no
+                yield block
+                block = None
+
+
+if __name__ == "__main__":
+    # S7_Data holds no AWL source, so there is no sample input to fall back to
+    if len(sys.argv) < 2:
+        print('usage: python -m App.S7_Parse.AWL_Parse <file.awl>', file=sys.stderr)
+        sys.exit(2)
+    for block in AWL_Parse(sys.argv[1]).block_list:
+        print(block.block_type, block.name, block.title, len(block.networks), 'networks')
@@ -0,0 +1,242 @@
+import os
+import re
+import sys
+
+from App.S7_Parse.Instrumentation import add_count, timed_stage
+from App.S7_Parse.Mapped_File import Mapped_File
+
+CFG_ENCODING = 'cp1252'  # Simatic Manager writes its exports with the Windows code page
+
+# Top level BEGIN/END lines, nested sections inside a body are indented and never match
+CFG_SECTION_PATTERN = re.compile(rb"^(BEGIN|END)[ \t]*\r?$", re.MULTILINE)
+CFG_LOCATION_PATTERN = re.compile(r"\b([A-Z_]+)\s+(\d+)\b")
+CFG_NAME_PATTERN = re.compile(r'"([^"]*)"')
+CFG_VALUE_PATTERN = re.compile(r'"[^"]*"|[^\s,"]+')
+CFG_HEX_PATTERN = re.compile(r"(?:[0-9A-F]{2} ){3,}[0-9A-F]{2}")
+
+
+def split_values(text):
+    """ Split a list line such as 'ADDRESS  8191, 0, 0' or 'SYMBOL  O , 0, "name", "comment"' into values,
+    numbers become int and quotes are removed.
+
+    :param text:
+    :return: tuple of values
+    """
+    values = []
+    for value in CFG_VALUE_PATTERN.findall(text):
+        if value.startswith('"'):
+            values.append(value[1:-1])
+        elif value.isdigit():
+            values.append(int(value))
+        else:
+            values.append(value)
+    return tuple(values)
+
+
+def parse_body(body):
+    """ This function will decode the body of a section between its BEGIN and END lines.
+
+    Indented 'KEY "value"' lines become attributes, quoted values may span lines and indented
+    NAME/BEGIN/END groups become nested dictionaries. Lines starting at column 0 (LOCAL_IN_ADDRESSES,
+    LOCAL_OUT_ADDRESSES, PARAMETER, SYMBOL, ...) start a list of value tuples.
+
+    :param body:
+    :return: (attributes, lists)
+    """
+    attributes = {}
+    lists = {}
+    stack = [attributes]
+    current_list = None
+    last_key = None
+    lines = iter(body.splitlines())
+    for line in lines:
+        text = line.strip()
+        if not text:
+            continue
+        if not line[0].isspace():
+            word, _, rest = text.partition(' ')
+            current_list = lists.setdefault(word, [])
+            if rest.strip():
+                current_list.append(split_values(rest))
+            continue
+        if current_list is not None:
+            current_list.append(split_values(text))
+            continue
+        if text == 'BEGIN':
+            nested = {}
+            stack[-1][last_key] = nested
+            stack.append(nested)
+            continue
+        if text == 'END':
+            if len(stack) > 1:
+                stack.pop()
+            continue
+
+        key, _, value = text.partition(' ')
+        value = value.strip()
+        if value.startswith('"'):
+            # Quoted values like COMMENT may continue over several lines up to the closing quote
+            while value.count('"') % 2 == 1:
+                next_line = next(lines, None)
+                if next_line is None:
+                    break
+                value += '\n' + next_line.rstrip()
+            value = value[1:-1] if value.endswith('"') else value[1:]
+        stack[-1][key] = value
+        last_key = key
+    return attributes, lists
+
+
+class CFG_Section:
+    """ One top level section of a hardware configuration export, e.g. STATION, SUBNET, RACK or IOSUBSYSTEM.
+    Only the header and the body offsets are known after indexing, the body is read and decoded the first
+    time attributes, lists or get() are used. encoding is the encoding detected while indexing when the offsets
+    are file offsets, None when the file has a BOM or was transcoded.
+    """
+    __slots__ = ('file', 'kind', 'header', 'body_offset', 'body_length', 'encoding', 'decoded', 'byte_values')
+
+    def __init__(self, file, header, body_offset, body_length, encoding=None):
+        self.file = file
+        self.header = header
+        self.kind = header.split(None, 1)[0].rstrip(',') if header else ''
+        self.body_offset = body_offset
+        self.body_length = body_length
+        self.encoding = encoding
+        self.decoded = None
+        self.byte_values = {}
+
+    def load(self):
+        if self.decoded is None:
+            with timed_stage('cfg.section_load'):
+                if self.encoding is not None:
+                    # Plain file, read the body without mapping the file and detecting its encoding again
+                    with open(self.file, 'rb') as active_file:
+                        active_file.seek(self.body_offset)
+                        body = active_file.read(self.body_length).decode(self.encoding, 'replace')
+                else:
+                    with Mapped_File(self.file, default_encoding=CFG_ENCODING) as source:
+                        body = source.decode(self.body_offset, self.body_offset + self.body_length)
+                self.decoded = parse_body(body)
+            add_count('cfg.section_bytes', self.body_length)
+        return self.decoded
+
+    @property
+    def attributes(self):
+        return self.load()[0]
+
+    @property
+    def lists(self):
+        return self.load()[1]
+
+    def get(self, key, default=None):
+        """ Get an attribute value, hex byte strings such as USED_S7_VERSIONS "35 2E 34 ..." are converted to
+        bytes on first access.
+
+        :param key:
+        :param default:
+        :return: value
+        """
+        if key in self.byte_values:
+            return self.byte_values[key]
+        value = self.attributes.get(key, default)
+        if isinstance(value, str) and CFG_HEX_PATTERN.fullmatch(value):
+            value = self.byte_values[key] = bytes.fromhex(value)
+        return value
+
+    def location(self):
+        """ Parse the numbered parts of the header, e.g. {'RACK': 0, 'SLOT': 2, 'SUBSLOT': 1}.
+
+        :return: location
+        """
+        return {key: int(number) for key, number in CFG_LOCATION_PATTERN.findall(self.header.split('\n')[0])}
+
+    def names(self):
+        """ The quoted strings of the header, e.g. the order number and module name of a RACK line.
+
+        :return: list of names
+        """
+        return CFG_NAME_PATTERN.findall(self.header)
+
+    def __repr__(self):
+        return 'CFG_Section(' + repr(self.header.split('\n')[0]) + ')'
+
+
+class CFG_Parse:
+    CACHE_KIND = 'cfg'
+
+    def __init__(self, cfg_file, cache=None):
+        self.file = cfg_file
+        self.filename = os.path.basename(cfg_file)
+        self.file_attributes = {}
+        self.section_list = None
+        cached = cache.get(self.file, self.CACHE_KIND) if cache is not None else None
+
+        # Only index the top level sections, their bodies are decoded on demand
+        if cached is not None:
+            self.file_attributes, self.section_list = cached
+            for section in self.section_list:
+                section.file = self.file
+        else:
+            with timed_stage('cfg.index'):
+                self.section_list = self.index_sections()
+            if cache is not None:
+                cache.put(self.file, self.CACHE_KIND, (self.file_attributes, self.section_list))
+
+    def index_sections(self):
+        """ This function will build the offset index of the top level BEGIN/END sections in one scan of the
+        memory-mapped file. Lines before the first section such as FILEVERSION are kept in file_attributes.
+
+        :return: section_list
+        """
+        sections = []
+        with Mapped_File(self.file, default_encoding=CFG_ENCODING) as source:
+            cfg_data = source.data
+            # Offsets into the map are file offsets, a copy without BOM or a transcoded copy is read again on load
+            encoding = source.encoding if source.map is not None else None
+            header_start = 0
+            body_start = None
+            for match in CFG_SECTION_PATTERN.finditer(cfg_data):
+                if match.group(1) == b'BEGIN' and body_start is None:
+                    header = source.decode(header_start, match.start())
+                    header = '\n'.join(line.rstrip() for line in header.strip().splitlines())
+                    if not sections:
+                        header = self.split_file_attributes(header)
+                    body_start = match.end() + 1
+                elif match.group(1) == b'END' and body_start is not None:
+                    sections.append(CFG_Section(self.file, header, body_start, match.start() - body_start,
+                                                encoding))
+                    header_start = match.end()
+                    body_start = None
+            add_count('cfg.bytes', source.size)
+        add_count('cfg.sections', len(sections))
+        return sections
+
+    def split_file_attributes(self, header):
+        """ Move the file level lines (FILEVERSION, #STEP7_VERSION, #CREATED) out of the first section header.
+
+        :param header:
+        :return: header without the file level lines
+        """
+        lines = []
+        for line in header.splitlines():
+            if line.startswith('#') or line.startswith('FILEVERSION'):
+                key, _, value = line.lstrip('#').partition(' ')
+                self.file_attributes[key] = value.strip().strip('"')
+            elif line:
+                lines.append(line)
+        return '\n'.join(lines)
+
+    def sections(self, kind):
+        """ Get the sections of one kind, e.g. 'RACK' or 'IOSUBSYSTEM', without decoding their bodies.
+
+        :param kind:
+        :return: list of sections
+        """
+        return [section for section in self.section_list if section.kind == kind]
+
+
+if __name__ == "__main__":
+    cfg = CFG_Parse(sys.argv[1] if len(sys.argv) > 1 else
+                    os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data', 'B3Z11202.cfg'))
+    for section in cfg.sections('RACK'):
+        print(section.location(), section.names())
@@ -0,0 +1,264 @@
+import os
+import re
+import sqlite3
+import sys
+
+from App.S7_Parse.Parse_Cache import DEFAULT_CACHE_DIR, export_cache_file
+from App.S7_Parse.SDF_Parse import parse_address
+from App.S7_Parse.Sequence_Graph import find_operands, normalize_operand
+
+DEFAULT_INDEX_FILE = 'xref.sqlite'
+INDEX_PREFIX = 'xref-'
+INDEX_EXT = '.sqlite'
+SQL_BATCH_SIZE = 10000  # Rows handed to executemany at a time while building
+
+# Symbolic operands as written in AWL code and GR7 conditions, e.g. "002BR_010-PF14BAHANDG"
+SYMBOL_NAME_PATTERN = re.compile(r'"([^"\n]+)"')
+# Jump instructions in German and English mnemonics, their operand is a label such as M001 and not an address
+AWL_JUMP_OPERATIONS = frozenset((
+    'SPA', 'SPB', 'SPBN', 'SPBB', 'SPBNB', 'SPBI', 'SPBIN', 'SPO', 'SPS', 'SPZ', 'SPN', 'SPP', 'SPM', 'SPPZ',
+    'SPMZ', 'SPU', 'SPL', 'LOOP',
+    'JU', 'JC', 'JCN', 'JCB', 'JNB', 'JBI', 'JNBI', 'JO', 'JOS', 'JZ', 'JN', 'JP', 'JM', 'JPZ', 'JMZ', 'JUO',
+    'JL',
+))
+
+XREF_SCHEMA = (
+    "CREATE TABLE symbols (id INTEGER PRIMARY KEY, name TEXT NOT NULL, area TEXT, byte INTEGER, bit INTEGER, "
+    "data_type TEXT, comment TEXT)",
+    "CREATE TABLE refs (symbol_id INTEGER, area TEXT, byte INTEGER, bit INTEGER, operand TEXT NOT NULL, "
+    "source TEXT NOT NULL, block TEXT NOT NULL, element TEXT NOT NULL, kind TEXT NOT NULL)",
+)
+# Covering indexes, the usage queries are answered from the index b-trees without touching the tables
+XREF_INDEXES = (
+    "CREATE INDEX symbols_name ON symbols (name)",
+    "CREATE INDEX symbols_address ON symbols (area, byte, bit)",
+    "CREATE INDEX refs_symbol ON refs (symbol_id, source, block, element, kind, operand)",
+    "CREATE INDEX refs_address ON refs (area, byte, bit, source, block, element, kind, operand)",
+)
+USAGE_COLUMNS = 'source, block, element, kind, operand'
+
+
+def default_index_file(root_dir, cache_dir=DEFAULT_CACHE_DIR):
+    """ The index path of an export directory, kept in the parse cache directory next to the incremental parse
+    manifest.
+
+    :param root_dir: project export directory
+    :param cache_dir:
+    :return: index path
+    """
+    return export_cache_file(root_dir, INDEX_PREFIX, INDEX_EXT, cache_dir)
+
+
+def gr7_references(seq_list):
+    """ Tokenize the operands of the permanent condition, the steps and the transitions of parsed GR7 sequences.
+
+    :param seq_list: list of Sequence records
+    :return: generator of (operand, 'GR7', fb_name, step or transition name or 'PERM_CONDITION', kind)
+    """
+    for sequence in seq_list:
+        for operand in find_operands(sequence.perm_condition):
+            yield operand, 'GR7', sequence.fb_name, 'PERM_CONDITION', 'perm_condition'
+        for name in SYMBOL_NAME_PATTERN.findall(sequence.perm_condition):
+            yield '"' + name + '"', 'GR7', sequence.fb_name, 'PERM_CONDITION', 'perm_condition'
+        for step in sequence.step_data:
+            for operand in find_operands(step.condition):
+                yield operand, 'GR7', sequence.fb_name, step.name, 'condition'
+            for operand in find_operands(step.supervision):
+                yield operand, 'GR7', sequence.fb_name, step.name, 'supervision'
+            for text in (step.condition if isinstance(step.condition, list) else [step.condition]):
+                for name in SYMBOL_NAME_PATTERN.findall(text):
+                    yield '"' + name + '"', 'GR7', sequence.fb_name, step.name, 'condition'
+        for transition in sequence.transition_data:
+            for operand in find_operands(transition.condition):
+                yield operand, 'GR7', sequence.fb_name, transition.name, 'transition'
+            for name in SYMBOL_NAME_PATTERN.findall(transition.condition):
+                yield '"' + name + '"', 'GR7', sequence.fb_name, transition.name, 'transition'
+
+
+def awl_references(block_list):
+    """ Tokenize the operands of the instructions and CALL parameters of parsed AWL blocks. Elements are named
+    'network:instruction', both counted from 1. The labels of jump instructions are skipped.
+
+    :param block_list: list of AWL_Block records
+    :return: generator of (operand, 'AWL', block name, element, operation)
+    """
+    for block in block_list:
+        for network_no, network in enumerate(block.networks, 1):
+            for instruction_no, instruction in enumerate(network.instructions, 1):
+                if instruction.operation in AWL_JUMP_OPERATIONS:
+                    continue
+                element = str(network_no) + ':' + str(instruction_no)
+                # CALL FB 435 , DB 320 references both the block and its instance data block
+                operands = instruction.operand.split(',') if instruction.operation == 'CALL' else [instruction.operand]
+                for operand in operands:
+                    if operand.strip():
+                        yield awl_operand(operand), 'AWL', block.name, element, instruction.operation
+                for formal, actual in instruction.parameters or ():
+                    if actual:
+                        yield awl_operand(actual), 'AWL', block.name, element, 'CALL ' + formal
+
+
+def awl_operand(operand):
+    # AWL writes 'I   4404.1', symbolic operands keep their quotes and case
+    operand = operand.strip()
+    return operand if operand.startswith('"') else normalize_operand(operand)
+
+
+class Cross_Reference:
+    """Cross Reference will link the symbols of the symbol table to the GR7 steps and transitions and the AWL
+    instructions that use them, and keep the result in an on-disk SQLite index.
+
+    Operands are resolved while building through an address hash index of the symbol table, a data block
+    operand such as DB320.DBX152.1 resolves to the symbol of DB 320 and a quoted operand resolves by name.
+    Operands that look like addresses but have no symbol are kept with an empty symbol_id, so the index also
+    answers usages by address. Every query is a lookup in a covering index.
+
+    Args:
+        index_file (str): SQLite database file, ':memory:' for an index that is not persisted.
+
+    Attributes:
+        symbol_count (int): Symbols in the index.
+        ref_count (int): References in the index.
+    """
+
+    def __init__(self, index_file=DEFAULT_INDEX_FILE):
+        self.index_file = index_file
+        if index_file != ':memory:' and os.path.dirname(index_file):
+            os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        self.connection = sqlite3.connect(index_file)
+        self.symbol_count = 0
+        self.ref_count = 0
+        if self.connection.execute("SELECT name FROM sqlite_master WHERE name = 'refs'").fetchone():
+            self.symbol_count = self.connection.execute("SELECT count(*) FROM symbols").fetchone()[0]
+            self.ref_count = self.connection.execute("SELECT count(*) FROM refs").fetchone()[0]
+
+    def build(self, symbol_data, seq_list=(), block_list=()):
+        """ Rebuild the index from parsed sources. The tables are written without indexes and indexed once at
+        the end, all in one transaction.
+
+        :param symbol_data: list of Symbol records
+        :param seq_list: list of Sequence records
+        :param block_list: list of AWL_Block records
+        :return: number of references
+        """
+        address_index = {}
+        name_index = {}
+        symbol_rows = []
+        for symbol_id, symbol in enumerate(symbol_data, 1):
+            address_index.setdefault(symbol.address, symbol_id)
+            name_index.setdefault(symbol.name, symbol_id)
+            symbol_rows.append((symbol_id, symbol.name, symbol.perph_type, symbol.byte, symbol.bit,
+                                symbol.data_type, symbol.comment))
+
+        with self.connection:
+            self.connection.execute("DROP TABLE IF EXISTS symbols")
+            self.connection.execute("DROP TABLE IF EXISTS refs")
+            for statement in XREF_SCHEMA:
+                self.connection.execute(statement)
+            self.connection.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?)", symbol_rows)
+
+            self.ref_count = 0
+            batch = []
+            for operand, source, block, element, kind in self.iter_references(seq_list, block_list):
+                symbol_id, key = self.resolve(operand, address_index, name_index)
+                if symbol_id is None and key is None:
+                    continue
+                area, byte, bit = key if key is not None else (None, None, None)
+                batch.append((symbol_id, area, byte, bit, operand, source, block, element, kind))
+                if len(batch) == SQL_BATCH_SIZE:
+                    self.insert_refs(batch)
+                    batch = []
+            self.insert_refs(batch)
+
+            for statement in XREF_INDEXES:
+                self.connection.execute(statement)
+        self.connection.execute("ANALYZE")
+        self.symbol_count = len(symbol_rows)
+        return self.ref_count
+
+    def iter_references(self, seq_list, block_list):
+        yield from gr7_references(seq_list)
+        yield from awl_references(block_list)
+
+    def insert_refs(self, batch):
+        self.connection.executemany("INSERT INTO refs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        self.ref_count += len(batch)
+
+    @staticmethod
+    def resolve(operand, address_index, name_index):
+        """ Resolve an operand against the symbol table indexes.
+
+        :param operand: e.g. 'I 4512.3', 'DB320.DBX152.1' or '"Motor_On"'
+        :param address_index: (area, byte, bit) -> symbol id
+        :param name_index: symbol name -> symbol id
+        :return: (symbol id or None, (area, byte, bit) or None)
+        """
+        if operand.startswith('"'):
+            return name_index.get(operand.strip('"')), None
+        key = parse_address(normalize_operand(operand))
+        if key is None:
+            return None, None
+        symbol_id = address_index.get(key)
+        if symbol_id is None and key[0].startswith('DB') and key[0] != 'DB':
+            symbol_id = address_index.get(('DB', int(key[0][2:key[0].index('.')]), None))
+        return symbol_id, key
+
+    def usages(self, name):
+        """ Where is a symbol used.
+
+        :param name: symbol name
+        :return: list of (source, block, element, kind, operand)
+        """
+        return self.connection.execute(
+            "SELECT " + USAGE_COLUMNS + " FROM refs WHERE symbol_id IN (SELECT id FROM symbols WHERE name = ?) "
+            "ORDER BY source, block, element", (name.strip(),)).fetchall()
+
+    def address_usages(self, address):
+        """ Where is an address used, with or without a symbol.
+
+        :param address: e.g. 'Q 24.5' or 'DB320.DBX152.1'
+        :return: list of (source, block, element, kind, operand)
+        """
+        key = parse_address(normalize_operand(address))
+        if key is None:
+            return []
+        return self.connection.execute(
+            "SELECT " + USAGE_COLUMNS + " FROM refs WHERE area = ? AND byte = ? AND bit IS ? "
+            "ORDER BY source, block, element", key).fetchall()
+
+    def symbol_of(self, address):
+        """ Look up the symbol name of an address.
+
+        :param address:
+        :return: name or None
+        """
+        key = parse_address(normalize_operand(address))
+        if key is None:
+            return None
+        row = self.connection.execute("SELECT name FROM symbols WHERE area = ? AND byte = ? AND bit IS ?",
+                                      key).fetchone()
+        return row[0] if row else None
+
+    def unused_symbols(self):
+        """ Symbols that no parsed source references.
+
+        :return: list of names
+        """
+        return [row[0] for row in self.connection.execute(
+            "SELECT name FROM symbols WHERE NOT EXISTS (SELECT 1 FROM refs WHERE refs.symbol_id = symbols.id) "
+            "ORDER BY name")]
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    from App.S7_Parse.Project_Parse import Project_Parse
+    project = Project_Parse(sys.argv[1], workers=1)
+    xref = Cross_Reference(default_index_file(sys.argv[1]))
+    print(xref.build(project.symbol_data, project.seq_list, project.block_list), 'references',
+          xref.symbol_count, 'symbols')
+    for name in sys.argv[2:]:
+        for usage in xref.usages(name):
+            print(name, *usage)
+    xref.close()
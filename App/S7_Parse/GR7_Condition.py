@@ -0,0 +1,267 @@
+from functools import lru_cache
+import operator
+import re
+import sys
+
+# Placeholders GR7_Parse stores when a step has no supervision or condition
+EMPTY_CONDITIONS = ('', 'No Supervision', 'No Condition')
+
+CONDITION_TOKEN_PATTERN = re.compile(r"\s*(?:(?P<symbol>\(|\)|>=|<=|<>|==|=|>|<)"
+                                     r"|(?P<number>[+-]?\d+(?:\.\d+)?(?![\w.]))"
+                                     r"|(?P<word>[A-Za-z_#\"][\w.#\"\[\]]*))")
+
+# Opcodes of the compiled bytecode, every instruction is a tuple starting with its opcode
+LOAD = 0  # (LOAD, operand index): push the operand
+CONST = 1  # (CONST, value): push True/False
+COMPARE = 2  # (COMPARE, comparison, left, right): push the comparison, left/right are (LOAD, index) or (CONST, v)
+NOT = 3
+AND = 4
+OR = 5
+XOR = 6
+
+COMPARISONS = {'>': operator.gt, '<': operator.lt, '>=': operator.ge, '<=': operator.le, '==': operator.eq,
+               '=': operator.eq, '<>': operator.ne}
+KEYWORDS = {'AND': AND, 'OR': OR, 'XOR': XOR}
+BIT_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def tokenize_condition(text):
+    """ Split a condition into ('symbol' | 'number' | 'word', value) tokens.
+
+    :param text: e.g. 'S002.U > DB320.DBD220 AND NOT T002.TT'
+    :return: list of tokens
+    """
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = CONDITION_TOKEN_PATTERN.match(text, pos)
+        if match is None or match.end() == pos:
+            raise ValueError("Unexpected character in condition at " + str(pos) + ": " + repr(text))
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+class Condition_Compiler:
+    """ Recursive descent compiler from condition tokens to postfix bytecode. Precedence from loosest to
+    tightest: OR, XOR, AND, NOT, comparison.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize_condition(text)
+        self.pos = 0
+        self.code = []
+        self.operands = {}
+
+    def compile(self):
+        self.parse_binary(OR)
+        if self.pos < len(self.tokens):
+            self.error('unexpected ' + repr(self.tokens[self.pos][1]))
+        return tuple(self.code), tuple(self.operands)
+
+    def error(self, message):
+        raise ValueError("Cannot compile condition, " + message + ": " + repr(self.text))
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def parse_binary(self, opcode):
+        # OR -> XOR -> AND -> NOT, each level binds the next tighter one
+        tighter = {OR: XOR, XOR: AND}.get(opcode)
+        parse_operand = (lambda: self.parse_binary(tighter)) if tighter is not None else self.parse_not
+        parse_operand()
+        while True:
+            kind, value = self.peek()
+            if kind != 'word' or KEYWORDS.get(value.upper()) != opcode:
+                return
+            self.pos += 1
+            parse_operand()
+            self.code.append((opcode,))
+
+    def parse_not(self):
+        kind, value = self.peek()
+        if kind == 'word' and value.upper() == 'NOT':
+            self.pos += 1
+            self.parse_not()
+            self.code.append((NOT,))
+        else:
+            self.parse_comparison()
+
+    def parse_comparison(self):
+        kind, value = self.peek()
+        if kind == 'symbol' and value == '(':
+            self.pos += 1
+            self.parse_binary(OR)
+            if self.peek() != ('symbol', ')'):
+                self.error('missing )')
+            self.pos += 1
+            return
+        left = self.parse_value()
+        kind, value = self.peek()
+        if kind == 'symbol' and value in COMPARISONS:
+            self.pos += 1
+            self.code.append((COMPARE, value, left, self.parse_value()))
+        elif left[0] == CONST:
+            self.code.append((CONST, bool(left[1])))
+        else:
+            self.code.append(left)
+
+    def parse_value(self):
+        kind, value = self.peek()
+        self.pos += 1
+        if kind == 'number':
+            return CONST, float(value) if '.' in value else int(value)
+        if kind == 'word' and value.upper() in ('TRUE', 'FALSE'):
+            return CONST, value.upper() == 'TRUE'
+        if kind == 'word' and value.upper() not in KEYWORDS and value.upper() != 'NOT':
+            operand = sys.intern(value.upper())
+            return LOAD, self.operands.setdefault(operand, len(self.operands))
+        self.pos -= 1
+        self.error('expected an operand' if kind else 'unexpected end')
+
+
+class Condition:
+    """ A compiled GR7 condition or supervision. code is postfix bytecode over the interned operands, so
+    evaluating never looks at the text again.
+    """
+    __slots__ = ('text', 'code', 'operands')
+
+    def __init__(self, text, code, operands):
+        self.text = text
+        self.code = code
+        self.operands = operands
+
+    def evaluate(self, values):
+        """ Evaluate the condition against one process image snapshot.
+
+        :param values: mapping operand -> value, missing operands read as 0/False
+        :return: bool
+        """
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        operands = self.operands
+        for instruction in self.code:
+            opcode = instruction[0]
+            if opcode == LOAD:
+                push(bool(values.get(operands[instruction[1]], 0)))
+            elif opcode == CONST:
+                push(instruction[1])
+            elif opcode == COMPARE:
+                left, right = instruction[2], instruction[3]
+                left = values.get(operands[left[1]], 0) if left[0] == LOAD else left[1]
+                right = values.get(operands[right[1]], 0) if right[0] == LOAD else right[1]
+                push(COMPARISONS[instruction[1]](left, right))
+            elif opcode == NOT:
+                push(not pop())
+            else:
+                right = pop()
+                left = pop()
+                push(left and right if opcode == AND else left or right if opcode == OR else left != right)
+        return stack[0]
+
+    def evaluate_batch(self, columns, count):
+        """ Evaluate the condition against a batch of snapshots at once. Boolean values are packed into one
+        integer per operand (bit k is snapshot k), so AND/OR/XOR/NOT run once per batch instead of once per
+        snapshot.
+
+        :param columns: mapping operand -> packed int, or sequence of count values (bools or numbers)
+        :param count: number of snapshots
+        :return: packed int, bit k set where the condition holds for snapshot k
+        """
+        mask = (1 << count) - 1
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        operands = self.operands
+        for instruction in self.code:
+            opcode = instruction[0]
+            if opcode == LOAD:
+                push(pack_bits(columns.get(operands[instruction[1]], 0)) & mask)
+            elif opcode == CONST:
+                push(mask if instruction[1] else 0)
+            elif opcode == COMPARE:
+                compare = COMPARISONS[instruction[1]]
+                left = self.column_values(instruction[2], columns, count)
+                right = self.column_values(instruction[3], columns, count)
+                push(pack_bits([compare(a, b) for a, b in zip(left, right)]))
+            elif opcode == NOT:
+                push(pop() ^ mask)
+            else:
+                right = pop()
+                left = pop()
+                push(left & right if opcode == AND else left | right if opcode == OR else left ^ right)
+        return stack[0]
+
+    def column_values(self, value, columns, count):
+        if value[0] == CONST:
+            return [value[1]] * count
+        column = columns.get(self.operands[value[1]], 0)
+        if isinstance(column, int):
+            return unpack_bits(column, count)
+        return column
+
+    def __repr__(self):
+        return 'Condition(' + repr(self.text) + ')'
+
+
+def pack_bits(values):
+    """ Pack a sequence of truth values into an int, the first value is bit 0. Packed ints pass through.
+
+    :param values:
+    :return: int
+    """
+    if isinstance(values, int):
+        return values
+    if not len(values):
+        return 0
+    return int(bytes(map(bool, reversed(values))).translate(BIT_DIGITS), 2)
+
+
+def unpack_bits(bits, count):
+    """ Reverse of pack_bits.
+
+    :param bits:
+    :param count:
+    :return: list of 0/1
+    """
+    return [int(bit) for bit in reversed(format(bits, '0' + str(count) + 'b')[-count:])] if count else []
+
+
+def pack_columns(snapshots):
+    """ Turn a batch of snapshots into the columns of evaluate_batch. Operands that only hold bools are packed
+    once here, so every condition evaluated on the batch reuses the packed int.
+
+    :param snapshots: list of mappings operand -> value
+    :return: mapping operand -> packed int or list of values
+    """
+    operands = dict.fromkeys(operand for snapshot in snapshots for operand in snapshot)
+    columns = {}
+    for operand in operands:
+        values = [snapshot.get(operand, 0) for snapshot in snapshots]
+        columns[operand] = pack_bits(values) if all(isinstance(value, bool) for value in values) else values
+    return columns
+
+
+@lru_cache(maxsize=65536)
+def compile_condition(text, empty=True):
+    """ Compile a transition condition or step supervision once, identical texts share one Condition.
+
+    :param text: condition text
+    :param empty: value of an empty condition, True for transitions and False for supervisions
+    :return: Condition
+    """
+    if text is None or text.strip() in EMPTY_CONDITIONS:
+        return Condition(text, ((CONST, empty),), ())
+    return Condition(text, *Condition_Compiler(text).compile())
+
+
+if __name__ == "__main__":
+    from App.S7_Parse.GR7_Parse import GR7_Parse
+    for sequence in GR7_Parse(sys.argv[1]).seq_list:
+        for transition in sequence.transition_data:
+            condition = compile_condition(transition.condition)
+            print(sequence.fb_name, transition.name, len(condition.code), 'instructions', len(condition.operands),
+                  'operands')
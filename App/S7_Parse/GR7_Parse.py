@@ -1,224 +1,461 @@
-import xml.etree.ElementTree as ET
-import re
-import os
-
-class GR7_Parse:
-    def __init__(self, gr7_file):
-        self.file = gr7_file
-        self.filename = os.path.basename(gr7_file)
-        self.active_file = open(self.file, 'r')
-        self.gr7_data = self.active_file.read()
-
-        # Parse the sequences, steps, and transition
-        self.seq_list = self.parse_sequences(self.gr7_data)
-        for sequence in self.seq_list:
-            sequence['step_data'] = self.parse_steps(sequence['sequence_data'])
-            sequence['transition_data'] = self.parse_transitions(sequence['sequence_data'])
-
-
-    def parse_sequences(self, gr7_data):
-        sequences = gr7_data.split('END_FUNCTION_BLOCK')
-        sequences.pop()
-
-        # Adjusted regex pattern to find multiple matches
-        pattern = (r"\(\*\$_COM\s+([^\n]+)\n(.*?)\)\s*\n\(\*\$_CMPSET\s+(.*?)\s*\)\s*\n\(\*\$_SETTINGS\s+(.*?)\s*\)\s*"
-                   r"(VAR_INPUT\s+(.*?)\s+END_VAR)?\s*(PERM_CONDITION_AT_BEGIN\s+(.*?)\s+END_PERM_CONDITION)?")
-
-        # Parse Sequence Info
-        parsed_sequences = []
-        for sequence in sequences:
-            # Using finditer to capture matches and their positions
-            fb_name = sequence.replace("FUNCTION_BLOCK ",'')
-            fb_name = fb_name[0:fb_name.find('\n')]
-            matches = re.finditer(pattern, sequence, re.DOTALL)
-
-            # Process each match and get start and end positions
-            for match in matches:
-                name = match.group(1).strip()  # Extract and strip the name
-                comments = match.group(2).strip()  # Extract and strip the comments
-                cmpset = match.group(3).strip()
-                settings = match.group(4).strip()
-
-                # Extract optional sections and sequence data
-                var_input = match.group(6) if match.group(6) else "No VAR_INPUT"
-                perm_condition = match.group(8) if match.group(8) else "No PERM_CONDITION_AT_BEGIN"
-                match_start, match_end = match.span()
-                sequence_data = sequence[match_end:]
-
-                parsed_sequences.append({
-                    'fb_name': fb_name,
-                    'seq_name': name,
-                    'comment': comments,
-                    'cmpset': cmpset,
-                    'settings': settings,
-                    'var_input': var_input,
-                    'perm_condition': perm_condition,
-                    'sequence_data': sequence_data
-                })
-        return parsed_sequences
-
-    def parse_steps(self, gr7_data):
-        """ This function will parse the steps information from the Step7 gernerated .gr7 file
-        and map them into dictionaries by name.
-
-        :param gr7_data:
-        :return: parsed_steps
-        """
-        # Regex pattern to capture step name, number, and comment
-        pattern = (r"STEP\s+([A-Za-z0-9_]+)\s+\(\*\$_NUM\s+(\d+)\*\):\s+\(\*\$_COM\s+([^*]+)\*\)\s*(SUPERVISION\s+"
-                   r"CONDITION\s*:=\s*(.*?)\s+END_SUPERVISION)?\s*(.*?)(?=END_STEP)")
-
-        matches = re.finditer(pattern, gr7_data, re.DOTALL)
-
-        # Process each match
-        parsed_steps = []
-        for match in matches:
-            step_name = match.group(1).strip()  # Extract and strip the step name
-            step_number = match.group(2).strip()  # Extract the step number
-            step_comment = match.group(3).strip()  # Extract the comment
-            # Extract optional sections
-            supervision = match.group(5) if match.group(5) else "No Supervision"
-            condition = match.group(6).strip().split('\n') if match.group(6)else "No Condition"
-            parsed_steps.append({
-                'name': step_name,
-                'number': step_number,
-                'supervision': supervision,
-                'condition': condition,
-                'comment': step_comment
-            })
-        return parsed_steps
-
-    def parse_transitions(self, gr7_data):
-        """ This function will parse the transition information from the Step7 gernerated .gr7 file
-        and map them into dictionaries by name.
-
-        :param gr7_text:
-        :return: parsed_transitions
-        """
-        # Regex pattern to capture the transition details
-        #transition_pattern = r"TRANSITION\s+(\w+)\s+\(\*\$_NUM\s+(\d+)\*\)\s+FROM\s+(\w+)\s+TO\s+\(([\w\s,]+)\)\s*:\s*CONDITION\s*:=\s*([\w\.]+)"
-        transition_pattern = r"TRANSITION\s+([A-Za-z0-9_]+)\s+\(\*\$_NUM\s+(\d+)\*\)\s+FROM\s+([A-Za-z0-9_]+)\s+TO\s+([A-Za-z0-9_]+)\s+CONDITION\s*:=\s*(.*?)\s+END_TRANSITION"
-        transitions = re.findall(transition_pattern, gr7_data)
-
-        # Parse transitions
-        parsed_transitions = []
-        for transition in transitions:
-            transition_name = transition[0]
-            transition_num = transition[1]
-            from_states = transition[2].split(", ")
-            to_states = transition[3].split(", ")
-            condition = transition[4]
-            parsed_transitions.append({
-                'name': transition_name,
-                'number': transition_num,
-                'from': from_states,
-                'to': to_states,
-                'condition': condition
-            })
-        return parsed_transitions
-
-    def create_drawio_xml_old(self, steps, transitions):
-        """ This function will generate the xml data with step 7 steps and transitions information
-
-        :param steps:
-        :param transitions:
-        :return: xml_data
-        """
-        # Create an XML structure compatible with draw.io
-        root = ET.Element("mxGraphModel")
-        diagram = ET.SubElement(root, "root")
-
-        # Create default parent
-        default_parent = ET.SubElement(diagram, "mxCell", {
-            'id': '0'
-        })
-        layer = ET.SubElement(diagram, "mxCell", {
-            'id': '1',
-            'parent': '0'
-        })
-
-        # Add each step as a draw.io node
-        for idx, step in enumerate(steps):
-            shape = ET.SubElement(diagram, "mxCell", {
-                'id': str(idx + 2),
-                'value': f'{step["name"]} - {step["comment"]}',
-                'style': 'rounded=1;whiteSpace=wrap;html=1;',  # Process block style
-                'vertex': '1',
-                'parent': '1'
-            })
-            geo = ET.SubElement(shape, "mxGeometry", {
-                'x': str(40 * idx),  # Spacing out the nodes for simplicity
-                'y': str(40 * idx),
-                'width': '120',
-                'height': '60',
-                'as': 'geometry'
-            })
-
-        # Convert the XML tree to a string and return
-        return ET.tostring(root, encoding='utf-8', method='xml')
-
-    def create_drawio_xml(self, steps, transitions):
-        """Converts step and transition data to draw.io XML format."""
-
-        # Initial XML template for draw.io
-        xml_template = '<mxGraphModel><root><mxCell id="0" /><mxCell id="1" parent="0" />'
-
-        # Template for creating a step (node)
-        node_template = '<mxCell id="{id}" value="{name}" style="rounded=1;whiteSpace=wrap;html=1;" vertex="1" \
-                         parent="1"><mxGeometry x="{x}" y="{y}" width="80" height="40" as="geometry" /></mxCell>'
-
-        # Template for creating a transition (edge)
-        edge_template = '<mxCell id="e{id}" value="{condition}" style="edgeStyle=orthogonalEdgeStyle;rounded=0;\
-                         orthogonalLoop=1;" edge="1" parent="1" source="{from_id}" target="{to_id}">\
-                         <mxGeometry relative="1" as="geometry" /></mxCell>'
-
-        # Starting positions for layout (modify these values for layout adjustments)
-        current_x = 100
-        current_y = 100
-        spacing_x = 200  # Horizontal space between steps
-        spacing_y = 150  # Vertical space between steps
-
-        # Create nodes for steps
-        nodes = {}
-        edges = []
-        node_id = 2
-        for step in steps:
-            step_name = step['number']
-            if step_name not in nodes:
-                # Add the step node (using current_x and current_y for positioning)
-                nodes[step_name] = {"id": node_id, "x": current_x, "y": current_y}
-                xml_template += node_template.format(id=node_id, name=step_name, x=current_x, y=current_y)
-                node_id += 1
-                current_y += spacing_y  # Move down for the next step
-
-                # Reset x for steps in a new column
-                if current_y > 500:
-                    current_y = 100
-                    current_x += spacing_x
-
-        # Create edges for transitions
-        for transition in transitions:
-            from_state = transition['from']
-            to_states = transition['to']
-            condition = transition['condition']
-
-            # for to_state in to_states:
-            #     from_id = nodes[from_state]['number']
-            #     to_id = nodes[to_state]['number']
-            #     edges.append(edge_template.format(id=node_id, condition=condition, from_id=from_id, to_id=to_id))
-            #     node_id += 1
-
-        # Append the edges (transitions) to the XML template
-        # for edge in edges:
-        #     xml_template += edge
-
-        # Close the XML
-        xml_template += '''        </root>
-        </mxGraphModel>'''
-
-        return xml_template
-
-
-if __name__ == "__main__":
-    # Sample input from the previously decoded content
-    s7g = GR7_Parse("../../S7_Data/B3Z11502.gr7")
+import xml.etree.ElementTree as ET
+import re
+import os
+import sys
+
+if not __package__:
+    # Run as a script, python App/S7_Parse/GR7_Parse.py, the App package lives two directories up
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from App.S7_Parse.Instrumentation import active_instrumentation, add_count, timed_stage
+from App.S7_Parse.Mapped_File import Mapped_File
+
+GR7_ENCODING = 'cp1252'  # Simatic Manager writes its exports with the Windows code page
+
+# Keywords that open or close a GR7 section (see S7_Data/Parse_Info/KeywordsGR7). They are only
+# recognised at the start of a line so condition text such as "T002.TT" never produces a token.
+GR7_KEYWORDS = (b'END_FUNCTION_BLOCK', b'FUNCTION_BLOCK', b'INITIAL_STEP', b'END_STEP', b'STEP', b'END_SUPERVISION',
+                b'SUPERVISION', b'END_TRANSITION', b'TRANSITION', b'PERM_CONDITION_AT_BEGIN', b'END_PERM_CONDITION',
+                b'VAR_INPUT', b'END_VAR', b'FROM', b'TO', b'CONDITION')
+
+GR7_TOKEN_PATTERN = re.compile(rb"\(\*\$_(?P<pragma>[A-Z]+)|(?<![^\r\n])[ \t]*(?P<keyword>" + b'|'.join(GR7_KEYWORDS) +
+                               rb")\b")
+GR7_LINE_END = re.compile(rb"[\r\n]")
+GR7_TOKEN_KINDS = {keyword: keyword.decode('ascii') for keyword in GR7_KEYWORDS}
+GR7_PRAGMA_KINDS = {}
+
+
+def tokenize_gr7(gr7_data, pos=0, endpos=None):
+    """ This function will split the Step7 generated .gr7 data into keyword and pragma tokens in a single
+    forward pass. Pragmas like (*$_COM ...*) are consumed up to their closing *) so comment text is never
+    tokenized.
+
+    :param gr7_data: gr7 bytes, mmap or memoryview
+    :param pos: offset to start tokenizing from
+    :param endpos: offset to stop tokenizing at
+    :return: generator of (kind, start, end, value) tuples, value is the (start, end) span of the pragma
+             body or None for keywords
+    """
+    if endpos is None:
+        endpos = len(gr7_data)
+    search = GR7_TOKEN_PATTERN.search
+    find = gr7_data.find
+    kinds = GR7_TOKEN_KINDS
+    pragma_kinds = GR7_PRAGMA_KINDS
+    matches = 0
+    while True:
+        match = search(gr7_data, pos, endpos)
+        if match is None:
+            add_count('gr7.token_matches', matches)
+            return
+        matches += 1
+        pragma, keyword = match.groups()
+        if pragma:
+            kind = pragma_kinds.get(pragma)
+            if kind is None:
+                kind = pragma_kinds[pragma] = '$_' + pragma.decode('ascii')
+            body_start = match.end()
+            body_end = find(b'*)', body_start, endpos)
+            if body_end < 0:
+                body_end = endpos
+            pos = min(body_end + 2, endpos)
+            yield kind, match.start(), pos, (body_start, body_end)
+        else:
+            pos = match.end()
+            yield kinds[keyword], pos - len(keyword), pos, None
+
+
+def skip_whitespace(gr7_data, pos, endpos):
+    while pos < endpos and gr7_data[pos:pos + 1].isspace():
+        pos += 1
+    return pos
+
+
+def decode_text(gr7_data, start, end, encoding=GR7_ENCODING):
+    """ Decode a slice of the gr7 data into a stripped string with normalized newlines.
+
+    :param gr7_data:
+    :param start:
+    :param end:
+    :param encoding: encoding detected by Mapped_File
+    :return: text
+    """
+    return '\n'.join(gr7_data[start:end].decode(encoding, 'replace').strip().splitlines())
+
+
+class GR7_Record:
+    """ Base class for the slotted records produced by GR7_Parse. Records keep dictionary style read access
+    (record['name'], record.get('name')) and to_dict() for callers written against the previous list-of-dicts
+    output. Step adds an 'initial' key the previous step dictionaries did not have, True for INITIAL_STEP
+    steps; callers that may also get such older dictionaries read it with get('initial').
+    """
+    __slots__ = ()
+    KEYS = {}  # Attribute name -> dictionary key, where they differ
+    KEYS_TO_ATTR = {}
+
+    def to_dict(self):
+        return {self.KEYS.get(attr, attr): getattr(self, attr) for attr in self.__slots__}
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self.KEYS_TO_ATTR.get(key, key))
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return type(self) is type(other) and all(getattr(self, attr) == getattr(other, attr)
+                                                 for attr in self.__slots__)
+
+    def __repr__(self):
+        return type(self).__name__ + repr(self.to_dict())
+
+
+class Step(GR7_Record):
+    __slots__ = ('name', 'number', 'supervision', 'condition', 'comment', 'initial')
+
+    def __init__(self, name='', number='', supervision="No Supervision", condition="No Condition", comment='',
+                 initial=False):
+        self.name = name
+        self.number = number
+        self.supervision = supervision
+        self.condition = condition
+        self.comment = comment
+        self.initial = initial  # Declared with INITIAL_STEP, active when the sequence starts
+
+
+def initial_step_names(steps):
+    """ The names of the INITIAL_STEP steps of a sequence. The first step stands in when none is marked,
+    e.g. for step dictionaries without an initial key.
+
+    :param steps: Step records or dictionaries
+    :return: list of step names
+    """
+    names = [step['name'] for step in steps if step.get('initial')]
+    return names or [step['name'] for step in steps[:1]]
+
+
+class Transition(GR7_Record):
+    __slots__ = ('name', 'number', 'from_steps', 'to_steps', 'condition')
+    KEYS = {'from_steps': 'from', 'to_steps': 'to'}
+    KEYS_TO_ATTR = {'from': 'from_steps', 'to': 'to_steps'}
+
+    def __init__(self, name='', number='', from_steps=None, to_steps=None, condition=''):
+        self.name = name
+        self.number = number
+        self.from_steps = from_steps if from_steps is not None else []
+        self.to_steps = to_steps if to_steps is not None else []
+        self.condition = condition
+
+
+class Sequence(GR7_Record):
+    __slots__ = ('fb_name', 'seq_name', 'comment', 'cmpset', 'settings', 'var_input', 'perm_condition',
+                 'sequence_offset', 'sequence_length', 'step_data', 'transition_data')
+
+    def __init__(self, fb_name='', seq_name='', comment=''):
+        self.fb_name = fb_name
+        self.seq_name = seq_name
+        self.comment = comment
+        self.cmpset = ''
+        self.settings = ''
+        self.var_input = "No VAR_INPUT"
+        self.perm_condition = "No PERM_CONDITION_AT_BEGIN"
+        self.sequence_offset = 0
+        self.sequence_length = 0
+        self.step_data = []
+        self.transition_data = []
+
+    def to_dict(self):
+        sequence = GR7_Record.to_dict(self)
+        sequence['step_data'] = [step.to_dict() for step in self.step_data]
+        sequence['transition_data'] = [transition.to_dict() for transition in self.transition_data]
+        return sequence
+
+
+class GR7_Parse:
+    CACHE_KIND = 'gr7'
+
+    def __init__(self, gr7_file, stream=False, cache=None):
+        self.file = gr7_file
+        self.filename = os.path.basename(gr7_file)
+        self.encoding = GR7_ENCODING
+
+        # Parse the sequences, steps, and transitions in one pass over the file. In stream mode the
+        # sequences are only parsed as iter_sequences() is consumed.
+        self.seq_list = None
+        if not stream:
+            if cache is not None:
+                self.seq_list = cache.get(self.file, self.CACHE_KIND)
+            if self.seq_list is None:
+                with timed_stage('gr7.parse'):
+                    self.seq_list = list(self.iter_sequences())
+                if cache is not None:
+                    cache.put(self.file, self.CACHE_KIND, self.seq_list)
+
+    def iter_sequences(self):
+        """ This generator will memory-map the .gr7 file and yield one fully parsed sequence at a time, so the
+        file is never held in memory as a whole.
+
+        :return: generator of Sequence records
+        """
+        with timed_stage('gr7.read'):
+            source = Mapped_File(self.file, default_encoding=GR7_ENCODING)
+        with source:
+            self.encoding = source.encoding
+            metrics = active_instrumentation()
+            if metrics is None:
+                yield from self.generate_sequences(source.data)
+                return
+            sequences = steps = transitions = 0
+            for sequence in self.generate_sequences(source.data):
+                sequences += 1
+                steps += len(sequence.step_data)
+                transitions += len(sequence.transition_data)
+                yield sequence
+            metrics.count('gr7.bytes', source.size)
+            metrics.count('gr7.sequences', sequences)
+            metrics.count('gr7.steps', steps)
+            metrics.count('gr7.transitions', transitions)
+
+    def read_sequence_data(self, sequence):
+        """ Read the raw step and transition text of a sequence back from the file using its offset/length.
+
+        :param sequence:
+        :return: sequence_data
+        """
+        with Mapped_File(self.file, default_encoding=GR7_ENCODING) as source:
+            data = source.decode(sequence.sequence_offset, sequence.sequence_offset + sequence.sequence_length)
+        return data.replace('\r\n', '\n').replace('\r', '\n')
+
+    def parse_sequences(self, gr7_data):
+        """ This function will parse the function block and sequence header information from the Step7
+        generated .gr7 data together with the steps and transitions of each sequence.
+
+        :param gr7_data: gr7 text or bytes
+        :return: parsed_sequences
+        """
+        if isinstance(gr7_data, str):
+            gr7_data = gr7_data.encode(self.encoding, 'replace')
+        return list(self.generate_sequences(gr7_data))
+
+    def generate_sequences(self, gr7_data):
+        """ Generator behind parse_sequences() and iter_sequences(). Each sequence is yielded as soon as its
+        END_FUNCTION_BLOCK is reached, the step and transition text is referenced by sequence_offset and
+        sequence_length instead of being copied.
+
+        :param gr7_data: gr7 bytes or mmap
+        :return: generator of Sequence records
+        """
+        data_end = len(gr7_data)
+        fb_name = ''
+        in_block = False
+        sequence = None
+        header_end = 0
+        tokens = tokenize_gr7(gr7_data)
+        for kind, start, end, value in tokens:
+            if kind == 'FUNCTION_BLOCK':
+                line_end = GR7_LINE_END.search(gr7_data, end)
+                fb_name = self.decode_text(gr7_data, end, line_end.start() if line_end else data_end)
+                in_block = True
+                sequence = None
+            elif kind == 'END_FUNCTION_BLOCK':
+                if sequence is not None:
+                    sequence.sequence_offset = header_end
+                    sequence.sequence_length = start - header_end
+                    yield sequence
+                in_block = False
+                sequence = None
+            elif kind == '$_COM' and sequence is None and in_block:
+                # The first comment of a function block starts the sequence header
+                comment = self.decode_text(gr7_data, *value)
+                name, _, comments = comment.partition('\n')
+                sequence = Sequence(fb_name, name.strip(), comments.strip())
+                header_end = end
+            elif sequence is None:
+                continue
+            elif kind == '$_CMPSET':
+                sequence.cmpset = self.decode_text(gr7_data, *value)
+                header_end = skip_whitespace(gr7_data, end, data_end)
+            elif kind == '$_SETTINGS':
+                sequence.settings = self.decode_text(gr7_data, *value)
+                header_end = skip_whitespace(gr7_data, end, data_end)
+            elif kind == 'VAR_INPUT':
+                block_end = self.consume_until(tokens, 'END_VAR')
+                sequence.var_input = self.decode_text(gr7_data, end, block_end[0])
+                header_end = skip_whitespace(gr7_data, block_end[1], data_end)
+            elif kind == 'PERM_CONDITION_AT_BEGIN':
+                block_end = self.consume_until(tokens, 'END_PERM_CONDITION')
+                sequence.perm_condition = self.decode_text(gr7_data, end, block_end[0])
+                header_end = block_end[1]
+            elif kind in ('STEP', 'INITIAL_STEP'):
+                sequence.step_data.append(self.build_step(gr7_data, end, tokens, kind == 'INITIAL_STEP'))
+            elif kind == 'TRANSITION':
+                sequence.transition_data.append(self.build_transition(gr7_data, end, tokens))
+
+    def decode_text(self, gr7_data, start, end):
+        return decode_text(gr7_data, start, end, self.encoding)
+
+    def consume_until(self, tokens, kind):
+        """ Advance the token stream to the next token of the given kind.
+
+        :param tokens:
+        :param kind:
+        :return: (start, end) span of the closing token
+        """
+        for token in tokens:
+            if token[0] == kind:
+                return token[1], token[2]
+        raise ValueError("Missing " + kind + " in .gr7 data")
+
+    def build_step(self, gr7_data, pos, tokens, initial=False):
+        """ Build a Step record from the tokens following a STEP/INITIAL_STEP keyword.
+
+        :param gr7_data:
+        :param pos: end offset of the STEP keyword
+        :param tokens:
+        :param initial: the keyword was INITIAL_STEP
+        :return: step
+        """
+        step = Step(initial=initial)
+        body_start = pos
+        for kind, start, end, value in tokens:
+            if kind == '$_NUM' and not step.number:
+                step.name = sys.intern(self.decode_text(gr7_data, pos, start))
+                step.number = self.decode_text(gr7_data, *value)
+                body_start = end + 1  # Skip the ':' after the step number
+            elif kind == '$_COM' and not step.comment:
+                step.comment = self.decode_text(gr7_data, *value)
+                body_start = end
+            elif kind == 'SUPERVISION':
+                supervision = self.consume_until(tokens, 'CONDITION')
+                supervision_end = self.consume_until(tokens, 'END_SUPERVISION')
+                step.supervision = self.decode_text(gr7_data, supervision[1], supervision_end[0]).lstrip(':=').strip()
+                body_start = supervision_end[1]
+            elif kind == 'END_STEP':
+                body = self.decode_text(gr7_data, body_start, start)
+                if body:
+                    step.condition = body.split('\n')
+                return step
+        raise ValueError("Missing END_STEP in .gr7 data")
+
+    def build_transition(self, gr7_data, pos, tokens):
+        """ Build a Transition record from the tokens following a TRANSITION keyword.
+
+        :param gr7_data:
+        :param pos: end offset of the TRANSITION keyword
+        :param tokens:
+        :return: transition
+        """
+        transition = Transition()
+        list_kind = None
+        list_start = pos
+        for kind, start, end, value in tokens:
+            if list_kind is not None:
+                setattr(transition, list_kind, self.split_step_list(self.decode_text(gr7_data, list_start, start)))
+                list_kind = None
+            if kind == '$_NUM' and not transition.number:
+                transition.name = self.decode_text(gr7_data, pos, start)
+                transition.number = self.decode_text(gr7_data, *value)
+            elif kind == 'FROM':
+                list_kind, list_start = 'from_steps', end
+            elif kind == 'TO':
+                list_kind, list_start = 'to_steps', end
+            elif kind == 'CONDITION':
+                list_start = end
+            elif kind == 'END_TRANSITION':
+                transition.condition = self.decode_text(gr7_data, list_start, start).lstrip(':=').strip()
+                return transition
+        raise ValueError("Missing END_TRANSITION in .gr7 data")
+
+    def split_step_list(self, step_list):
+        """ Split a FROM/TO step list, either a single step name or "( Step_1, Step_2) :" for branches.
+
+        :param step_list:
+        :return: list of step names
+        """
+        step_list = step_list.rstrip(':').strip().strip('()')
+        return [sys.intern(step.strip()) for step in step_list.split(',') if step.strip()]
+
+    def parse_steps(self, gr7_data):
+        """ This function will parse the steps information from the Step7 gernerated .gr7 file
+        and map them into Step/Transition records by name.
+
+        :param gr7_data: gr7 text or bytes
+        :return: parsed_steps
+        """
+        if isinstance(gr7_data, str):
+            gr7_data = gr7_data.encode(self.encoding, 'replace')
+        tokens = tokenize_gr7(gr7_data)
+        return [self.build_step(gr7_data, end, tokens, kind == 'INITIAL_STEP')
+                for kind, start, end, value in tokens if kind in ('STEP', 'INITIAL_STEP')]
+
+    def parse_transitions(self, gr7_data):
+        """ This function will parse the transition information from the Step7 gernerated .gr7 file
+        and map them into Step/Transition records by name.
+
+        :param gr7_data: gr7 text or bytes
+        :return: parsed_transitions
+        """
+        if isinstance(gr7_data, str):
+            gr7_data = gr7_data.encode(self.encoding, 'replace')
+        tokens = tokenize_gr7(gr7_data)
+        return [self.build_transition(gr7_data, end, tokens)
+                for kind, start, end, value in tokens if kind == 'TRANSITION']
+
+    def create_drawio_xml_old(self, steps, transitions):
+        """ This function will generate the xml data with step 7 steps and transitions information
+
+        :param steps:
+        :param transitions:
+        :return: xml_data
+        """
+        # Create an XML structure compatible with draw.io
+        root = ET.Element("mxGraphModel")
+        diagram = ET.SubElement(root, "root")
+
+        # Create default parent
+        default_parent = ET.SubElement(diagram, "mxCell", {
+            'id': '0'
+        })
+        layer = ET.SubElement(diagram, "mxCell", {
+            'id': '1',
+            'parent': '0'
+        })
+
+        # Add each step as a draw.io node
+        for idx, step in enumerate(steps):
+            shape = ET.SubElement(diagram, "mxCell", {
+                'id': str(idx + 2),
+                'value': f'{step["name"]} - {step["comment"]}',
+                'style': 'rounded=1;whiteSpace=wrap;html=1;',  # Process block style
+                'vertex': '1',
+                'parent': '1'
+            })
+            geo = ET.SubElement(shape, "mxGeometry", {
+                'x': str(40 * idx),  # Spacing out the nodes for simplicity
+                'y': str(40 * idx),
+                'width': '120',
+                'height': '60',
+                'as': 'geometry'
+            })
+
+        # Convert the XML tree to a string and return
+        return ET.tostring(root, encoding='utf-8', method='xml')
+
+    def create_drawio_xml(self, steps, transitions):
+        """Converts step and transition data to draw.io XML format."""
+        from App.DrawIO.DrawIO_Writer import graph_model_xml
+        return graph_model_xml(steps, transitions, node_width=80, node_height=40)
+
+
+if __name__ == "__main__":
+    # Sample input from the previously decoded content
+    s7g = GR7_Parse(sys.argv[1] if len(sys.argv) > 1 else
+                    os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data', 'B3Z11502.gr7'))
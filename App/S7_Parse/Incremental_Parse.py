@@ -0,0 +1,293 @@
+import hashlib
+import os
+import pickle
+import re
+import sys
+import tempfile
+
+from App.S7_Parse.GR7_Parse import GR7_ENCODING, GR7_Parse, decode_text
+from App.S7_Parse.Mapped_File import Mapped_File
+from App.S7_Parse.Parse_Cache import DEFAULT_CACHE_DIR, export_cache_file
+from App.S7_Parse.SDF_Parse import SDF_ENCODING, parse_symbols
+
+MANIFEST_VERSION = 3  # Bump when the manifest or the pickled records change shape or content
+MANIFEST_PREFIX = 'manifest-'
+MANIFEST_EXT = '.manifest'  # Not .pkl, Parse_Cache evicts and clears its .pkl entries
+INCREMENTAL_EXTS = ('.gr7', '.sdf')
+
+# FUNCTION_BLOCK ... END_FUNCTION_BLOCK sections of a .gr7 file, each one holds a sequence
+GR7_BLOCK_PATTERN = re.compile(rb"^[ \t]*(END_FUNCTION_BLOCK|FUNCTION_BLOCK)\b[^\r\n]*", re.MULTILINE)
+STEP_FIELDS = ('number', 'initial', 'supervision', 'condition', 'comment')
+TRANSITION_FIELDS = ('number', 'from_steps', 'to_steps', 'condition')
+SYMBOL_FIELDS = ('perph_type', 'perph_addr', 'data_type', 'comment')
+
+
+def block_digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def default_manifest_file(root_dir, cache_dir=DEFAULT_CACHE_DIR):
+    """ The manifest path of an export directory, kept in the parse cache directory.
+
+    :param root_dir: project export directory
+    :param cache_dir:
+    :return: manifest path
+    """
+    return export_cache_file(root_dir, MANIFEST_PREFIX, MANIFEST_EXT, cache_dir)
+
+
+def split_gr7_blocks(gr7_data, encoding=GR7_ENCODING):
+    """ Find the function blocks of .gr7 data without parsing them.
+
+    :param gr7_data: gr7 bytes or mmap
+    :param encoding:
+    :return: list of (fb_name, start, end) with end past the END_FUNCTION_BLOCK line
+    """
+    blocks = []
+    fb_name = None
+    block_start = 0
+    for match in GR7_BLOCK_PATTERN.finditer(gr7_data):
+        if match.group(1) == b'FUNCTION_BLOCK':
+            fb_name = decode_text(gr7_data, match.end(1), match.end(), encoding)
+            block_start = match.start()
+        elif fb_name is not None:
+            blocks.append((fb_name, block_start, match.end()))
+            fb_name = None
+    return blocks
+
+
+def diff_records(old, new, fields):
+    """ Compare two name -> record dictionaries.
+
+    :param old:
+    :param new:
+    :param fields: attributes compared for records present in both
+    :return: {'added': [names], 'removed': [names], 'changed': {name: {field: (old, new)}}}
+    """
+    changed = {}
+    for name in old.keys() & new.keys():
+        changes = {field: (getattr(old[name], field), getattr(new[name], field)) for field in fields
+                   if getattr(old[name], field) != getattr(new[name], field)}
+        if changes:
+            changed[name] = changes
+    return {'added': [name for name in new if name not in old],
+            'removed': [name for name in old if name not in new],
+            'changed': dict(sorted(changed.items()))}
+
+
+def diff_sequences(old, new):
+    """ Compare two versions of a sequence step by step and transition by transition.
+
+    :param old: Sequence or None
+    :param new: Sequence or None
+    :return: {'steps': diff, 'transitions': diff}
+    """
+    old_steps = {step.name: step for step in old.step_data} if old is not None else {}
+    new_steps = {step.name: step for step in new.step_data} if new is not None else {}
+    old_transitions = {transition.name: transition for transition in old.transition_data} if old is not None else {}
+    new_transitions = {transition.name: transition for transition in new.transition_data} if new is not None else {}
+    return {'steps': diff_records(old_steps, new_steps, STEP_FIELDS),
+            'transitions': diff_records(old_transitions, new_transitions, TRANSITION_FIELDS)}
+
+
+class Incremental_Parse:
+    """Incremental Parse will re-parse a project export directory against the manifest of the previous run and
+    only parse the .gr7 function blocks and .sdf rows whose content changed.
+
+    The manifest keeps per file the size and mtime, and per FUNCTION_BLOCK and per symbol table row a content
+    hash together with its parsed record. Files whose size and mtime did not change are taken from the
+    manifest without being read, changed files are hashed block by block and only new or changed blocks are
+    parsed. The run produces a structured diff against the previous snapshot.
+
+    Args:
+        root_dir (str): Project export directory, searched recursively.
+        manifest_file (str): Manifest path, see default_manifest_file() for the default in the parse cache
+            directory.
+
+    Attributes:
+        seq_list (list(Sequence)): Sequences of every .gr7 file.
+        symbol_data (list(Symbol)): Symbols of every .sdf file.
+        diff (dict): Changes against the previous run, see diff_sequences/diff_records:
+            {'files': {'added', 'removed', 'changed'}, 'sequences': {file: {fb_name: {'status', 'steps',
+            'transitions'}}}, 'symbols': {file: diff}}
+        stats (dict): Number of files and blocks reused from the manifest or parsed.
+    """
+
+    def __init__(self, root_dir, manifest_file=None):
+        self.root_dir = root_dir
+        self.manifest_file = manifest_file or default_manifest_file(root_dir)
+        self.seq_list = []
+        self.symbol_data = []
+        self.diff = {'files': {'added': [], 'removed': [], 'changed': []}, 'sequences': {}, 'symbols': {}}
+        self.stats = {'files_reused': 0, 'files_read': 0, 'blocks_reused': 0, 'blocks_parsed': 0}
+
+        old_manifest = self.load_manifest()
+        manifest = {}
+        for file in self.discover_files():
+            name = os.path.relpath(file, root_dir)
+            old_entry = old_manifest.get(name)
+            if old_entry is None:
+                self.diff['files']['added'].append(name)
+            stat = os.stat(file)
+            if old_entry is not None and old_entry['stat'] == (stat.st_size, stat.st_mtime_ns):
+                entry = old_entry
+                self.stats['files_reused'] += 1
+                self.stats['blocks_reused'] += len(entry['blocks'])
+            else:
+                parse = self.parse_gr7 if file.lower().endswith('.gr7') else self.parse_sdf
+                entry = parse(file, old_entry['blocks'] if old_entry is not None else {}, name)
+                entry['stat'] = (stat.st_size, stat.st_mtime_ns)
+                self.stats['files_read'] += 1
+                if old_entry is not None and (self.diff['sequences'].get(name) or self.diff['symbols'].get(name)):
+                    self.diff['files']['changed'].append(name)
+            manifest[name] = entry
+            self.collect(file, entry)
+
+        for name, old_entry in old_manifest.items():
+            if name not in manifest:
+                self.diff['files']['removed'].append(name)
+                self.record_removed(name, old_entry)
+        self.save_manifest(manifest)
+
+    def discover_files(self):
+        files = []
+        for dir_path, dir_names, file_names in os.walk(self.root_dir):
+            dir_names.sort()
+            files.extend(os.path.join(dir_path, file_name) for file_name in sorted(file_names)
+                         if os.path.splitext(file_name)[1].lower() in INCREMENTAL_EXTS)
+        return files
+
+    def parse_gr7(self, file, old_blocks, name):
+        """ Hash the function blocks of a .gr7 file and parse the changed ones.
+
+        :param file:
+        :param old_blocks: fb_name -> (digest, sequence offset in the block, Sequence) of the previous run
+        :param name: file name relative to root_dir
+        :return: manifest entry
+        """
+        parser = GR7_Parse(file, stream=True)
+        blocks = {}
+        changes = {}
+        with Mapped_File(file, default_encoding=GR7_ENCODING) as source:
+            parser.encoding = source.encoding
+            for fb_name, start, end in split_gr7_blocks(source.data, source.encoding):
+                block = source.data[start:end]
+                digest = block_digest(block)
+                old_block = old_blocks.get(fb_name)
+                if old_block is not None and old_block[0] == digest:
+                    blocks[fb_name] = old_block
+                    if old_block[2] is not None:
+                        # Offsets are kept relative to the block as well, the block may have moved
+                        old_block[2].sequence_offset = start + old_block[1]
+                    self.stats['blocks_reused'] += 1
+                    continue
+                sequence = next(parser.generate_sequences(block), None)
+                offset = 0
+                if sequence is not None:
+                    offset = sequence.sequence_offset
+                    sequence.sequence_offset += start
+                blocks[fb_name] = (digest, offset, sequence)
+                self.stats['blocks_parsed'] += 1
+                changes[fb_name] = dict(status='changed' if old_block is not None else 'added',
+                                        **diff_sequences(old_block[2] if old_block else None, sequence))
+
+        for fb_name, old_block in old_blocks.items():
+            if fb_name not in blocks:
+                changes[fb_name] = dict(status='removed', **diff_sequences(old_block[2], None))
+        if changes:
+            self.diff['sequences'][name] = changes
+        return {'blocks': blocks}
+
+    def parse_sdf(self, file, old_blocks, name):
+        """ Hash the rows of a .sdf file and parse the changed ones.
+
+        :param file:
+        :param old_blocks: row digest -> Symbol of the previous run
+        :param name: file name relative to root_dir
+        :return: manifest entry
+        """
+        blocks = {}
+        with Mapped_File(file, default_encoding=SDF_ENCODING) as source:
+            for row in source.byte_lines():
+                digest = block_digest(row)
+                symbol = old_blocks.get(digest)
+                if symbol is not None:
+                    self.stats['blocks_reused'] += 1
+                else:
+                    symbols = parse_symbols(row.decode(source.encoding, 'replace'))
+                    if not symbols:
+                        continue
+                    symbol = symbols[0]
+                    self.stats['blocks_parsed'] += 1
+                blocks[digest] = symbol
+
+        old_symbols = {symbol.name: symbol for symbol in old_blocks.values()}
+        new_symbols = {symbol.name: symbol for symbol in blocks.values()}
+        changes = diff_records(old_symbols, new_symbols, SYMBOL_FIELDS)
+        if any(changes.values()):
+            self.diff['symbols'][name] = changes
+        return {'blocks': blocks}
+
+    def record_removed(self, name, old_entry):
+        if name.lower().endswith('.gr7'):
+            self.diff['sequences'][name] = {fb_name: dict(status='removed', **diff_sequences(block[2], None))
+                                            for fb_name, block in old_entry['blocks'].items()}
+        else:
+            self.diff['symbols'][name] = diff_records({symbol.name: symbol for symbol in old_entry['blocks'].values()},
+                                                      {}, SYMBOL_FIELDS)
+
+    def collect(self, file, entry):
+        if file.lower().endswith('.gr7'):
+            self.seq_list.extend(sequence for digest, offset, sequence in entry['blocks'].values()
+                                 if sequence is not None)
+        else:
+            self.symbol_data.extend(entry['blocks'].values())
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_file, 'rb') as manifest_file:
+                version, manifest = pickle.load(manifest_file)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError):
+            return {}
+        return manifest if version == MANIFEST_VERSION else {}
+
+    def save_manifest(self, manifest):
+        # Write to a temporary file first so an interrupted run keeps the previous manifest
+        manifest_dir = os.path.dirname(os.path.abspath(self.manifest_file))
+        os.makedirs(manifest_dir, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=manifest_dir, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                pickle.dump((MANIFEST_VERSION, manifest), temp_file, protocol=5)
+            os.replace(temp_path, self.manifest_file)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def report(self):
+        """ Summarize the diff.
+
+        :return: report lines
+        """
+        lines = []
+        for kind in ('added', 'removed', 'changed'):
+            lines.extend(kind + ' file ' + name for name in self.diff['files'][kind])
+        for name, sequences in self.diff['sequences'].items():
+            for fb_name, change in sequences.items():
+                counts = ', '.join('{} {} {}'.format(len(change[part][kind]), part, kind)
+                                   for part in ('steps', 'transitions') for kind in ('added', 'removed', 'changed')
+                                   if change[part][kind])
+                lines.append('{} {} {}: {}'.format(name, fb_name, change['status'], counts or 'header'))
+        for name, changes in self.diff['symbols'].items():
+            lines.append('{}: {} symbols added, {} removed, {} changed'.format(
+                name, len(changes['added']), len(changes['removed']), len(changes['changed'])))
+        lines.append('{files_reused} files reused, {files_read} files read, {blocks_reused} blocks reused, '
+                     '{blocks_parsed} blocks parsed'.format(**self.stats))
+        return lines
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data')
+    # The manifest goes to the parse cache directory unless a path is given
+    print('\n'.join(Incremental_Parse(root, sys.argv[2] if len(sys.argv) > 2 else None).report()))
@@ -0,0 +1,298 @@
+from bisect import bisect_left
+import json
+import re
+import threading
+import time
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_PREFIX = 's7_'
+PROMETHEUS_NAME_PATTERN = re.compile(r'[^a-zA-Z0-9_]')
+
+# The instrumentation the parsers report to, None while disabled. Instrumented code asks for it once per file,
+# stage or batch and skips all bookkeeping when it is None, so the disabled cost is one global lookup.
+ACTIVE = None
+
+
+def enable(hooks=()):
+    """ Start collecting metrics in this process.
+
+    :param hooks: callables hook(kind, name, value), see Instrumentation
+    :return: the new active Instrumentation
+    """
+    global ACTIVE
+    ACTIVE = Instrumentation(hooks)
+    return ACTIVE
+
+
+def disable():
+    """ Stop collecting metrics.
+
+    :return: the Instrumentation that was active, or None
+    """
+    global ACTIVE
+    instrumentation, ACTIVE = ACTIVE, None
+    return instrumentation
+
+
+def active_instrumentation():
+    return ACTIVE
+
+
+def timed_stage(name):
+    """ Time a stage with a with block, a shared no-op context when disabled.
+
+    :param name: stage name, e.g. 'gr7.parse'
+    :return: context manager
+    """
+    return ACTIVE.stage(name) if ACTIVE is not None else NULL_STAGE
+
+
+def add_count(name, value=1):
+    if ACTIVE is not None:
+        ACTIVE.count(name, value)
+
+
+def observe(name, value):
+    if ACTIVE is not None:
+        ACTIVE.observe(name, value)
+
+
+def prometheus_name(name):
+    return PROMETHEUS_PREFIX + PROMETHEUS_NAME_PATTERN.sub('_', name)
+
+
+class Null_Stage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_STAGE = Null_Stage()
+
+
+class Stage_Timer:
+    __slots__ = ('instrumentation', 'name', 'start')
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.add_stage(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    """ Cumulative bucket counts of observed values, the way Prometheus histograms are exported.
+
+    Args:
+        buckets (tuple(float)): Ascending upper bounds, values above the last one land in the +Inf bucket.
+    """
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def merge(self, data):
+        for index, count in enumerate(data['counts']):
+            self.counts[index] += count
+        self.total += data['sum']
+        self.count += data['count']
+
+    def to_dict(self):
+        return {'buckets': list(self.buckets), 'counts': list(self.counts), 'sum': self.total, 'count': self.count}
+
+
+class Instrumentation:
+    """Instrumentation will collect per-stage timers, counters and histograms of the parsers, the translator
+    and the draw.io writer.
+
+    Stages are coarse (reading a file, parsing it, laying out a page), counters are added once per file, pass
+    or batch, never per line, so collecting costs little even when enabled. Every stage, count and observation
+    is also handed to the hooks as it happens, e.g. to stream progress or forward it to another collector.
+    Worker processes collect their own instrumentation, merge() adds their to_dict() to the parent's.
+
+    Args:
+        hooks (list): Callables hook(kind, name, value) with kind 'stage' (value in seconds), 'count' or
+            'observe'.
+
+    Attributes:
+        stages (dict): Stage name -> [calls, total seconds].
+        counters (dict): Counter name -> value, e.g. 'gr7.bytes' or 'translation_memory.hits'.
+        histograms (dict): Histogram name -> Histogram, e.g. 'translator.batch_seconds'.
+    """
+
+    def __init__(self, hooks=()):
+        self.hooks = list(hooks)
+        self.stages = {}
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()  # The translator reports from its scheduler threads
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def stage(self, name):
+        return Stage_Timer(self, name)
+
+    def add_stage(self, name, seconds):
+        with self.lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = [0, 0.0]
+            stage[0] += 1
+            stage[1] += seconds
+        for hook in self.hooks:
+            hook('stage', name, seconds)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        for hook in self.hooks:
+            hook('count', name, value)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(buckets)
+            histogram.add(value)
+        for hook in self.hooks:
+            hook('observe', name, value)
+
+    def hit_rate(self, hits, misses):
+        """ Share of lookups that hit, e.g. hit_rate('parse_cache.hits', 'parse_cache.misses').
+
+        :param hits: counter name
+        :param misses: counter name
+        :return: rate between 0 and 1, None before the first lookup
+        """
+        hit_count = self.counters.get(hits, 0)
+        total = hit_count + self.counters.get(misses, 0)
+        return hit_count / total if total else None
+
+    def merge(self, data):
+        """ Add the to_dict() of another instrumentation, e.g. of a worker process. Hooks are not called.
+
+        :param data:
+        """
+        with self.lock:
+            for name, (calls, seconds) in data['stages'].items():
+                stage = self.stages.setdefault(name, [0, 0.0])
+                stage[0] += calls
+                stage[1] += seconds
+            for name, value in data['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, histogram_data in data['histograms'].items():
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram(tuple(histogram_data['buckets']))
+                histogram.merge(histogram_data)
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'stages': {name: list(stage) for name, stage in self.stages.items()},
+                'counters': dict(self.counters),
+                'histograms': {name: histogram.to_dict() for name, histogram in self.histograms.items()}
+            }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+
+    def to_prometheus(self):
+        """ Format the metrics in the Prometheus text exposition format. Names get the s7_ prefix with dots
+        replaced by underscores, stages are labelled counters of calls and seconds.
+
+        :return: text
+        """
+        data = self.to_dict()
+        lines = []
+        if data['stages']:
+            for metric, index in (('stage_calls_total', 0), ('stage_seconds_total', 1)):
+                lines.append('# TYPE ' + PROMETHEUS_PREFIX + metric + ' counter')
+                for name, stage in sorted(data['stages'].items()):
+                    lines.append('{}{}{{stage="{}"}} {}'.format(PROMETHEUS_PREFIX, metric, name, stage[index]))
+        for name, value in sorted(data['counters'].items()):
+            metric = prometheus_name(name) + '_total'
+            lines.append('# TYPE ' + metric + ' counter')
+            lines.append('{} {}'.format(metric, value))
+        for name, histogram in sorted(data['histograms'].items()):
+            metric = prometheus_name(name)
+            lines.append('# TYPE ' + metric + ' histogram')
+            cumulative = 0
+            for bound, count in zip(list(histogram['buckets']) + ['+Inf'], histogram['counts']):
+                cumulative += count
+                lines.append('{}_bucket{{le="{}"}} {}'.format(metric, bound, cumulative))
+            lines.append('{}_sum {}'.format(metric, histogram['sum']))
+            lines.append('{}_count {}'.format(metric, histogram['count']))
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """ Write the metrics to a file, Prometheus text for a .prom or .txt file and JSON otherwise.
+
+        :param path:
+        """
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as dump_file:
+            dump_file.write(text)
+
+    def report(self):
+        """ Summarize the stages, slowest first, and the counters.
+
+        :return: report lines
+        """
+        data = self.to_dict()
+        lines = ['{:9.4f}s {:>7} calls  {}'.format(seconds, calls, name) for name, (calls, seconds)
+                 in sorted(data['stages'].items(), key=lambda item: item[1][1], reverse=True)]
+        lines.extend('{:>16}  {}'.format(value, name) for name, value in sorted(data['counters'].items()))
+        for name, histogram in sorted(data['histograms'].items()):
+            mean = histogram['sum'] / histogram['count'] if histogram['count'] else 0.0
+            lines.append('{:>16}  {} (mean {:.4f})'.format(histogram['count'], name, mean))
+        return lines
+
+
+if __name__ == "__main__":
+    import argparse
+    # The parsers report to the imported module, not to this one running as __main__
+    from App.S7_Parse import Instrumentation
+    from App.S7_Parse.Project_Parse import Project_Parse
+    parser = argparse.ArgumentParser(description="Parse a project export with instrumentation enabled.")
+    parser.add_argument('root_dir', help="project export directory")
+    parser.add_argument('-o', '--output', help="write the metrics to a .json or .prom file")
+    parser.add_argument('-w', '--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    instrumentation = Instrumentation.enable()
+    with instrumentation.stage('project.parse'):
+        Project_Parse(args.root_dir, workers=args.workers)
+    print('\n'.join(instrumentation.report()))
+    if args.output:
+        instrumentation.dump(args.output)
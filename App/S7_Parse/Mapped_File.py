@@ -0,0 +1,172 @@
+import codecs
+import io
+import mmap
+import os
+import re
+
+DEFAULT_ENCODING = 'cp1252'  # Simatic Manager writes its exports with the Windows code page
+DETECT_BYTES = 65536  # Bytes looked at to tell UTF-8 from the Windows code page
+NON_ASCII_PATTERN = re.compile(rb'[\x80-\xff]')
+LINE_CHUNK = 1 << 16  # Bytes decoded or searched at a time when reading lines or detecting the encoding
+
+# Longest BOM first, the UTF-32 LE BOM starts with the UTF-16 LE one
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+
+def detect_encoding(data, default=DEFAULT_ENCODING, release=None):
+    """ Detect the encoding of a file.
+
+    A BOM decides, UTF-16 without BOM is recognized by its zero bytes. Otherwise the data is UTF-8 when the
+    bytes from its first non-ASCII byte on decode as UTF-8, German umlauts in the Windows code page never do.
+
+    :param data: file content, bytes or mmap
+    :param default: encoding of plain 8-bit data
+    :param release: optional callback(start, end) for the ranges searched for non-ASCII bytes
+    :return: (encoding, BOM length)
+    """
+    for bom, encoding in BOMS:
+        if data[:len(bom)] == bom:
+            return encoding, len(bom)
+    head = data[:DETECT_BYTES]
+    if len(head) > 1 and head.count(0) * 4 > len(head):
+        return ('utf-16-le' if head[1] == 0 else 'utf-16-be'), 0
+
+    # A pure ASCII file is searched to the end, one window at a time
+    match = None
+    for start in range(0, len(data), LINE_CHUNK):
+        if not data[start:start + LINE_CHUNK].isascii():
+            match = NON_ASCII_PATTERN.search(data, start, start + LINE_CHUNK)
+            break
+        if release is not None:
+            release(start, start + LINE_CHUNK)
+    if match is None:
+        return default, 0
+    try:
+        # A sample cut inside a multi-byte character is still valid up to that character
+        codecs.getincrementaldecoder('utf-8')().decode(data[match.start():match.start() + DETECT_BYTES], final=False)
+    except UnicodeDecodeError:
+        return default, 0
+    return 'utf-8', 0
+
+
+def is_ascii_compatible(encoding):
+    return codecs.lookup(encoding).name not in ('utf-16-le', 'utf-16-be', 'utf-16', 'utf-32-le', 'utf-32-be',
+                                                'utf-32')
+
+
+class Mapped_File:
+    """Mapped File is the shared input layer of the parsers. The file is memory-mapped, its encoding is
+    detected once and the parsers scan the raw bytes, decoding only the fields they keep.
+
+    data is the map itself for the usual BOM-less 8-bit or UTF-8 export, so slices are read straight from the
+    page cache. A file with a BOM is copied once without it, a UTF-16/32 file is transcoded once to UTF-8, so
+    data is always ASCII compatible and the byte patterns of the parsers apply. The file handle is closed as
+    soon as the map exists, the map itself is closed by close() or on leaving the with block.
+
+    Args:
+        file (str): Path of the file.
+        encoding (str): Encoding to use instead of detecting it.
+        default_encoding (str): Encoding of data without BOM that is not UTF-8.
+
+    Attributes:
+        data (mmap or bytes): ASCII compatible file content without BOM, b'' for an empty file.
+        encoding (str): Encoding of data.
+        file_encoding (str): Encoding of the file on disk.
+        bom (bool): Whether the file starts with a BOM.
+        size (int): Length of data.
+    """
+
+    def __init__(self, file, encoding=None, default_encoding=DEFAULT_ENCODING):
+        self.file = file
+        self.map = None
+        with open(file, 'rb') as active_file:
+            if os.fstat(active_file.fileno()).st_size:
+                self.map = mmap.mmap(active_file.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self.map if self.map is not None else b''
+
+        bom_length = 0
+        if encoding is None:
+            encoding, bom_length = detect_encoding(data, default_encoding, self.release)
+        self.file_encoding = encoding
+        self.bom = bom_length > 0
+        self.encoding = encoding
+        if not is_ascii_compatible(encoding):
+            data = data[bom_length:].decode(encoding, 'replace').encode('utf-8')
+            self.encoding = 'utf-8'
+            self.close()
+        elif bom_length:
+            data = data[bom_length:]
+            self.close()
+        self.data = data
+        self.size = len(data)
+
+    def decode(self, start=0, end=None):
+        """ Decode a slice of the data.
+
+        :param start:
+        :param end:
+        :return: text
+        """
+        return self.data[start:end].decode(self.encoding, 'replace')
+
+    def text(self):
+        return self.decode()
+
+    def byte_lines(self):
+        """ This generator will split the data into lines without decoding them, line endings are kept.
+
+        :return: generator of bytes
+        """
+        data = self.data
+        start = 0
+        while start < self.size:
+            end = data.find(b'\n', start) + 1 or self.size
+            yield data[start:end]
+            start = end
+
+    def lines(self):
+        """ This generator will decode the data a chunk of whole lines at a time and yield it line by line, line
+        endings are kept. Pages of the map that were read are released again so the resident size stays at
+        about one chunk however large the file is.
+
+        :return: generator of lines
+        """
+        data = self.data
+        start = 0
+        while start < self.size:
+            end = min(start + LINE_CHUNK, self.size)
+            if end < self.size:
+                # Cut after the last line break of the chunk, so no character is split
+                cut = data.rfind(b'\n', start, end)
+                end = cut + 1 if cut >= start else data.find(b'\n', end) + 1 or self.size
+            # Lines split at \n, \r\n and \r like a file opened in text mode, but the line endings are kept
+            yield from io.StringIO(data[start:end].decode(self.encoding, 'replace'), newline='')
+            self.release(start, end)
+            start = end
+
+    def release(self, start, end):
+        # Drop the mapped pages of a range that was consumed, they are read from the page cache again if needed
+        if self.map is not None and hasattr(self.map, 'madvise'):
+            start -= start % mmap.PAGESIZE
+            end -= end % mmap.PAGESIZE
+            if end > start:
+                self.map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+            self.data = b''
+            self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
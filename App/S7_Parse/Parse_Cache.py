@@ -0,0 +1,193 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+from App.S7_Parse.Instrumentation import add_count
+
+CACHE_FORMAT_VERSION = 4  # Bump when the pickled parser output changes shape or content
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.s7_parse_cache')
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+ENTRY_EXT = '.pkl'
+LINK_EXT = '.lnk'
+
+
+def export_cache_file(root_dir, prefix, ext, cache_dir=DEFAULT_CACHE_DIR):
+    """ The path of a file kept per export directory in the cache directory, e.g. the incremental parse manifest
+    or the cross reference index. It is named after the absolute export path so the export is never written to.
+
+    :param root_dir: project export directory
+    :param prefix: file name prefix, e.g. 'manifest-'
+    :param ext: file extension, not .pkl or .lnk which the cache evicts
+    :param cache_dir:
+    :return: path
+    """
+    key = hashlib.sha1(os.path.abspath(root_dir).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, prefix + key + ext)
+
+
+class Parse_Cache:
+    """Parse Cache will keep parsed GR7/SDF/CFG results on disk so unchanged exports are not parsed again.
+
+    A file is first looked up by its path, size and mtime through a small link file. When that misses, the
+    content hash is used, so a copied or touched export with the same content still hits. Entries are pickled
+    with protocol 5 under a format version stamp and evicted least recently used once the cache directory
+    grows past max_size.
+
+    Args:
+        cache_dir (str): Directory holding the cache files.
+        max_size (int): Total size in bytes the cache directory may grow to before eviction.
+
+    Attributes:
+        cache_dir (str): Directory holding the cache files.
+        max_size (int): Total size in bytes the cache directory may grow to before eviction.
+        miss_digests (dict): (kind, path, size, mtime) -> content hash of the files that missed, so the put()
+            following a miss does not hash the file again.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.miss_digests = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, file, kind):
+        """Load the cached parse result of a file.
+
+        Args:
+            file (str): Path of the parsed file.
+            kind (str): Parser kind, e.g. 'gr7' or 'sdf'.
+
+        Returns:
+            The cached result, or None on a miss.
+        """
+        file_key = self.file_key(file, kind)
+        link_path = os.path.join(self.cache_dir, self.stat_key(file_key) + LINK_EXT)
+        digest = self.read_link(link_path)
+        if digest is not None:
+            result = self.load_entry(digest, kind)
+            if result is not None:
+                add_count('parse_cache.hits')
+                return result
+
+        # Fall back to the content hash, the file may have been touched or copied without changes
+        digest = self.content_key(file, kind)
+        result = self.load_entry(digest, kind)
+        if result is not None:
+            self.write_atomic(link_path, digest.encode('ascii'))
+            add_count('parse_cache.hits')
+            add_count('parse_cache.content_hits')
+        else:
+            self.miss_digests[file_key] = digest
+            add_count('parse_cache.misses')
+        return result
+
+    def put(self, file, kind, result):
+        """Store the parse result of a file and evict old entries if the cache is over its size.
+
+        Args:
+            file (str): Path of the parsed file.
+            kind (str): Parser kind, e.g. 'gr7' or 'sdf'.
+            result: Picklable parse result.
+        """
+        file_key = self.file_key(file, kind)
+        digest = self.miss_digests.pop(file_key, None)
+        if digest is None:
+            digest = self.content_key(file, kind)
+        payload = pickle.dumps((CACHE_FORMAT_VERSION, kind, result), protocol=5)
+        self.write_atomic(os.path.join(self.cache_dir, digest + ENTRY_EXT), payload)
+        self.write_atomic(os.path.join(self.cache_dir, self.stat_key(file_key) + LINK_EXT),
+                          digest.encode('ascii'))
+        self.evict()
+
+    def load_entry(self, digest, kind):
+        entry_path = os.path.join(self.cache_dir, digest + ENTRY_EXT)
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                version, entry_kind, result = pickle.load(entry_file)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, AttributeError, ImportError):
+            return None
+        if version != CACHE_FORMAT_VERSION or entry_kind != kind:
+            return None
+        # Mark the entry as recently used for eviction
+        os.utime(entry_path)
+        return result
+
+    def read_link(self, link_path):
+        try:
+            with open(link_path, 'rb') as link_file:
+                return link_file.read().decode('ascii')
+        except OSError:
+            return None
+
+    def file_key(self, file, kind):
+        stat = os.stat(file)
+        return kind, os.path.abspath(file), stat.st_size, stat.st_mtime_ns
+
+    def stat_key(self, file_key):
+        key = '|'.join([str(CACHE_FORMAT_VERSION)] + [str(part) for part in file_key])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def content_key(self, file, kind):
+        digest = hashlib.sha256()
+        digest.update((str(CACHE_FORMAT_VERSION) + '|' + kind + '|').encode('ascii'))
+        with open(file, 'rb') as active_file:
+            for block in iter(lambda: active_file.read(1024 * 1024), b''):
+                digest.update(block)
+        return kind + '-' + digest.hexdigest()
+
+    def write_atomic(self, path, data):
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in max_size."""
+        files = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith((ENTRY_EXT, LINK_EXT)):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+        if total_size <= self.max_size:
+            return
+
+        files.sort()
+        for mtime, size, path in files:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+
+    def clear(self):
+        """Remove every cached entry."""
+        self.miss_digests.clear()
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith((ENTRY_EXT, LINK_EXT)):
+                os.remove(entry.path)
+
+
+if __name__ == "__main__":
+    # Parse the sample files twice, the second run is served from the cache
+    from App.S7_Parse.GR7_Parse import GR7_Parse
+    from App.S7_Parse.SDF_Parse import SDF_Parse
+
+    data_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data')
+    cache = Parse_Cache()
+    for run in ('parse', 'cached'):
+        start = time.perf_counter()
+        GR7_Parse(os.path.join(data_dir, 'B3Z11502.gr7'), cache=cache)
+        SDF_Parse(os.path.join(data_dir, 'B3Z11502.sdf'), cache=cache)
+        print(run, round(time.perf_counter() - start, 4), 's')
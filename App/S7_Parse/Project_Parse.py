@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+import sys
+import time
+import traceback
+
+from App.S7_Parse import Instrumentation
+from App.S7_Parse.AWL_Parse import AWL_Parse
+from App.S7_Parse.CFG_Parse import CFG_Parse
+from App.S7_Parse.GR7_Parse import GR7_Parse
+from App.S7_Parse.SDF_Parse import SDF_Parse
+
+# File extension -> (parser class, result attribute). The results of every file are merged into the project
+# attribute of the same name, files with other extensions are not discovered.
+PARSERS = {
+    '.gr7': (GR7_Parse, 'seq_list'),
+    '.awl': (AWL_Parse, 'block_list'),
+    '.sdf': (SDF_Parse, 'symbol_data'),
+    '.cfg': (CFG_Parse, 'section_list'),
+}
+
+
+def parse_file(file, cache=None, instrument=False):
+    """ Parse one export file, this runs inside the worker processes.
+
+    :param file:
+    :param cache: optional Parse_Cache
+    :param instrument: collect the metrics of this file in the worker and return them to the parent process
+    :return: (file, result attribute, result, elapsed, error, metrics dictionary or None)
+    """
+    if instrument:
+        Instrumentation.enable()
+    start = time.perf_counter()
+    parser, attribute = PARSERS[os.path.splitext(file)[1].lower()]
+    try:
+        result = getattr(parser(file, cache=cache), attribute)
+        error = None
+    except Exception:
+        result = None
+        error = traceback.format_exc()
+    elapsed = time.perf_counter() - start
+    metrics = Instrumentation.disable().to_dict() if instrument else None
+    return file, attribute, result, elapsed, error, metrics
+
+
+class Project_Parse:
+    """Project Parse will discover every Simatic Manager export file under a project directory and parse them
+    across a process pool, merging the results into one project.
+
+    A file that fails to parse is recorded in failures with its traceback, the rest of the batch still runs.
+
+    Args:
+        root_dir (str): Project export directory, searched recursively.
+        workers (int): Number of worker processes, None for one per core and 1 to parse in-process.
+        chunksize (int): Number of files handed to a worker at a time.
+        cache (Parse_Cache): Optional parse cache shared by the workers.
+
+    Attributes:
+        files (list(str)): Parseable files found under root_dir, largest first.
+        seq_list (list(Sequence)): Sequences of every .gr7 file.
+        block_list (list(AWL_Block)): Blocks of every .awl file.
+        symbol_data (list(Symbol)): Symbols of every .sdf file.
+        section_list (list(CFG_Section)): Hardware configuration sections of every .cfg file.
+        file_data (dict): Parse result per file.
+        timings (dict): Parse time in seconds per file.
+        failures (dict): Traceback per file that failed to parse.
+    """
+
+    def __init__(self, root_dir, workers=None, chunksize=4, cache=None):
+        self.root_dir = root_dir
+        self.workers = workers
+        self.chunksize = chunksize
+        self.files = self.discover_files(root_dir)
+        self.seq_list = []
+        self.block_list = []
+        self.symbol_data = []
+        self.section_list = []
+        self.file_data = {}
+        self.timings = {}
+        self.failures = {}
+        self.parse_files(cache)
+
+    def discover_files(self, root_dir):
+        """ Find the export files below the project directory.
+
+        :param root_dir:
+        :return: list of files
+        """
+        files = []
+        for dir_path, dir_names, file_names in os.walk(root_dir):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                ext = os.path.splitext(file_name)[1].lower()
+                if ext in PARSERS:
+                    files.append(os.path.join(dir_path, file_name))
+
+        # Hand out the largest files first so one big file does not finish the batch alone
+        files.sort(key=os.path.getsize, reverse=True)
+        return files
+
+    def parse_files(self, cache):
+        if self.workers == 1:
+            self.merge_results(map(partial(parse_file, cache=cache), self.files))
+        else:
+            # Workers report to an instrumentation of their own, merged into the one active here
+            worker = partial(parse_file, cache=cache, instrument=Instrumentation.ACTIVE is not None)
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                self.merge_results(executor.map(worker, self.files, chunksize=self.chunksize))
+
+    def merge_results(self, results):
+        for file, attribute, result, elapsed, error, metrics in results:
+            if metrics is not None and Instrumentation.ACTIVE is not None:
+                Instrumentation.ACTIVE.merge(metrics)
+            self.timings[file] = elapsed
+            if error is not None:
+                self.failures[file] = error
+                continue
+            self.file_data[file] = result
+            getattr(self, attribute).extend(result)
+
+    def report(self):
+        """ Summarize the per file timing and failures.
+
+        :return: report lines
+        """
+        lines = []
+        for file, elapsed in sorted(self.timings.items(), key=lambda item: item[1], reverse=True):
+            status = 'FAILED' if file in self.failures else 'ok'
+            lines.append('{:8.3f}s  {:6}  {}'.format(elapsed, status, os.path.relpath(file, self.root_dir)))
+        lines.append('{} files, {} failed, {:.3f}s parse time'.format(
+            len(self.files), len(self.failures), sum(self.timings.values())))
+        return lines
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data')
+    project = Project_Parse(root)
+    print('\n'.join(project.report()))
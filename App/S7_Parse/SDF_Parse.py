@@ -1,47 +1,211 @@
-import xml.etree.ElementTree as ET
-import re
-import os
-
-class SDF_Parse:
-    def __init__(self, sdf_file):
-        self.file = sdf_file
-        self.filename = os.path.basename(sdf_file)
-        self.active_file = open(self.file, 'r')
-        self.sdf_data = self.active_file.readlines()
-
-        # Parse symbol data from .sdf
-        self.symbol_data = self.parse_sdf(self.sdf_data)
-
-    def parse_sdf(self, sdf_data):
-        """ This function will parse the symbol table data from the sdf data
-
-        :param sdf_data:
-        :return: symbol_data
-        """
-
-        symbol_data = []
-        for line in sdf_data:
-            line = line.replace('\n', '')
-            line = line[1:-1]
-            data =  line.split('","')
-            #data = data.remove('"')
-            name, address, data_type, comment =  data
-            perph_type = address[:address.find(' ')]
-            perph_addr = address[re.search(r"\d", address).start():]
-            if perph_addr.isdigit():
-                perh_addr = int(perph_addr)
-            else:
-                perph_addr = float(perph_addr)
-            symbol_data.append({
-                'name': name.replace(" ",''),
-                'perph_type': perph_type,
-                'perph_addr': perph_addr,
-                'data_type': data_type.replace(" ", ''),
-                'comment': comment.replace(" ", '')
-            })
-        return symbol_data
-
-
-if __name__ == "__main__":
-    # Sample input from the previously decoded content
-    s7g = SDF_Parse("../../S7_Data/B3Z11502.sdf")
+import xml.etree.ElementTree as ET
+from array import array
+from functools import lru_cache
+from itertools import compress
+import logging
+import re
+import os
+import sys
+
+if not __package__:
+    # Run as a script, python App/S7_Parse/SDF_Parse.py, the App package lives two directories up
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from App.S7_Parse.Instrumentation import add_count, timed_stage
+from App.S7_Parse.Mapped_File import Mapped_File
+
+logger = logging.getLogger(__name__)
+
+SDF_ENCODING = 'cp1252'  # Simatic Manager writes its exports with the Windows code page
+
+# One quoted symbol table row: "name","area byte.bit","data type","comment". Fields are delimited by the ","
+# separators and the comment by the last quote of the line, so quotes inside a field such as
+# "Always signal "1"" stay part of it.
+SDF_ROW_PATTERN = re.compile(r'^"(.*?)","\s*([A-Z]+)\s*(\d+)(?:\.(\d+))?\s*","(.*?)","(.*)"[ \t]*\r?$', re.MULTILINE)
+
+# Operand addresses as written in the symbol table or in GR7/AWL code, e.g. "Q 24.5", "M2.1", "DB 320" or
+# "DB320.DBX152.1" where the area keeps its data block prefix
+ADDRESS_PATTERN = re.compile(r"\s*(DB\d+\.DB[XBWD]|[A-Z]+)\s*(\d+)(?:\.(\d+))?\s*$")
+
+
+@lru_cache(maxsize=65536)
+def parse_address(address):
+    """ This function will normalize an operand address into its (area, byte, bit) key, bit is None for
+    byte/word/block addresses.
+
+    :param address: e.g. 'Q      24.5', 'DB320.DBX152.1'
+    :return: (area, byte, bit) or None when the text is not an address
+    """
+    match = ADDRESS_PATTERN.match(address.upper())
+    if match is None:
+        return None
+    area, byte, bit = match.groups()
+    return sys.intern(area), int(byte), int(bit) if bit is not None else None
+
+
+class Symbol:
+    """ One row of the symbol table. perph_type and data_type are interned since a table only uses a handful
+    of distinct values for them.
+    """
+    __slots__ = ('name', 'perph_type', 'perph_addr', 'data_type', 'comment', 'byte', 'bit')
+
+    def __init__(self, name, perph_type, perph_addr, data_type, comment, byte=None, bit=None):
+        self.name = name
+        self.perph_type = sys.intern(perph_type)
+        self.perph_addr = perph_addr
+        self.data_type = sys.intern(data_type)
+        self.comment = comment
+        self.byte = byte
+        self.bit = bit
+
+    @property
+    def address(self):
+        return self.perph_type, self.byte, self.bit
+
+    def to_dict(self):
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return type(self) is type(other) and all(getattr(self, attr) == getattr(other, attr)
+                                                 for attr in self.__slots__)
+
+    def __repr__(self):
+        return 'Symbol' + repr(self.to_dict())
+
+
+def parse_symbols(sdf_data, unmatched=None):
+    """ This function will build the Symbol records of every symbol table row in the sdf text.
+
+    :param sdf_data: sdf text, a whole table or a single row
+    :param unmatched: optional list, rows that start with a quote but are no valid symbol row are appended
+    :return: list of symbols
+    """
+    symbol_data = []
+    append = symbol_data.append
+    rows = SDF_ROW_PATTERN.findall(sdf_data)
+    if unmatched is not None and len(rows) < sdf_data.count('\n"') + sdf_data.startswith('"'):
+        # Only searched line by line when the counts say a row was skipped
+        unmatched.extend(line for line in sdf_data.splitlines()
+                         if line.startswith('"') and not SDF_ROW_PATTERN.match(line))
+    for name, perph_type, byte, bit, data_type, comment in rows:
+        if bit:
+            perph_addr = float(byte + '.' + bit)
+            bit = int(bit)
+        else:
+            perph_addr = int(byte)
+            bit = None
+        byte = int(byte)
+        append(Symbol(name.replace(" ", ''), perph_type, perph_addr, data_type.replace(" ", ''),
+                      comment.replace(" ", ''), byte, bit))
+    return symbol_data
+
+
+class SDF_Parse:
+    CACHE_KIND = 'sdf'
+
+    def __init__(self, sdf_file, cache=None):
+        self.file = sdf_file
+        self.filename = os.path.basename(sdf_file)
+        self.sdf_data = None
+        self.unmatched_rows = []
+        self.symbol_data = cache.get(self.file, self.CACHE_KIND) if cache is not None else None
+
+        # Parse symbol data from .sdf unless it was cached, then index it by name and address
+        if self.symbol_data is None:
+            with timed_stage('sdf.read'), Mapped_File(self.file, default_encoding=SDF_ENCODING) as source:
+                self.sdf_data = source.text()
+                add_count('sdf.bytes', source.size)
+            with timed_stage('sdf.parse'):
+                self.symbol_data = self.parse_sdf(self.sdf_data)
+            add_count('sdf.row_matches', len(self.symbol_data))
+            if self.unmatched_rows:
+                add_count('sdf.unmatched_rows', len(self.unmatched_rows))
+                logger.warning('%s: %d symbol table rows could not be parsed, first: %s', self.filename,
+                               len(self.unmatched_rows), self.unmatched_rows[0])
+            if cache is not None:
+                cache.put(self.file, self.CACHE_KIND, self.symbol_data)
+        self.symbol_columns = None
+        with timed_stage('sdf.index'):
+            self.name_index = {symbol.name: symbol for symbol in self.symbol_data}
+            self.address_index = {symbol.address: symbol for symbol in self.symbol_data}
+
+    def parse_sdf(self, sdf_data):
+        """ This function will parse the symbol table data from the sdf data in one pass of the row pattern
+        over the whole buffer.
+
+        :param sdf_data: sdf text, or a list of its lines
+        :return: symbol_data
+        """
+        if not isinstance(sdf_data, str):
+            sdf_data = ''.join(sdf_data)
+        return parse_symbols(sdf_data, self.unmatched_rows)
+
+    def lookup_name(self, name):
+        """ Find a symbol by its name.
+
+        :param name:
+        :return: symbol or None
+        """
+        return self.name_index.get(name.replace(" ", ''))
+
+    def lookup_address(self, address):
+        """ Find the symbol of an operand address such as 'Q 24.5' or 'I4512.3'. Data block operands like
+        'DB320.DBX152.1' resolve to the symbol of their data block.
+
+        :param address:
+        :return: symbol or None
+        """
+        key = parse_address(address)
+        if key is None:
+            return None
+        symbol = self.address_index.get(key)
+        if symbol is None and key[0].startswith('DB') and key[0] != 'DB':
+            symbol = self.address_index.get(('DB', int(key[0][2:key[0].index('.')]), None))
+        return symbol
+
+    def to_columns(self):
+        """ This function will export the symbol data as parallel arrays, one per field, so bulk filters can
+        scan a single column instead of looking up every symbol. The result is built once and reused.
+
+        :return: symbol_columns
+        """
+        if self.symbol_columns is None:
+            self.symbol_columns = {
+                'name': [symbol.name for symbol in self.symbol_data],
+                'perph_type': [symbol.perph_type for symbol in self.symbol_data],
+                'perph_addr': array('d', (symbol.perph_addr for symbol in self.symbol_data)),
+                'byte': array('l', (symbol.byte for symbol in self.symbol_data)),
+                'bit': array('b', (-1 if symbol.bit is None else symbol.bit for symbol in self.symbol_data)),
+                'data_type': [symbol.data_type for symbol in self.symbol_data],
+                'comment': [symbol.comment for symbol in self.symbol_data]
+            }
+        return self.symbol_columns
+
+    def find_symbols(self, perph_type, start_addr, end_addr):
+        """ This function will select the symbols of one periphery type within an address range,
+        e.g. find_symbols('Q', 20, 30) for all outputs in bytes 20 to 30.
+
+        :param perph_type:
+        :param start_addr: lowest byte address, inclusive
+        :param end_addr: highest byte address, inclusive
+        :return: list of symbols
+        """
+        columns = self.to_columns()
+        mask = [kind == perph_type and start_addr <= byte <= end_addr
+                for kind, byte in zip(columns['perph_type'], columns['byte'])]
+        return list(compress(self.symbol_data, mask))
+
+
+if __name__ == "__main__":
+    # Sample input from the previously decoded content
+    s7g = SDF_Parse(sys.argv[1] if len(sys.argv) > 1 else
+                    os.path.join(os.path.dirname(__file__), '..', '..', 'S7_Data', 'B3Z11502.sdf'))
+
@@ -0,0 +1,153 @@
+from collections import deque
+import re
+import sys
+
+# Absolute operands in condition and supervision text, e.g. I4512.3, M595.4, DB320.DBX152.1, DB324.DBD220,
+# PIW256 and step/timer attributes like S002.U or T002.TT
+OPERAND_PATTERN = re.compile(r"\b(?:DB\d+\.DB[XBWD]\d+(?:\.\d+)?|[A-Z]{1,3}\d+(?:\.\d+|\.[A-Z]{1,2})?)(?![\w.])")
+
+
+def normalize_operand(operand):
+    """ Normalize an operand for lookups, e.g. 'db320.dbx 152.1' -> 'DB320.DBX152.1'.
+
+    :param operand:
+    :return: operand
+    """
+    return operand.replace(' ', '').upper()
+
+
+def find_operands(text):
+    """ Find the absolute operands mentioned in a condition or supervision.
+
+    :param text: string or list of strings (step conditions)
+    :return: list of operands in order of first mention
+    """
+    if isinstance(text, list):
+        text = '\n'.join(text)
+    return list(dict.fromkeys(OPERAND_PATTERN.findall(text)))
+
+
+class Sequence_Graph:
+    """Sequence Graph will index the parsed GR7 sequences once so queries about steps, transitions and operands
+    do not scan every sequence.
+
+    Steps are keyed by (fb_name, step name) since every sequence has its own INI step. Transition lookups by
+    step and operand lookups return the records themselves and run in O(1) or O(degree).
+
+    Args:
+        seq_list (list(Sequence)): Sequences of one CPU program, e.g. GR7_Parse.seq_list or
+            Project_Parse.seq_list. FB names are unique within a program.
+
+    Attributes:
+        sequences (dict): fb_name -> Sequence.
+        steps (dict): (fb_name, step name) -> Step.
+        step_numbers (dict): (fb_name, step number) -> Step.
+        transitions (dict): (fb_name, transition name) -> Transition.
+        outgoing (dict): (fb_name, step name) -> list of Transitions leaving the step.
+        incoming (dict): (fb_name, step name) -> list of Transitions entering the step.
+        operands (dict): operand -> list of (fb_name, Step or Transition) mentioning it.
+    """
+
+    def __init__(self, seq_list):
+        self.sequences = {}
+        self.steps = {}
+        self.step_numbers = {}
+        self.transitions = {}
+        self.outgoing = {}
+        self.incoming = {}
+        self.operands = {}
+        for sequence in seq_list:
+            self.add_sequence(sequence)
+
+    def add_sequence(self, sequence):
+        fb_name = sequence.fb_name
+        self.sequences[fb_name] = sequence
+        for step in sequence.step_data:
+            key = (fb_name, step.name)
+            self.steps[key] = step
+            self.step_numbers[(fb_name, step.number)] = step
+            self.outgoing.setdefault(key, [])
+            self.incoming.setdefault(key, [])
+            self.index_operands(fb_name, step, find_operands(step.condition) + find_operands(step.supervision))
+
+        for transition in sequence.transition_data:
+            self.transitions[(fb_name, transition.name)] = transition
+            for step_name in transition.from_steps:
+                self.outgoing.setdefault((fb_name, step_name), []).append(transition)
+            for step_name in transition.to_steps:
+                self.incoming.setdefault((fb_name, step_name), []).append(transition)
+            self.index_operands(fb_name, transition, find_operands(transition.condition))
+
+    def index_operands(self, fb_name, record, operands):
+        reference = (fb_name, record)
+        for operand in dict.fromkeys(operands):
+            self.operands.setdefault(sys.intern(operand), []).append(reference)
+
+    def step(self, fb_name, step):
+        """ Get a step by name or number.
+
+        :param fb_name:
+        :param step: step name, or step number as int or str
+        :return: Step or None
+        """
+        if isinstance(step, int):
+            return self.step_numbers.get((fb_name, str(step)))
+        return self.steps.get((fb_name, step)) or self.step_numbers.get((fb_name, step))
+
+    def transitions_from(self, fb_name, step_name):
+        return self.outgoing.get((fb_name, step_name), [])
+
+    def transitions_to(self, fb_name, step_name):
+        return self.incoming.get((fb_name, step_name), [])
+
+    def successors(self, fb_name, step_name):
+        """ Steps activated by the transitions leaving a step.
+
+        :param fb_name:
+        :param step_name:
+        :return: list of step names
+        """
+        return list(dict.fromkeys(to_step for transition in self.transitions_from(fb_name, step_name)
+                                  for to_step in transition.to_steps))
+
+    def predecessors(self, fb_name, step_name):
+        """ Steps deactivated by the transitions entering a step.
+
+        :param fb_name:
+        :param step_name:
+        :return: list of step names
+        """
+        return list(dict.fromkeys(from_step for transition in self.transitions_to(fb_name, step_name)
+                                  for from_step in transition.from_steps))
+
+    def reachable(self, fb_name, step_name):
+        """ Every step reachable from a step, in breadth first order, the step itself included.
+
+        :param fb_name:
+        :param step_name:
+        :return: list of step names
+        """
+        seen = {step_name: None}
+        queue = deque([step_name])
+        while queue:
+            for next_step in self.successors(fb_name, queue.popleft()):
+                if next_step not in seen:
+                    seen[next_step] = None
+                    queue.append(next_step)
+        return list(seen)
+
+    def references(self, operand):
+        """ Steps and transitions whose condition or supervision mention an operand.
+
+        :param operand: e.g. 'DB320.DBX152.1' or 'I 4512.3'
+        :return: list of (fb_name, Step or Transition)
+        """
+        return self.operands.get(normalize_operand(operand), [])
+
+
+if __name__ == "__main__":
+    from App.S7_Parse.GR7_Parse import GR7_Parse
+    graph = Sequence_Graph(GR7_Parse(sys.argv[1]).seq_list)
+    for fb_name, sequence in graph.sequences.items():
+        print(fb_name, len(sequence.step_data), 'steps', len(graph.reachable(fb_name, sequence.step_data[0].name)),
+              'reachable from', sequence.step_data[0].name)
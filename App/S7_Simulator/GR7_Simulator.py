@@ -0,0 +1,215 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import os
+import sys
+import time
+
+from App.S7_Parse.GR7_Condition import compile_condition
+from App.S7_Parse.GR7_Parse import initial_step_names
+from App.S7_Simulator.Trace_Reader import BLOCK_SIZE, read_trace_blocks
+
+
+class GR7_Simulator:
+    """GR7 Simulator will step a parsed GR7 sequence through recorded scan cycles offline.
+
+    A transition is enabled when all of its from steps are active and fires when its condition holds in that
+    scan, deactivating its from steps and activating its to steps, so alternative branches, simultaneous
+    branches and their joins follow the GRAPH7 rules. Transitions leaving the same step are tried by number
+    and a step is only left once per scan.
+
+    Conditions are compiled once and only the transitions leaving active steps are evaluated. Traces are run
+    a block of scan cycles at a time: every enabled condition is evaluated for the whole block with the bitset
+    evaluator and the simulator jumps straight to the first scan where one of them holds.
+
+    Args:
+        sequence (Sequence): Parsed sequence from GR7_Parse.
+        initial_steps (list(str)): Steps active at the start, the INITIAL_STEP steps of the sequence by default.
+        record (bool): Keep the history of fired transitions.
+
+    Attributes:
+        active (set(str)): Names of the active steps.
+        cycle (int): Number of scan cycles run.
+        history (list(tuple)): (cycle, transition name) of every fired transition when recording.
+        fired (int): Number of fired transitions.
+    """
+
+    def __init__(self, sequence, initial_steps=None, record=True):
+        self.fb_name = sequence.fb_name
+        self.record = record
+        self.step_names = [step.name for step in sequence.step_data]
+        self.step_index = {name: number for number, name in enumerate(self.step_names)}
+
+        # Transitions as (priority, name, condition, from step ids, to step ids)
+        self.transitions = []
+        for order, transition in enumerate(sequence.transition_data):
+            priority = (int(transition.number) if str(transition.number).isdigit() else sys.maxsize, order)
+            self.transitions.append((priority, transition.name, compile_condition(transition.condition),
+                                     tuple(self.step_id(name) for name in transition.from_steps),
+                                     tuple(self.step_id(name) for name in transition.to_steps)))
+        self.transitions.sort(key=lambda transition: transition[0])
+        if initial_steps is None:
+            initial_steps = initial_step_names(sequence.step_data)
+        self.active_ids = frozenset(self.step_id(name) for name in initial_steps)
+
+        self.outgoing = [[] for _ in self.step_names]
+        for transition in self.transitions:
+            for step in transition[3]:
+                self.outgoing[step].append(transition)
+        self.enabled_cache = {}
+        self.cycle = 0
+        self.fired = 0
+        self.history = []
+
+    def step_id(self, name):
+        # Transitions may name steps missing from the step list, they still take part in the simulation
+        if name not in self.step_index:
+            self.step_index[name] = len(self.step_names)
+            self.step_names.append(name)
+        return self.step_index[name]
+
+    @property
+    def active(self):
+        return {self.step_names[step] for step in self.active_ids}
+
+    def enabled(self):
+        """ The transitions whose from steps are all active, in priority order. Cached per set of active steps
+        since a sequence only visits a few of them.
+
+        :return: list of transitions
+        """
+        enabled = self.enabled_cache.get(self.active_ids)
+        if enabled is None:
+            candidates = {transition[1]: transition
+                          for step in self.active_ids for transition in self.outgoing[step]
+                          if all(from_step in self.active_ids for from_step in transition[3])}
+            enabled = self.enabled_cache[self.active_ids] = sorted(candidates.values(), key=lambda item: item[0])
+        return enabled
+
+    def fire(self, transitions):
+        """ Fire the transitions that hold in the current scan, each step is only left once.
+
+        :param transitions: transitions whose condition holds, in priority order
+        """
+        active = set(self.active_ids)
+        left = set()
+        for priority, name, condition, from_steps, to_steps in transitions:
+            if left.intersection(from_steps):
+                continue
+            left.update(from_steps)
+            active.difference_update(from_steps)
+            active.update(to_steps)
+            self.fired += 1
+            if self.record:
+                self.history.append((self.cycle, name))
+        self.active_ids = frozenset(active)
+
+    def scan(self, values):
+        """ Run one scan cycle.
+
+        :param values: mapping operand -> value of the process image
+        """
+        holding = [transition for transition in self.enabled() if transition[2].evaluate(values)]
+        if holding:
+            self.fire(holding)
+        self.cycle += 1
+
+    def run_block(self, columns, count, masks=None):
+        """ Run a block of scan cycles.
+
+        :param columns: mapping operand -> packed int or list of values, see GR7_Condition.evaluate_batch
+        :param count: number of scan cycles in the block
+        :param masks: optional dictionary shared by the simulators of a block, condition -> evaluated bitset
+        """
+        if masks is None:
+            masks = {}
+        position = 0
+        while position < count:
+            enabled = self.enabled()
+            first = None
+            holding = []
+            for transition in enabled:
+                condition = transition[2]
+                mask = masks.get(condition)
+                if mask is None:
+                    mask = masks[condition] = condition.evaluate_batch(columns, count)
+                bits = mask >> position
+                if not bits:
+                    continue
+                # Offset of the first scan in the rest of the block where the condition holds
+                offset = (bits & -bits).bit_length() - 1
+                if first is None or offset < first:
+                    first = offset
+                    holding = [transition]
+                elif offset == first:
+                    holding.append(transition)
+            if first is None:
+                break
+            self.cycle += first
+            self.fire(holding)
+            self.cycle += 1
+            position += first + 1
+        self.cycle += count - position
+
+    def run(self, blocks):
+        """ Run a trace.
+
+        :param blocks: iterable of (columns, count), e.g. Trace_Reader.read_trace_blocks()
+        """
+        for columns, count in blocks:
+            self.run_block(columns, count)
+
+    def result(self):
+        return {'fb_name': self.fb_name, 'cycles': self.cycle, 'fired': self.fired,
+                'active': sorted(self.active), 'history': self.history}
+
+
+def replay(seq_list, trace_file, block_size=BLOCK_SIZE, record=True):
+    """ Replay a trace through many sequences in one pass. Every block is read once and a condition shared by
+    several transitions is only evaluated once per block.
+
+    :param seq_list: list of Sequence records
+    :param trace_file: .csv or binary trace
+    :param block_size: scan cycles per block
+    :param record: keep the history of fired transitions
+    :return: list of GR7_Simulator
+    """
+    simulators = [GR7_Simulator(sequence, record=record) for sequence in seq_list]
+    for columns, count in read_trace_blocks(trace_file, block_size):
+        masks = {}
+        for simulator in simulators:
+            simulator.run_block(columns, count, masks)
+    return simulators
+
+
+def replay_chunk(seq_list, trace_file, block_size=BLOCK_SIZE, record=True):
+    return [simulator.result() for simulator in replay(seq_list, trace_file, block_size, record)]
+
+
+def replay_parallel(seq_list, trace_file, workers=None, chunksize=16, block_size=BLOCK_SIZE, record=True):
+    """ Replay a trace through hundreds of sequences across a process pool, each worker replays a chunk of
+    sequences over its own read of the trace. Use a binary trace here, it is memory-mapped and shared through
+    the page cache instead of parsed by every worker.
+
+    :param seq_list: list of Sequence records
+    :param trace_file: .csv or binary trace
+    :param workers: number of worker processes, None for one per core
+    :param chunksize: sequences per worker task
+    :param block_size: scan cycles per block
+    :param record: keep the history of fired transitions
+    :return: list of result dictionaries in sequence order
+    """
+    chunks = [seq_list[start:start + chunksize] for start in range(0, len(seq_list), chunksize)]
+    worker = partial(replay_chunk, trace_file=trace_file, block_size=block_size, record=record)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(worker, chunks):
+            results.extend(chunk_results)
+    return results
+
+
+if __name__ == "__main__":
+    from App.S7_Parse.GR7_Parse import GR7_Parse
+    start = time.perf_counter()
+    for simulator in replay(GR7_Parse(sys.argv[1]).seq_list, sys.argv[2]):
+        print(simulator.fb_name, simulator.cycle, 'cycles', simulator.fired, 'fired', sorted(simulator.active))
+    print(round(time.perf_counter() - start, 3), 's', os.path.basename(sys.argv[2]))
@@ -0,0 +1,171 @@
+import csv
+from functools import partial
+import mmap
+import os
+import struct
+
+from App.S7_Parse.GR7_Condition import pack_bits
+from App.S7_Parse.Sequence_Graph import normalize_operand
+
+TRACE_MAGIC = b'S7TRACE1'
+TRACE_HEADER = struct.Struct('<8sII')  # magic, operand count, length of the operand names
+TRACE_TIME_COLUMNS = ('TIME', 'CYCLE', 'TIMESTAMP')  # Leading CSV column that is not an operand
+BLOCK_SIZE = 4096  # Scan cycles per block
+
+
+def parse_value(text):
+    text = text.strip()
+    upper = text.upper()
+    if upper in ('TRUE', 'FALSE'):
+        return int(upper == 'TRUE')
+    try:
+        return int(text)
+    except ValueError:
+        return float(text) if text else 0
+
+
+def make_column(values):
+    """ Pack a column holding only 0/1 into one int, GR7_Condition unpacks it again when it is compared.
+
+    :param values:
+    :return: packed int or list of values
+    """
+    return pack_bits(values) if set(values) <= {0, 1} else values
+
+
+class Block_Columns:
+    """ The evaluate_batch columns of one block of scan cycles. A column is only extracted and packed the
+    first time a condition reads it, a trace usually records far more operands than the active transitions use.
+    """
+    __slots__ = ('index', 'column_of', 'columns')
+
+    def __init__(self, index, column_of):
+        self.index = index
+        self.column_of = column_of
+        self.columns = {}
+
+    def get(self, operand, default=0):
+        column = self.columns.get(operand)
+        if column is None:
+            number = self.index.get(operand)
+            if number is None:
+                return default
+            column = self.columns[operand] = make_column(self.column_of(number))
+        return column
+
+
+def read_csv_blocks(csv_file, block_size=BLOCK_SIZE):
+    """ Read a recorded trace from a CSV file with one operand per column and one scan cycle per row, e.g.
+    'time;I4512.3;DB320.DBD220'. A leading time/cycle column is skipped. The separator is detected.
+
+    :param csv_file:
+    :param block_size: scan cycles per block
+    :return: generator of (columns, count)
+    """
+    with open(csv_file, 'r', newline='') as trace_file:
+        dialect = csv.Sniffer().sniff(trace_file.readline(), delimiters=',;\t')
+        trace_file.seek(0)
+        reader = csv.reader(trace_file, dialect)
+        header = next(reader, None)
+        if header is None:
+            return
+        skip = 1 if header and header[0].strip().upper() in TRACE_TIME_COLUMNS else 0
+        index = {normalize_operand(name): number for number, name in enumerate(header[skip:])}
+        rows = []
+        for row in reader:
+            if not row:
+                continue
+            rows.append(row[skip:] if skip else row)
+            if len(rows) == block_size:
+                yield Block_Columns(index, partial(csv_column, rows)), len(rows)
+                rows = []
+        if rows:
+            yield Block_Columns(index, partial(csv_column, rows)), len(rows)
+
+
+def csv_column(rows, number):
+    # Text is only converted for the columns a condition reads
+    return [parse_value(row[number]) for row in rows]
+
+
+def write_binary_trace(trace_file, operands, rows):
+    """ Write a binary trace: a header with the operand names followed by one row of float64 values per scan
+    cycle. Binary traces are memory-mapped when replayed, so no text is parsed.
+
+    :param trace_file:
+    :param operands: operand names
+    :param rows: iterable of value sequences in operand order
+    :return: number of rows written
+    """
+    names = '\n'.join(normalize_operand(operand) for operand in operands).encode('utf-8')
+    names += b'\0' * (-(TRACE_HEADER.size + len(names)) % 8)  # Align the rows for memoryview.cast
+    row_format = struct.Struct('<' + str(len(operands)) + 'd')
+    count = 0
+    with open(trace_file, 'wb') as active_file:
+        active_file.write(TRACE_HEADER.pack(TRACE_MAGIC, len(operands), len(names)))
+        active_file.write(names)
+        for row in rows:
+            active_file.write(row_format.pack(*row))
+            count += 1
+    return count
+
+
+def convert_csv_trace(csv_file, trace_file):
+    """ Convert a CSV trace into a binary trace.
+
+    :param csv_file:
+    :param trace_file:
+    :return: number of rows written
+    """
+    with open(csv_file, 'r', newline='') as active_file:
+        dialect = csv.Sniffer().sniff(active_file.readline(), delimiters=',;\t')
+        active_file.seek(0)
+        reader = csv.reader(active_file, dialect)
+        header = next(reader)
+        skip = 1 if header[0].strip().upper() in TRACE_TIME_COLUMNS else 0
+        return write_binary_trace(trace_file, header[skip:],
+                                  ([parse_value(text) for text in row[skip:]] for row in reader if row))
+
+
+def read_binary_blocks(trace_file, block_size=BLOCK_SIZE):
+    """ Read a binary trace written by write_binary_trace. The file is memory-mapped and every column of a
+    block is read as a strided view of its rows.
+
+    :param trace_file:
+    :param block_size: scan cycles per block
+    :return: generator of (columns, count)
+    """
+    with open(trace_file, 'rb') as active_file:
+        magic, operand_count, names_length = TRACE_HEADER.unpack(active_file.read(TRACE_HEADER.size))
+        if magic != TRACE_MAGIC:
+            raise ValueError("Not a binary trace file: " + trace_file)
+        operands = active_file.read(names_length).rstrip(b'\0').decode('utf-8').split('\n')
+        index = {operand: number for number, operand in enumerate(operands)}
+        data_start = TRACE_HEADER.size + names_length
+        if os.fstat(active_file.fileno()).st_size <= data_start or not operand_count:
+            return
+        row_size = operand_count * 8
+        with mmap.mmap(active_file.fileno(), 0, access=mmap.ACCESS_READ) as trace_data:
+            row_count = (len(trace_data) - data_start) // row_size
+            for start in range(0, row_count, block_size):
+                count = min(block_size, row_count - start)
+                # Slicing the map copies the block, so no view of the map is left open between blocks
+                offset = data_start + start * row_size
+                block = memoryview(trace_data[offset:offset + count * row_size]).cast('d')
+                yield Block_Columns(index, partial(binary_column, block, operand_count)), count
+
+
+def binary_column(block, operand_count, number):
+    return block[number::operand_count].tolist()
+
+
+def read_trace_blocks(trace_file, block_size=BLOCK_SIZE):
+    """ Read a .csv or binary trace in blocks of scan cycles.
+
+    :param trace_file:
+    :param block_size:
+    :return: generator of (columns, count)
+    """
+    if trace_file.lower().endswith('.csv'):
+        return read_csv_blocks(trace_file, block_size)
+    return read_binary_blocks(trace_file, block_size)
@@ -1,91 +1,186 @@
 
+import logging
 import os
-from deep_translator import GoogleTranslator
+import sys
+
+if not __package__:
+    # Run as a script, python App/S7_Translator/AWL_Translate.py, the App package lives two directories up
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from App.S7_Parse.AWL_Parse import find_comment
+from App.S7_Parse.Instrumentation import add_count, timed_stage
+from App.S7_Parse.Mapped_File import Mapped_File
+from App.S7_Translator.Translation_Memory import Translation_Memory, normalize_text
+from App.S7_Translator.Translation_Scheduler import Translation_Scheduler
+from App.S7_Translator.Translator_Backend import Google_Backend
+
+logger = logging.getLogger(__name__)
 
 
 class AWL_Translate:
     """AWL Translate  will extract the text from named
 
-    German to English language conversions were done through deep_translator python library
+    German to English language conversions were done through deep_translator python library. Comments are
+    deduplicated and looked up in a persistent translation memory first, only unknown comments are sent to the
+    translator backend.
 
     Note:
         Do not include the `self` parameter in the ``Args`` section.
 
     Args:
         root_dir (str): Path to root directory containing all of the pdf documents to extract.
+        backend: Translator backend with translate_batch(texts), Google_Backend by default.
+        memory (Translation_Memory): Translation memory, the default SQLite file when None.
+        scheduler (Translation_Scheduler): Concurrent, rate limited batch scheduler around the backend.
 
     Attributes:
         root_dir (str): Path to root directory containing all of the pdf documents to extract.
         pdf_list (list(tuple))): List of tuples information extracted from pdf files.
+        translated (int): Number of translated comment lines, None when the translation failed and no output
+            file was written.
     """
     FC_TYPE = 'FUNCTION'  # Function PLC type
     FB_TYPE = 'FUNCTION_BLOCK'  # Function Block PLC type
     UNK_TYPE = 'Unknown'  # Unknown PLC type
     FILE_EXT = '.awl'
-    BATCH_SIZE = 100
-
-    def __init__(self, root_dir, file):
+    BATCH_SIZE = 100  # Most comments in one request
+    BATCH_CHARS = 4500  # Most characters in one request, the service rejects requests over 5000
+    CONCURRENCY = 4
+    WINDOW_LINES = 10000  # Most lines held in memory while their comments are translated
+    REQUEST_RATE = 5.0  # Requests started per second
+    SOURCE_LANG = 'de'
+    TARGET_LANG = 'en'
+
+    def __init__(self, root_dir, file, backend=None, memory=None, scheduler=None):
         # Check file exists
         self.file = root_dir + file + self.FILE_EXT
+        self.translated = None
         if not os.path.isfile(self.file):
             print("Not a proper file name or path.")
             return
         self.root_dir = root_dir
         self.output_file = root_dir + file + "_EN" + self.FILE_EXT
+        self.backend = backend if backend is not None else Google_Backend(self.SOURCE_LANG, self.TARGET_LANG)
+        self.memory = memory if memory is not None else Translation_Memory()
+        self.scheduler = scheduler if scheduler is not None else Translation_Scheduler(
+            self.backend, concurrency=self.CONCURRENCY, rate=self.REQUEST_RATE, max_chars=self.BATCH_CHARS,
+            max_items=self.BATCH_SIZE)
+
+        # Stream the file through the translator into the translated copy, written in the encoding of the source
+        # with its line endings kept. The copy is written next to the output and only replaces it once complete,
+        # a failed translation leaves no partial output behind.
+        temp_file = self.output_file + '.tmp'
+        try:
+            with timed_stage('awl_translate.file'):
+                with Mapped_File(self.file) as source, open(temp_file, "w", encoding=source.file_encoding,
+                                                            errors='replace', newline='',
+                                                            buffering=1 << 20) as output_file:
+                    if source.bom:
+                        output_file.write('\ufeff')
+                    self.translated = self.extract_file_comments(source.lines(), output_file)
+                    add_count('awl_translate.bytes', source.size)
+        finally:
+            if self.translated is None and os.path.exists(temp_file):
+                os.remove(temp_file)
+        if self.translated is not None:
+            os.replace(temp_file, self.output_file)
+
+    def translate_texts(self, texts):
+        """Translate normalized texts through the translation memory and the backend.
+
+        Duplicates are translated once and only texts missing from the memory are sent to the backend through
+        the scheduler, which runs the batches concurrently. New translations are stored in the memory as each
+        batch completes.
 
-        # Open files for reading and writing
-        self.active_file =  open(self.file, "r")
-        self.output_file = open(self.output_file, "w")
-        file_data = self.active_file.readlines()
-        self.extract_file_comments(file_data)
+        Args:
+            texts list(): Normalized texts to be translated.
 
-    def extract_file_comments(self, file_data):
-        """Example function with types documented in the docstring.
+        Returns:
+            translations dict(): text -> translated text, None if the backend returned a mismatched batch.
+        """
+        unique_texts = list(dict.fromkeys(text for text in texts if text))
+        with timed_stage('awl_translate.memory_lookup'):
+            translations = self.memory.lookup(unique_texts, self.SOURCE_LANG, self.TARGET_LANG)
+        missing = [text for text in unique_texts if text not in translations]
+        add_count('awl_translate.unique_comments', len(unique_texts))
+        add_count('awl_translate.backend_comments', len(missing))
+        for batch, translated in self.scheduler.translate_batches(missing):
+            if len(translated) != len(batch):
+                logger.warning('Mismatched translation size: %d comments sent, %d translated', len(batch),
+                               len(translated))
+                return None
+            batch_translations = {text: str(result) for text, result in zip(batch, translated) if result}
+            self.memory.store(batch_translations, self.SOURCE_LANG, self.TARGET_LANG)
+            translations.update(batch_translations)
+            logger.debug('Translated a batch of %d comments', len(batch))
+        return translations
+
+    def extract_file_comments(self, file_data, output_file):
+        """Write the file data with its // comments replaced by their translations.
+
+        The lines are read lazily and written back in windows of at most WINDOW_LINES lines or one scheduler
+        round of comments, so memory stays proportional to the window and not to the file.
 
         Args:
-            file_data list(): File data to be translated.
+            file_data: File data to be translated, any iterable of lines such as an open file.
+            output_file: Open file the translated data is written to.
 
         Returns:
-            translate_data list(): data_for_translation, line_data, line, position
+            int: Number of translated comments, None if a batch came back with a mismatched size.
         """
+        window_comments = self.BATCH_SIZE * self.CONCURRENCY
         total_translated = 0
-        comment_data = []
-        translate_data = []
-        translate_data_info = []
-        # Iterate through comments and batch translate
-        for line in range(len(file_data)):
-            data = ''
-            line_data = file_data[line]
-            # Extract Comments and create metadata for replacing with translations
-            position = line_data.find("//")
-            if position > -1:
-                data = line_data[position+2:]
-                comment_data.append(data)
-                total_translated += 1
-            translate_data_info.append((line_data, line, position))
-
-            # Batch translate data
-            if len(comment_data) >= self.BATCH_SIZE:
-                translate_data.extend(GoogleTranslator('de', 'en').translate_batch(comment_data))
-                comment_data = []
-                print("Translated 100 words batch")
-
-        # Validate translated data size
-        if not total_translated == len(translate_data):
-            print("Mismatched translation size: Total->" + str(total_translated) +
-                  " Translated->" + str(len(translate_data)))
+        window = []
+        comments = set()
+        for line_data in file_data:
+            # Extract Comments and keep the position for replacing with translations, // in a string is code
+            position = find_comment(line_data)
+            comment = normalize_text(line_data[position+2:]) if position > -1 else ''
+            window.append((line_data, position, comment))
+            if comment:
+                comments.add(comment)
+            if len(window) >= self.WINDOW_LINES or len(comments) >= window_comments:
+                translated = self.write_window(window, comments, output_file)
+                if translated is None:
+                    return None
+                total_translated += translated
+                window = []
+                comments = set()
+
+        translated = self.write_window(window, comments, output_file)
+        if translated is None:
             return None
+        return total_translated + translated
+
+    def write_window(self, window, comments, output_file):
+        """Translate the comments of a window of lines and write the lines with the translations substituted.
 
-        # Iterate through metadata to rebuild file
-        for line in range(len(file_data)):
-            data = file_data[line]
-            if translate_data_info:
-                data_info, line_info, position_info = translate_data_info.pop(0)
-                if line_info == line and position_info > -1:
-                    data = data[:position] + "//" + str(translate_data.pop(0)) + "\n"
+        Args:
+            window list(tuple): (line_data, position, comment) of each line.
+            comments set(): Normalized comments of the window.
+            output_file: Open file the translated data is written to.
 
-            self.output_file.write(data)
-        pass
+        Returns:
+            int: Number of translated comments, None if a batch came back with a mismatched size.
+        """
+        with timed_stage('awl_translate.translate'):
+            translations = self.translate_texts(comments)
+        if translations is None:
+            return None
+        translated = 0
+        lines = []
+        for line_data, position, comment in window:
+            if comment in translations:
+                line_end = "\r\n" if line_data[-2:-1] == "\r" else "\n"  # Keep the line ending of the source
+                line_data = line_data[:position] + "//" + translations[comment] + line_end
+                translated += 1
+            lines.append(line_data)
+        # One write per window, the output encoder then runs once over the whole window instead of per line
+        with timed_stage('awl_translate.write'):
+            output_file.write(''.join(lines))
+        add_count('awl_translate.lines', len(window))
+        add_count('awl_translate.translated_lines', translated)
+        return translated
 
     def extract_file_titles(self, file_data):
         """Example function with types documented in the docstring.
@@ -102,11 +197,10 @@ class AWL_Translate:
             if position == 0:
                 data = line[position+7:]
                 if not data == '\n':
-                    en_data = GoogleTranslator(source='auto', target='en').translate(data)
-                    en_data = en_data + '\n'
+                    en_data = self.translate_texts([normalize_text(data)])
                     pass
 
 if __name__ == "__main__":
-    awl = AWL_Translate('C:/Users/Justin/Desktop/Mercedes Benz/VM Software/integra/Project/AWL/',
-                        'B3Z22511')
-    pass
\ No newline at end of file
+    # Path of the .awl source, the translation is written next to it as <name>_EN.awl
+    awl_dir, awl_name = os.path.split(os.path.abspath(sys.argv[1]))
+    awl = AWL_Translate(os.path.join(awl_dir, ''), os.path.splitext(awl_name)[0])
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+
+from App.S7_Parse.Instrumentation import add_count
+
+DEFAULT_MEMORY_FILE = os.path.join(os.path.expanduser('~'), '.s7_translation_memory.sqlite')
+SQL_VARIABLE_LIMIT = 500  # Stay below the SQLite host parameter limit for IN (...) lookups
+
+
+def normalize_text(text):
+    """ Normalize a comment for the translation memory key, whitespace runs collapse to one space.
+
+    :param text:
+    :return: normalized text
+    """
+    return ' '.join(text.split())
+
+
+class Translation_Memory:
+    """Translation Memory will persist translated comments in SQLite, keyed by source language, target language
+    and normalized source text, so known comments are never sent to the translator again.
+
+    Args:
+        memory_file (str): SQLite database file, ':memory:' for a memory that is not persisted.
+
+    Attributes:
+        hits (int): Lookups answered from the memory.
+        misses (int): Lookups that were not in the memory.
+    """
+
+    def __init__(self, memory_file=DEFAULT_MEMORY_FILE):
+        self.memory_file = memory_file
+        self.connection = sqlite3.connect(memory_file)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, source_text TEXT NOT NULL, "
+            "target_text TEXT NOT NULL, PRIMARY KEY (source_lang, target_lang, source_text)) WITHOUT ROWID")
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, texts, source, target):
+        """ Look up the translations of normalized texts.
+
+        Args:
+            texts (list(str)): Normalized source texts.
+            source (str): Source language code.
+            target (str): Target language code.
+
+        Returns:
+            dict: Source text -> translated text for the texts found in the memory.
+        """
+        texts = list(texts)
+        found = {}
+        for start in range(0, len(texts), SQL_VARIABLE_LIMIT):
+            chunk = texts[start:start + SQL_VARIABLE_LIMIT]
+            rows = self.connection.execute(
+                "SELECT source_text, target_text FROM translations WHERE source_lang = ? AND target_lang = ? "
+                "AND source_text IN (" + ','.join('?' * len(chunk)) + ")", [source, target] + chunk)
+            found.update(rows)
+        self.hits += len(found)
+        self.misses += len(texts) - len(found)
+        add_count('translation_memory.hits', len(found))
+        add_count('translation_memory.misses', len(texts) - len(found))
+        return found
+
+    def store(self, translations, source, target):
+        """ Store translations in the memory.
+
+        Args:
+            translations (dict): Normalized source text -> translated text.
+            source (str): Source language code.
+            target (str): Target language code.
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                ((source, target, text, translated) for text, translated in translations.items()))
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+
+from App.S7_Parse.Instrumentation import active_instrumentation
+
+
+class Token_Bucket:
+    """Token Bucket will limit how often requests are started, refilling rate tokens per second up to capacity.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Largest burst of requests that may start at once.
+    """
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Translation_Scheduler:
+    """Translation Scheduler will translate text batches concurrently on a thread pool.
+
+    Texts are grouped into batches by character count, every request waits for a token bucket rate limit and
+    failed requests are retried with exponential backoff. Results come back in the order of the input texts.
+
+    Args:
+        backend: Translator backend with translate_batch(texts).
+        concurrency (int): Number of batches translated at the same time.
+        rate (float): Requests started per second, None for no rate limit.
+        burst (float): Requests that may start at once before the rate limit applies.
+        max_chars (int): Largest number of characters in one batch.
+        max_items (int): Largest number of texts in one batch.
+        retries (int): Retries of a failed batch before its error is raised.
+        backoff (float): Delay in seconds before the first retry, doubled for every further retry.
+    """
+
+    def __init__(self, backend, concurrency=4, rate=5.0, burst=1.0, max_chars=4500, max_items=100, retries=3,
+                 backoff=1.0):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.bucket = Token_Bucket(rate, burst) if rate else None
+        self.max_chars = max_chars
+        self.max_items = max_items
+        self.retries = retries
+        self.backoff = backoff
+
+    def make_batches(self, texts):
+        """Group texts into batches of at most max_chars characters and max_items texts. A single text longer
+        than max_chars gets a batch of its own.
+
+        Args:
+            texts list(): Texts to be translated.
+
+        Returns:
+            batches list(list()): Batches in input order.
+        """
+        batches = []
+        batch = []
+        batch_chars = 0
+        for text in texts:
+            if batch and (batch_chars + len(text) > self.max_chars or len(batch) >= self.max_items):
+                batches.append(batch)
+                batch = []
+                batch_chars = 0
+            batch.append(text)
+            batch_chars += len(text)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def translate_batch(self, batch):
+        metrics = active_instrumentation()
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                start = time.perf_counter()
+                self.bucket.acquire()
+                if metrics is not None:
+                    metrics.observe('translator.rate_limit_wait_seconds', time.perf_counter() - start)
+            start = time.perf_counter()
+            try:
+                translated = self.backend.translate_batch(batch)
+                if metrics is not None:
+                    # Latency of the successful request, failed attempts are only counted
+                    metrics.observe('translator.batch_seconds', time.perf_counter() - start)
+                    metrics.count('translator.batches')
+                    metrics.count('translator.texts', len(batch))
+                    metrics.count('translator.chars', sum(len(text) for text in batch))
+                return translated
+            except Exception:
+                if metrics is not None:
+                    metrics.count('translator.errors')
+                if attempt >= self.retries:
+                    raise
+                # Exponential backoff with jitter so parallel retries do not hit the service together
+                time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random() / 2))
+                attempt += 1
+
+    def translate_batches(self, texts):
+        """Translate texts concurrently and yield every batch with its results in input order.
+
+        Args:
+            texts list(): Texts to be translated.
+
+        Returns:
+            generator of (batch, translated) tuples
+        """
+        batches = self.make_batches(texts)
+        if not batches:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+            futures = [executor.submit(self.translate_batch, batch) for batch in batches]
+            try:
+                for batch, future in zip(batches, futures):
+                    yield batch, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def translate(self, texts):
+        """Translate texts concurrently.
+
+        Args:
+            texts list(): Texts to be translated.
+
+        Returns:
+            translated list(): Translations in input order.
+        """
+        translated = []
+        for batch, results in self.translate_batches(texts):
+            translated.extend(results)
+        return translated
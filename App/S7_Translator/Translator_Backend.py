@@ -0,0 +1,64 @@
+import threading
+import time
+
+
+class Google_Backend:
+    """Google Backend will translate text batches through the deep_translator GoogleTranslator.
+
+    deep_translator is only imported when the backend is created, so the stub backend and cached runs do not
+    need it installed.
+
+    Args:
+        source (str): Source language code.
+        target (str): Target language code.
+    """
+
+    def __init__(self, source='de', target='en'):
+        from deep_translator import GoogleTranslator
+        self.source = source
+        self.target = target
+        self.translator = GoogleTranslator(source, target)
+
+    def translate_batch(self, texts):
+        return self.translator.translate_batch(list(texts))
+
+
+class Stub_Backend:
+    """Stub Backend will translate locally from a fixed dictionary, for tests and offline runs.
+
+    Texts missing from the dictionary are returned with a '[target] ' prefix so it is visible they went
+    through the backend. latency and fail_every fake a remote service to exercise the scheduler.
+
+    Args:
+        source (str): Source language code.
+        target (str): Target language code.
+        translations (dict): Source text -> translated text.
+        latency (float): Seconds every translate_batch() call sleeps.
+        fail_every (int): Raise a ConnectionError on every n-th call, 0 to never fail.
+
+    Attributes:
+        calls (int): Number of translate_batch() calls.
+        translated (list(str)): Every text sent to the backend.
+    """
+
+    def __init__(self, source='de', target='en', translations=None, latency=0.0, fail_every=0):
+        self.source = source
+        self.target = target
+        self.translations = translations or {}
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self.translated = []
+        self.lock = threading.Lock()
+
+    def translate_batch(self, texts):
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and calls % self.fail_every == 0:
+            raise ConnectionError("Stub backend failure on call " + str(calls))
+        with self.lock:
+            self.translated.extend(texts)
+        return [self.translations.get(text, '[' + self.target + '] ' + text) for text in texts]
@@ -0,0 +1,6 @@
+import sys
+
+from App.S7_CLI import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from App.S7_Parse.AWL_Parse import AWL_Parse
+
+ARRAY_OF_STRUCT_SOURCE = """FUNCTION_BLOCK FB 10
+TITLE =Array of struct
+VERSION : 0.1
+
+VAR
+  stations : ARRAY  [1 .. 4 ] OF STRUCT
+   ready : BOOL ;\t//Station ready
+   fault : BOOL ;
+  END_STRUCT ;
+  count : INT ;
+END_VAR
+BEGIN
+NETWORK
+TITLE =
+      A     #stations[1].ready;
+      =     Q     24.5;
+END_FUNCTION_BLOCK
+"""
+
+
+class AWL_Parse_Test(unittest.TestCase):
+
+    def parse(self, source):
+        with tempfile.NamedTemporaryFile('w', suffix='.awl', encoding='cp1252', newline='\r\n',
+                                         delete=False) as awl:
+            awl.write(source)
+        try:
+            return AWL_Parse(awl.name).block_list
+        finally:
+            os.remove(awl.name)
+
+    def test_array_of_struct(self):
+        blocks = self.parse(ARRAY_OF_STRUCT_SOURCE)
+        self.assertEqual(len(blocks), 1)
+        declarations = blocks[0].var_sections['VAR']
+        self.assertEqual([declaration.name for declaration in declarations],
+                         ['stations', 'stations.ready', 'stations.fault', 'count'])
+        self.assertEqual(declarations[1].comment, 'Station ready')
+        self.assertEqual(len(blocks[0].networks[0].instructions), 2)
+
+    def test_unbalanced_end_struct(self):
+        source = ARRAY_OF_STRUCT_SOURCE.replace('  count : INT ;\n', '  END_STRUCT ;\n  count : INT ;\n')
+        blocks = self.parse(source)
+        self.assertEqual([declaration.name for declaration in blocks[0].var_sections['VAR']][-1], 'count')
+
+
+if __name__ == "__main__":
+    unittest.main()
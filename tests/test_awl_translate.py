@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from App.S7_Parse import Instrumentation
+from App.S7_Translator.AWL_Translate import AWL_Translate
+from App.S7_Translator.Translation_Memory import Translation_Memory
+from App.S7_Translator.Translator_Backend import Stub_Backend
+
+AWL_SOURCE = """FUNCTION FC 1 : VOID
+TITLE =Comments
+BEGIN
+NETWORK
+TITLE =
+      U     E      4.0;\t// Motor an
+      U     E      4.1;\t//  Motor   an
+      S     A     24.5;\t// Ventil auf
+      R     A     24.6;\t// Motor an
+END_FUNCTION
+"""
+
+
+class Short_Backend(Stub_Backend):
+
+    def translate_batch(self, texts):
+        return super().translate_batch(texts)[:-1]
+
+
+class AWL_Translate_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = os.path.join(self.temp_dir.name, '')
+        with open(os.path.join(self.root_dir, 'FC1.awl'), 'w', encoding='cp1252', newline='\r\n') as awl:
+            awl.write(AWL_SOURCE)
+        self.memory = Translation_Memory(':memory:')
+        self.instrumentation = Instrumentation.enable()
+
+    def tearDown(self):
+        Instrumentation.disable()
+        self.memory.close()
+        self.temp_dir.cleanup()
+
+    def translate(self, backend, source=None):
+        if source is not None:
+            with open(os.path.join(self.root_dir, 'FC1.awl'), 'w', encoding='cp1252', newline='\r\n') as awl:
+                awl.write(source)
+        AWL_Translate(self.root_dir, 'FC1', backend=backend, memory=self.memory)
+        with open(os.path.join(self.root_dir, 'FC1_EN.awl'), encoding='cp1252', newline='') as output:
+            return output.read()
+
+    def test_identical_comments_are_translated_once(self):
+        backend = Stub_Backend(translations={'Motor an': 'Motor on'})
+        output = self.translate(backend)
+        self.assertEqual(sorted(backend.translated), ['Motor an', 'Ventil auf'])
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(output.count('//Motor on\r\n'), 3)
+        self.assertEqual(self.instrumentation.counters['awl_translate.unique_comments'], 2)
+
+    def test_memory_hits_skip_the_backend(self):
+        self.memory.store({'Ventil auf': 'Valve open'}, 'de', 'en')
+        backend = Stub_Backend()
+        output = self.translate(backend)
+        self.assertEqual(backend.translated, ['Motor an'])
+        self.assertIn('//Valve open\r\n', output)
+        self.assertEqual(self.instrumentation.counters['awl_translate.backend_comments'], 1)
+
+    def test_second_run_makes_no_backend_calls(self):
+        first = self.translate(Stub_Backend())
+        self.instrumentation.reset()
+        backend = Stub_Backend()
+        second = self.translate(backend)
+        self.assertEqual(backend.calls, 0)
+        self.assertEqual(self.instrumentation.counters['awl_translate.backend_comments'], 0)
+        self.assertEqual(second, first)
+
+    def test_strings_are_not_comments(self):
+        output = self.translate(Stub_Backend(), AWL_SOURCE.replace('R     A     24.6;', "L     'a//b';"))
+        self.assertIn("L     'a//b';\t//[en] Motor an\r\n", output)
+        self.assertNotIn('[en] b', output)
+
+    def test_failed_translation_writes_nothing(self):
+        self.memory.store({'Motor an': 'Motor on'}, 'de', 'en')
+        translation = AWL_Translate(self.root_dir, 'FC1', backend=Short_Backend(), memory=self.memory)
+        self.assertIsNone(translation.translated)
+        self.assertEqual(os.listdir(self.root_dir), ['FC1.awl'])
+
+
+if __name__ == "__main__":
+    unittest.main()
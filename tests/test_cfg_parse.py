@@ -0,0 +1,26 @@
+import os
+import tempfile
+import unittest
+
+from App.S7_Parse.CFG_Parse import CFG_Parse
+from App.S7_Parse.Parse_Cache import Parse_Cache
+
+SAMPLE_CFG = os.path.join(os.path.dirname(__file__), '..', 'S7_Data', 'B3Z11202.cfg')
+
+
+class CFG_Parse_Test(unittest.TestCase):
+
+    def test_cached_sections_load(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = Parse_Cache(cache_dir)
+            parsed = CFG_Parse(SAMPLE_CFG, cache=cache)
+            self.assertIsNotNone(cache.get(SAMPLE_CFG, CFG_Parse.CACHE_KIND))
+            cached = CFG_Parse(SAMPLE_CFG, cache=cache)
+        self.assertEqual([section.encoding for section in cached.section_list],
+                         [section.encoding for section in parsed.section_list])
+        self.assertEqual([section.attributes for section in cached.section_list],
+                         [section.attributes for section in parsed.section_list])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from App.S7_Parse.AWL_Parse import AWL_Parse
+from App.S7_Parse.Cross_Reference import Cross_Reference, awl_references, default_index_file, gr7_references
+from App.S7_Parse.GR7_Parse import GR7_Parse
+from App.S7_Parse.SDF_Parse import parse_symbols
+
+SAMPLE_GR7 = os.path.join(os.path.dirname(__file__), '..', 'S7_Data', 'B3Z11502.gr7')
+
+JUMP_SOURCE = """FUNCTION FC 20 : VOID
+TITLE =Jumps
+VERSION : 0.1
+
+BEGIN
+NETWORK
+TITLE =
+      A     I      4.0;
+      SPB   M001;
+      SPA   M002;
+M001: S     M      1.0;
+M002: BEU   ;
+END_FUNCTION
+"""
+
+SYMBOLS = ('"Flag_1                  ","M       1.0 ","BOOL      ","Set by the jump"\r\n'
+           '"Label_Lookalike         ","M       2.0 ","BOOL      ","Not a jump label"\r\n'
+           '"Eins                    ","M       2.1 ","BOOL      ","Always 1"\r\n')
+
+
+class Cross_Reference_Test(unittest.TestCase):
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.awl', encoding='cp1252', newline='\r\n',
+                                         delete=False) as awl:
+            awl.write(JUMP_SOURCE)
+        try:
+            self.block_list = AWL_Parse(awl.name).block_list
+        finally:
+            os.remove(awl.name)
+        self.xref = Cross_Reference(':memory:')
+
+    def tearDown(self):
+        self.xref.close()
+
+    def test_jump_labels_are_not_operands(self):
+        operands = [reference[0] for reference in awl_references(self.block_list)]
+        self.assertEqual(operands, ['I4.0', 'M1.0'])
+        self.xref.build(parse_symbols(SYMBOLS), block_list=self.block_list)
+        self.assertEqual(self.xref.address_usages('M 1'), [])
+        self.assertEqual(self.xref.address_usages('M 2'), [])
+        self.assertEqual(len(self.xref.usages('Flag_1')), 1)
+
+    def test_perm_condition_is_indexed(self):
+        seq_list = GR7_Parse(SAMPLE_GR7).seq_list[:1]
+        references = [reference for reference in gr7_references(seq_list) if reference[4] == 'perm_condition']
+        self.assertEqual(references, [('M2.1', 'GR7', 'FB420', 'PERM_CONDITION', 'perm_condition')])
+        self.xref.build(parse_symbols(SYMBOLS), seq_list=seq_list)
+        self.assertIn(('GR7', 'FB420', 'PERM_CONDITION', 'perm_condition', 'M2.1'), self.xref.usages('Eins'))
+
+    def test_default_index_outside_export(self):
+        with tempfile.TemporaryDirectory() as export_dir, tempfile.TemporaryDirectory() as cache_dir:
+            index_file = default_index_file(export_dir, os.path.join(cache_dir, 'cache'))
+            self.assertEqual(os.path.dirname(index_file), os.path.join(cache_dir, 'cache'))
+            xref = Cross_Reference(index_file)
+            xref.build(parse_symbols(SYMBOLS), block_list=self.block_list)
+            xref.close()
+            self.assertTrue(os.path.isfile(index_file))
+            self.assertEqual(os.listdir(export_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
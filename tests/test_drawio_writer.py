@@ -0,0 +1,23 @@
+import unittest
+import xml.etree.ElementTree as ET
+
+from App.DrawIO.DrawIO_Writer import escape_attr, graph_model_xml
+
+
+class DrawIO_Writer_Test(unittest.TestCase):
+
+    def test_escape_attr_removes_invalid_characters(self):
+        self.assertEqual(escape_attr('Valve\x00 "A"\x07\x1b<1>\tok\r\n'), 'Valve &quot;A&quot;&lt;1&gt;&#9;ok&#10;')
+        self.assertEqual(escape_attr('Gr\xfc\xdfe \ud800\ufffe'), 'Gr\xfc\xdfe ')
+
+    def test_graph_model_with_control_characters_parses(self):
+        steps = [{'name': 'S1\x01', 'number': 1, 'initial': True}, {'name': 'S2', 'number': 2}]
+        transitions = [{'name': 'T1\x0b', 'number': 1, 'from': ['S1\x01'], 'to': ['S2'], 'condition': 'M2.1\x1f'}]
+        root = ET.fromstring(graph_model_xml(steps, transitions))
+        self.assertEqual([cell.get('value') for cell in root.iter('mxCell') if cell.get('vertex')],
+                         ['1 S1', '2 S2'])
+        self.assertEqual(root.find('.//UserObject').get('tooltip'), 'M2.1')
+
+
+if __name__ == "__main__":
+    unittest.main()
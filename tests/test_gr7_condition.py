@@ -0,0 +1,74 @@
+from itertools import product
+import unittest
+
+from App.S7_Parse.GR7_Condition import Condition_Compiler, compile_condition, pack_bits, pack_columns, unpack_bits
+
+BITS = ('I4.0', 'I4.1', 'M2.1', 'T002.TT')
+
+# Condition text -> straightforward evaluation of the same condition
+CONDITIONS = {
+    'I4.0 AND I4.1': lambda v: v['I4.0'] and v['I4.1'],
+    'I4.0 OR I4.1 AND M2.1': lambda v: v['I4.0'] or (v['I4.1'] and v['M2.1']),
+    '(I4.0 OR I4.1) AND NOT M2.1': lambda v: (v['I4.0'] or v['I4.1']) and not v['M2.1'],
+    'NOT (I4.0 AND NOT I4.1) OR T002.TT': lambda v: not (v['I4.0'] and not v['I4.1']) or v['T002.TT'],
+    'I4.0 XOR M2.1 AND I4.1': lambda v: v['I4.0'] != (v['M2.1'] and v['I4.1']),
+    'S002.U > DB320.DBD220 AND NOT T002.TT': lambda v: v['S002.U'] > v['DB320.DBD220'] and not v['T002.TT'],
+    'S002.U >= 10 OR S002.U <> DB320.DBD220 AND M2.1':
+        lambda v: v['S002.U'] >= 10 or (v['S002.U'] != v['DB320.DBD220'] and v['M2.1']),
+    'm2.1 AND TRUE': lambda v: v['M2.1'],
+}
+
+
+def snapshots():
+    for bits in product((False, True), repeat=len(BITS)):
+        for time_value in (0, 5, 10):
+            snapshot = dict(zip(BITS, bits))
+            snapshot.update({'S002.U': time_value, 'DB320.DBD220': 5})
+            yield snapshot
+
+
+class GR7_Condition_Test(unittest.TestCase):
+
+    def test_evaluate_matches_reference(self):
+        for text, reference in CONDITIONS.items():
+            condition = compile_condition(text)
+            for snapshot in snapshots():
+                self.assertEqual(condition.evaluate(snapshot), bool(reference(snapshot)), (text, snapshot))
+
+    def test_evaluate_batch_matches_reference(self):
+        batch = list(snapshots())
+        packed = pack_columns(batch)
+        unpacked = {operand: [snapshot[operand] for snapshot in batch] for operand in batch[0]}
+        for text, reference in CONDITIONS.items():
+            condition = compile_condition(text)
+            expected = pack_bits([bool(reference(snapshot)) for snapshot in batch])
+            self.assertEqual(condition.evaluate_batch(packed, len(batch)), expected, text)
+            self.assertEqual(condition.evaluate_batch(unpacked, len(batch)), expected, text)
+
+    def test_missing_operands_read_as_false(self):
+        condition = compile_condition('I4.0 OR NOT M9.9')
+        self.assertTrue(condition.evaluate({}))
+        self.assertEqual(condition.evaluate_batch({'I4.0': 0b01}, 2), 0b11)
+
+    def test_empty_conditions(self):
+        self.assertTrue(compile_condition('No Condition').evaluate({}))
+        self.assertFalse(compile_condition('No Supervision', False).evaluate({}))
+
+    def test_operands_are_shared(self):
+        code, operands = Condition_Compiler('I4.0 AND i4.0 OR M2.1').compile()
+        self.assertEqual(operands, ('I4.0', 'M2.1'))
+        self.assertIs(compile_condition('I4.0 AND I4.1'), compile_condition('I4.0 AND I4.1'))
+
+    def test_malformed_conditions(self):
+        for text in ('I4.0 AND (M2.1', 'AND I4.0', 'I4.0 OR', 'I4.0 M2.1', 'I4.0 $ M2.1'):
+            with self.assertRaises(ValueError, msg=text):
+                compile_condition(text)
+
+    def test_pack_bits_round_trip(self):
+        values = [1, 0, 0, 1, 1]
+        self.assertEqual(pack_bits(values), 0b11001)
+        self.assertEqual(unpack_bits(pack_bits(values), len(values)), values)
+
+
+if __name__ == "__main__":
+    unittest.main()
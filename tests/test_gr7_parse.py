@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from App.DrawIO.DrawIO_Writer import INITIAL_STEP_STYLE, graph_model_xml
+from App.S7_Parse.GR7_Parse import GR7_Parse, Step, initial_step_names
+from App.S7_Simulator.GR7_Simulator import GR7_Simulator
+
+SAMPLE_GR7 = os.path.join(os.path.dirname(__file__), '..', 'S7_Data', 'B3Z11502.gr7')
+
+
+class GR7_Initial_Step_Test(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The first sequence of the sample with its second step declared as the initial step
+        with open(SAMPLE_GR7, 'rb') as gr7_file:
+            gr7_data = gr7_file.read()
+        gr7_data = gr7_data.replace(b'INITIAL_STEP INI ', b'STEP INI ', 1)
+        gr7_data = gr7_data.replace(b'STEP CheckHomePos ', b'INITIAL_STEP CheckHomePos ', 1)
+        with tempfile.NamedTemporaryFile(suffix='.gr7', delete=False) as gr7_file:
+            gr7_file.write(gr7_data)
+        try:
+            cls.sequence = GR7_Parse(gr7_file.name).seq_list[0]
+        finally:
+            os.remove(gr7_file.name)
+
+    def test_sample_initial_step(self):
+        steps = GR7_Parse(SAMPLE_GR7).seq_list[0].step_data
+        self.assertEqual([step.name for step in steps if step.initial], ['INI'])
+
+    def test_initial_flag(self):
+        steps = self.sequence.step_data
+        self.assertEqual(steps[0].name, 'INI')
+        self.assertEqual([step.name for step in steps if step.initial], ['CheckHomePos'])
+        self.assertTrue(steps[1].to_dict()['initial'])
+
+    def test_simulator_starts_at_initial_step(self):
+        self.assertEqual(GR7_Simulator(self.sequence).active, {'CheckHomePos'})
+
+    def test_diagram_marks_initial_step(self):
+        xml = graph_model_xml(self.sequence.step_data, self.sequence.transition_data)
+        self.assertIn('value="2 CheckHomePos" style="' + INITIAL_STEP_STYLE, xml)
+        self.assertNotIn('value="1 INI" style="' + INITIAL_STEP_STYLE, xml)
+
+
+class GR7_Record_Test(unittest.TestCase):
+
+    def test_step_record_model(self):
+        step = Step('INI', 1, initial=True)
+        self.assertEqual(step.to_dict(), {'name': 'INI', 'number': 1, 'supervision': 'No Supervision',
+                                          'condition': 'No Condition', 'comment': '', 'initial': True})
+        self.assertTrue(step['initial'])
+        self.assertIsNone(step.get('missing'))
+
+    def test_initial_step_names(self):
+        self.assertEqual(initial_step_names([Step('A', 1), Step('B', 2, initial=True)]), ['B'])
+        # Dictionaries without the initial key start at the first step
+        self.assertEqual(initial_step_names([{'name': 'A'}, {'name': 'B'}]), ['A'])
+        self.assertEqual(initial_step_names([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import csv
+import os
+import random
+import tempfile
+import unittest
+
+from App.S7_Parse.GR7_Parse import Sequence, Step, Transition
+from App.S7_Simulator.GR7_Simulator import GR7_Simulator, replay
+from App.S7_Simulator.Trace_Reader import read_trace_blocks, write_binary_trace
+
+OPERANDS = ('I0.0', 'I0.1', 'I0.2', 'I0.3', 'M1.0', 'MW10')
+
+
+def build_sequence():
+    """ S1 -> S2, then either S3 and S4 together (T2) or S5 (T6, lower priority), S3 + S4 join into S5, S5
+    jumps back to S1.
+    """
+    sequence = Sequence('FB1', 'Test')
+    sequence.step_data = [Step('S1', 1, initial=True)] + [Step('S' + str(number), number) for number in range(2, 6)]
+    sequence.transition_data = [
+        Transition('T1', 1, ['S1'], ['S2'], 'I0.0'),
+        Transition('T2', 2, ['S2'], ['S3', 'S4'], 'I0.1'),
+        Transition('T3', 3, ['S3', 'S4'], ['S5'], 'I0.2 AND MW10 > 3'),
+        Transition('T4', 4, ['S5'], ['S1'], 'I0.3 OR NOT M1.0'),
+        Transition('T6', 6, ['S2'], ['S5'], 'I0.1 AND M1.0 OR I0.2'),
+    ]
+    return sequence
+
+
+def scan_values(**values):
+    snapshot = dict.fromkeys(OPERANDS, 0)
+    snapshot.update({operand.replace('_', '.'): value for operand, value in values.items()})
+    return snapshot
+
+
+class GR7_Simulator_Test(unittest.TestCase):
+
+    def test_activation_across_transitions(self):
+        simulator = GR7_Simulator(build_sequence())
+        self.assertEqual(simulator.active, {'S1'})
+        simulator.scan(scan_values(M1_0=1))
+        self.assertEqual(simulator.active, {'S1'})
+        simulator.scan(scan_values(I0_0=1, M1_0=1))
+        self.assertEqual(simulator.active, {'S2'})
+        # T2 and T6 both hold, T2 has the lower number and S2 is only left once
+        simulator.scan(scan_values(I0_1=1, M1_0=1))
+        self.assertEqual(simulator.active, {'S3', 'S4'})
+        # The join waits for its condition, the compare operand is too small first
+        simulator.scan(scan_values(I0_2=1, MW10=3, M1_0=1))
+        self.assertEqual(simulator.active, {'S3', 'S4'})
+        simulator.scan(scan_values(I0_2=1, MW10=4, M1_0=1))
+        self.assertEqual(simulator.active, {'S5'})
+        simulator.scan(scan_values())
+        self.assertEqual(simulator.active, {'S1'})
+        self.assertEqual(simulator.history, [(1, 'T1'), (2, 'T2'), (4, 'T3'), (5, 'T4')])
+        self.assertEqual(simulator.cycle, 6)
+
+    def test_alternative_branch(self):
+        simulator = GR7_Simulator(build_sequence(), initial_steps=['S2'])
+        simulator.scan(scan_values(I0_2=1))
+        self.assertEqual(simulator.active, {'S5'})
+        self.assertEqual(simulator.history, [(0, 'T6')])
+
+    def test_trace_formats_match_per_scan(self):
+        generator = random.Random(7)
+        rows = [[int(generator.random() < 0.3) for _ in OPERANDS[:-1]] + [generator.randrange(8)]
+                for _ in range(1000)]
+        per_scan = GR7_Simulator(build_sequence())
+        for row in rows:
+            per_scan.scan(dict(zip(OPERANDS, row)))
+        self.assertGreater(per_scan.fired, 20)
+
+        with tempfile.TemporaryDirectory() as trace_dir:
+            csv_file = os.path.join(trace_dir, 'trace.csv')
+            with open(csv_file, 'w', newline='') as trace_file:
+                writer = csv.writer(trace_file, delimiter=';')
+                writer.writerow(('time',) + OPERANDS)
+                writer.writerows([cycle] + row for cycle, row in enumerate(rows))
+            binary_file = os.path.join(trace_dir, 'trace.s7t')
+            write_binary_trace(binary_file, OPERANDS, rows)
+
+            for trace_file in (csv_file, binary_file):
+                # Blocks of 64 scans so transitions fire across block boundaries
+                simulator = GR7_Simulator(build_sequence())
+                simulator.run(read_trace_blocks(trace_file, block_size=64))
+                self.assertEqual(simulator.result(), per_scan.result(), trace_file)
+                self.assertEqual(replay([build_sequence()], trace_file, block_size=100)[0].result(),
+                                 per_scan.result(), trace_file)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from App.S7_Parse.Incremental_Parse import Incremental_Parse, default_manifest_file
+
+SAMPLE_SDF = os.path.join(os.path.dirname(__file__), '..', 'S7_Data', 'B3Z11502.sdf')
+
+
+class Incremental_Parse_Test(unittest.TestCase):
+
+    def test_default_manifest_outside_export(self):
+        manifest_file = default_manifest_file('S7_Data', 'cache')
+        self.assertEqual(os.path.dirname(manifest_file), 'cache')
+        self.assertEqual(manifest_file, default_manifest_file(os.path.abspath('S7_Data'), 'cache'))
+        self.assertNotEqual(manifest_file, default_manifest_file('Other_Data', 'cache'))
+
+    def test_export_is_not_written(self):
+        with tempfile.TemporaryDirectory() as export_dir, tempfile.TemporaryDirectory() as cache_dir:
+            shutil.copy(SAMPLE_SDF, export_dir)
+            manifest_file = default_manifest_file(export_dir, os.path.join(cache_dir, 'cache'))
+            first = Incremental_Parse(export_dir, manifest_file)
+            second = Incremental_Parse(export_dir, manifest_file)
+            self.assertEqual(os.listdir(export_dir), ['B3Z11502.sdf'])
+            self.assertTrue(os.path.isfile(manifest_file))
+        self.assertEqual(first.stats['files_read'], 1)
+        self.assertEqual(second.stats['files_reused'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
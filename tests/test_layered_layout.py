@@ -0,0 +1,76 @@
+import unittest
+
+from App.DrawIO.Layered_Layout import Layered_Layout, count_crossings, sequence_layout
+from App.S7_Parse.GR7_Parse import Sequence, Step, Transition
+
+
+class Layered_Layout_Test(unittest.TestCase):
+
+    def assert_layers_do_not_overlap(self, layout):
+        for layer in layout.layers:
+            x_positions = sorted(layout.positions[key][0] for key in layer)
+            for left, right in zip(x_positions, x_positions[1:]):
+                self.assertGreaterEqual(right - left, layout.node_width + layout.spacing_x)
+            self.assertEqual(len({layout.positions[key][1] for key in layer}), 1)
+
+    def test_diamond(self):
+        layout = Layered_Layout(['A', 'B', 'C', 'D'], [('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D')])
+        self.assertEqual(layout.rank, {'A': 0, 'B': 1, 'C': 1, 'D': 2})
+        self.assertEqual([sorted(layer) for layer in layout.layers], [['A'], ['B', 'C'], ['D']])
+        self.assertEqual(layout.crossings, 0)
+        self.assertEqual(layout.back_edges, set())
+        self.assert_layers_do_not_overlap(layout)
+        # The join sits centred below its branches
+        self.assertEqual(layout.positions['D'][0], (layout.positions['B'][0] + layout.positions['C'][0]) / 2)
+
+    def test_back_edge_loop(self):
+        layout = Layered_Layout(['A', 'B', 'C'], [('A', 'B'), ('B', 'C'), ('C', 'A')])
+        self.assertEqual(layout.rank, {'A': 0, 'B': 1, 'C': 2})
+        self.assertEqual(layout.back_edges, {('C', 'A')})
+        self.assertEqual(layout.edge_points, {})
+        self.assertEqual(layout.crossings, 0)
+
+    def test_branch_and_jump(self):
+        # Alternative branch B/C joining in D, a forward jump A -> D over one layer and the jump back to A
+        edges = [('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D'), ('A', 'D'), ('D', 'A')]
+        layout = Layered_Layout(['A', 'B', 'C', 'D'], edges)
+        self.assertEqual(layout.rank, {'A': 0, 'B': 1, 'C': 1, 'D': 2})
+        self.assertEqual(layout.back_edges, {('D', 'A')})
+        self.assertEqual(list(layout.edge_points), [('A', 'D')])
+        self.assertEqual(len(layout.edge_points[('A', 'D')]), 1)
+        self.assertEqual(layout.crossings, 0)
+        self.assert_layers_do_not_overlap(layout)
+
+    def test_crossings_are_removed(self):
+        # In input order A -> D and B -> C cross, the ordering swaps one of the layers
+        layout = Layered_Layout(['A', 'B', 'C', 'D'], [('A', 'D'), ('B', 'C')])
+        self.assertEqual(layout.crossings, 0)
+        self.assertEqual(layout.back_edges, set())
+        self.assertEqual(count_crossings({'A': 0, 'B': 1}, {'C': 0, 'D': 1}, [('A', 'D'), ('B', 'C')]), 1)
+
+    def test_several_roots_keep_every_edge(self):
+        edges = [('A', 'F'), ('B', 'E'), ('C', 'D'), ('A', 'D'), ('C', 'F')]
+        layout = Layered_Layout(['A', 'B', 'C', 'D', 'E', 'F'], edges)
+        self.assertEqual(layout.back_edges, set())
+        self.assertEqual(layout.rank, {'A': 0, 'B': 0, 'C': 0, 'D': 1, 'E': 1, 'F': 1})
+        # A and C both lead to D and F, one crossing is unavoidable
+        self.assertEqual(layout.crossings, 1)
+
+    def test_sequence_layout(self):
+        sequence = Sequence('FB1')
+        sequence.step_data = [Step('S1', 1, initial=True), Step('S2', 2), Step('S3', 3), Step('S4', 4)]
+        sequence.transition_data = [Transition('T1', 1, ['S1'], ['S2', 'S3']),
+                                    Transition('T2', 2, ['S2', 'S3'], ['S4']),
+                                    Transition('T3', 3, ['S4'], ['S1'])]
+        layout = sequence_layout(sequence)
+        self.assertEqual(layout.rank, {'S1': 0, 'S2': 1, 'S3': 1, 'S4': 2})
+        self.assertEqual(layout.back_edges, {('S4', 'S1')})
+        self.assertEqual(layout.crossings, 0)
+
+    def test_empty(self):
+        layout = Layered_Layout([], [])
+        self.assertEqual((layout.layers, layout.positions), ([], {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
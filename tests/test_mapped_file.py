@@ -0,0 +1,117 @@
+import codecs
+import os
+import tempfile
+import unittest
+
+from App.S7_Parse.Mapped_File import DETECT_BYTES, LINE_CHUNK, Mapped_File, detect_encoding
+
+
+class Mapped_File_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, data, name='input.txt'):
+        file = os.path.join(self.temp_dir.name, name)
+        with open(file, 'wb') as output:
+            output.write(data)
+        return file
+
+    def test_empty_file(self):
+        with Mapped_File(self.write(b'')) as source:
+            self.assertIsNone(source.map)
+            self.assertEqual(source.data, b'')
+            self.assertEqual(source.size, 0)
+            self.assertEqual(source.encoding, 'cp1252')
+            self.assertFalse(source.bom)
+            self.assertEqual(source.text(), '')
+            self.assertEqual(list(source.lines()), [])
+            self.assertEqual(list(source.byte_lines()), [])
+
+    def test_cp1252_detected(self):
+        text = 'Schritt Förderband überwacht\r\nStörung\r\n'
+        with Mapped_File(self.write(text.encode('cp1252'))) as source:
+            self.assertEqual(source.encoding, 'cp1252')
+            self.assertEqual(source.file_encoding, 'cp1252')
+            self.assertEqual(source.text(), text)
+
+    def test_utf8_detected(self):
+        text = 'Schritt Förderband überwacht\r\nStörung\r\n'
+        with Mapped_File(self.write(text.encode('utf-8'))) as source:
+            self.assertEqual(source.encoding, 'utf-8')
+            self.assertFalse(source.bom)
+            self.assertEqual(source.text(), text)
+
+    def test_default_encoding(self):
+        self.assertEqual(detect_encoding(b'plain ascii'), ('cp1252', 0))
+        self.assertEqual(detect_encoding('Störung'.encode('cp1252'), default='latin-1'), ('latin-1', 0))
+        with Mapped_File(self.write('Störung'.encode('utf-8')), encoding='cp1252') as source:
+            self.assertEqual(source.encoding, 'cp1252')
+
+    def test_non_ascii_after_detect_window(self):
+        # Detection searches a pure ASCII head to the end of the file for the first non-ASCII byte
+        data = b'x' * (DETECT_BYTES + 10) + 'ü'.encode('utf-8')
+        self.assertEqual(detect_encoding(data), ('utf-8', 0))
+        data = b'x' * (DETECT_BYTES + 10) + 'ü'.encode('cp1252')
+        self.assertEqual(detect_encoding(data), ('cp1252', 0))
+
+    def test_utf8_bom_stripped(self):
+        text = 'Störung\n'
+        with Mapped_File(self.write(codecs.BOM_UTF8 + text.encode('utf-8'))) as source:
+            self.assertTrue(source.bom)
+            self.assertEqual(source.encoding, 'utf-8')
+            self.assertEqual(source.data, text.encode('utf-8'))
+            self.assertEqual(source.decode(0, 1), 'S')
+
+    def test_utf16_transcoded(self):
+        text = 'Störung\r\nSchritt 2\r\n'
+        for data, file_encoding, bom in ((codecs.BOM_UTF16_LE + text.encode('utf-16-le'), 'utf-16-le', True),
+                                          (text.encode('utf-16-be'), 'utf-16-be', False)):
+            with Mapped_File(self.write(data)) as source:
+                self.assertEqual(source.file_encoding, file_encoding)
+                self.assertEqual(source.bom, bom)
+                self.assertEqual(source.encoding, 'utf-8')
+                self.assertEqual(source.data, text.encode('utf-8'))
+                self.assertEqual(list(source.lines()), ['Störung\r\n', 'Schritt 2\r\n'])
+
+    def test_offsets_across_chunk_boundary(self):
+        # A line and a multi-byte character straddle the LINE_CHUNK boundary, offsets found in the bytes must
+        # decode to exactly the same text as the file read whole
+        head = b'a' * (LINE_CHUNK - 3)
+        line = 'Störung überwacht'
+        data = head + line.encode('utf-8') + b'\r\nlast line'
+        with Mapped_File(self.write(data)) as source:
+            self.assertEqual(source.encoding, 'utf-8')
+            start = source.data.find(b'St')
+            end = source.data.find(b'\r\n', start)
+            self.assertLess(start, LINE_CHUNK)
+            self.assertGreater(end, LINE_CHUNK)
+            self.assertEqual(source.decode(start, end), line)
+            self.assertEqual(source.decode(), data.decode('utf-8'))
+            lines = list(source.lines())
+            self.assertEqual(lines, [head.decode() + line + '\r\n', 'last line'])
+            self.assertEqual(list(source.byte_lines()), [head + line.encode('utf-8') + b'\r\n', b'last line'])
+
+    def test_lines_over_several_chunks(self):
+        # Lines keep their endings, \r only endings split like a file opened in text mode
+        lines = ['Zeile {} Störung\r\n'.format(number) for number in range(LINE_CHUNK // 8)] + ['a\rb\n', 'end']
+        data = ''.join(lines).encode('cp1252')
+        self.assertGreater(len(data), 2 * LINE_CHUNK)
+        with Mapped_File(self.write(data)) as source:
+            self.assertEqual(source.encoding, 'cp1252')
+            self.assertEqual(list(source.lines()), lines[:-2] + ['a\r', 'b\n', 'end'])
+            self.assertEqual(b''.join(source.byte_lines()), data)
+
+    def test_close(self):
+        source = Mapped_File(self.write(b'data'))
+        with source:
+            self.assertEqual(source.decode(), 'data')
+        self.assertIsNone(source.map)
+        self.assertEqual(source.size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
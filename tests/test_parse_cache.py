@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from App.S7_Parse.Parse_Cache import Parse_Cache
+
+
+class Counting_Cache(Parse_Cache):
+
+    def __init__(self, cache_dir):
+        super().__init__(cache_dir)
+        self.hashed = 0
+
+    def content_key(self, file, kind):
+        self.hashed += 1
+        return super().content_key(file, kind)
+
+
+class Parse_Cache_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.temp_dir.name, 'symbols.sdf')
+        with open(self.file, 'wb') as sdf:
+            sdf.write(b'"Motor_On","Q 4.0 ","BOOL","Motor on"\r\n')
+        self.cache = Counting_Cache(os.path.join(self.temp_dir.name, 'cache'))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_miss_hashes_once(self):
+        self.assertIsNone(self.cache.get(self.file, 'sdf'))
+        self.cache.put(self.file, 'sdf', ['parsed'])
+        self.assertEqual(self.cache.hashed, 1)
+        self.assertEqual(self.cache.miss_digests, {})
+        self.assertEqual(self.cache.get(self.file, 'sdf'), ['parsed'])
+        self.assertEqual(self.cache.hashed, 1)
+
+    def test_changed_file_is_hashed_again(self):
+        self.assertIsNone(self.cache.get(self.file, 'sdf'))
+        with open(self.file, 'ab') as sdf:
+            sdf.write(b'"Motor_Off","Q 4.1 ","BOOL",""\r\n')
+        self.cache.put(self.file, 'sdf', ['changed'])
+        self.assertEqual(self.cache.hashed, 2)
+        self.assertEqual(Parse_Cache(self.cache.cache_dir).get(self.file, 'sdf'), ['changed'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from App.S7_Parse.Project_Parse import Project_Parse
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'S7_Data')
+
+
+class Project_Parse_Test(unittest.TestCase):
+
+    def test_parse_project(self):
+        with tempfile.TemporaryDirectory() as root_dir:
+            shutil.copytree(SAMPLE_DIR, os.path.join(root_dir, 'S7_Data'))
+            project = Project_Parse(root_dir, workers=1)
+
+            # Only files with a parser are discovered, the keyword lists of Parse_Info are not
+            names = [os.path.relpath(file, root_dir) for file in project.files]
+            self.assertEqual(sorted(names), [os.path.join('S7_Data', name) for name in (
+                'B3Z11202.cfg', 'B3Z11502.cfg', 'B3Z11502.gr7', 'B3Z11502.sdf')])
+            sizes = [os.path.getsize(file) for file in project.files]
+            self.assertEqual(sizes, sorted(sizes, reverse=True))
+
+            self.assertTrue(project.seq_list)
+            self.assertTrue(project.symbol_data)
+            self.assertTrue(project.section_list)
+            self.assertEqual(project.block_list, [])
+            self.assertEqual(project.failures, {})
+            self.assertTrue(project.report()[-1].startswith('4 files, 0 failed, '))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+from contextlib import redirect_stderr, redirect_stdout
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from App.S7_CLI import main
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), '..', 'S7_Data')
+AWL_SOURCE = """FUNCTION FC 1 : VOID
+BEGIN
+NETWORK
+TITLE =
+      U     E      4.0;\t// Motor an
+      S     A     24.5;\t// Ventil auf
+END_FUNCTION
+"""
+
+
+class S7_CLI_Test(unittest.TestCase):
+    """Smoke tests of every subcommand against a temporary copy of S7_Data."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.data_dir = os.path.join(cls.temp_dir.name, 'S7_Data')
+        shutil.copytree(SAMPLE_DIR, cls.data_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp(dir=self.temp_dir.name)
+
+    def run_main(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            status = main(list(argv))
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_parse_ndjson(self):
+        output = os.path.join(self.output_dir, 'records.ndjson')
+        status, _, stderr = self.run_main('parse', self.data_dir, '-o', output)
+        self.assertEqual(status, 0, stderr)
+        with open(output, encoding='utf-8') as records:
+            kinds = {json.loads(line)['record'] for line in records}
+        self.assertEqual(kinds, {'sequence', 'symbol', 'section'})
+        self.assertIn('4 files', stderr)
+        self.assertIn('0 failed', stderr)
+
+    def test_parse_csv(self):
+        status, _, stderr = self.run_main('parse', self.data_dir, '-f', 'csv', '-o', self.output_dir)
+        self.assertEqual(status, 0, stderr)
+        self.assertEqual(sorted(os.listdir(self.output_dir)),
+                         ['sections.csv', 'sequences.csv', 'steps.csv', 'symbols.csv', 'transitions.csv'])
+        with open(os.path.join(self.output_dir, 'steps.csv'), encoding='utf-8', newline='') as steps:
+            rows = list(csv.reader(steps))
+        self.assertEqual(tuple(rows[0]), ('file', 'fb_name', 'name', 'number', 'initial', 'supervision',
+                                          'condition', 'comment'))
+        self.assertGreater(len(rows), 1)
+
+    def test_parse_missing_path(self):
+        with self.assertRaises(SystemExit) as context:
+            self.run_main('parse', os.path.join(self.data_dir, 'missing.gr7'))
+        self.assertEqual(context.exception.code, 2)
+
+    def test_export_drawio(self):
+        status, stdout, stderr = self.run_main('export-drawio', self.data_dir, '-o', self.output_dir)
+        self.assertEqual(status, 0, stderr)
+        drawio_file = os.path.join(self.output_dir, 'B3Z11502GR7.drawio')
+        self.assertEqual(stdout.splitlines(), [drawio_file])
+        with open(drawio_file, encoding='utf-8') as drawio:
+            self.assertIn('<mxfile', drawio.read())
+
+    def test_xref(self):
+        index_file = os.path.join(self.output_dir, 'xref.sqlite')
+        status, stdout, stderr = self.run_main('xref', self.data_dir, '-i', index_file, '-u')
+        self.assertEqual(status, 0, stderr)
+        self.assertTrue(os.path.isfile(index_file))
+        self.assertIn('indexed in ' + index_file, stderr)
+        unused = [json.loads(line) for line in stdout.splitlines()]
+        self.assertTrue(unused)
+        self.assertEqual({usage['kind'] for usage in unused}, {'unused'})
+
+        # The existing index is queried without parsing the project again
+        status, stdout, stderr = self.run_main('xref', self.data_dir, '-i', index_file, '-u')
+        self.assertEqual(status, 0, stderr)
+        self.assertEqual(stderr, '')
+        self.assertEqual([json.loads(line) for line in stdout.splitlines()], unused)
+
+    def test_translate_offline(self):
+        awl_file = os.path.join(self.output_dir, 'FC1.awl')
+        with open(awl_file, 'w', encoding='cp1252', newline='\r\n') as awl:
+            awl.write(AWL_SOURCE)
+        status, stdout, stderr = self.run_main('translate', '--offline', self.output_dir)
+        self.assertEqual(status, 0, stderr)
+        output_file = os.path.join(self.output_dir, 'FC1_EN.awl')
+        self.assertEqual(stdout.splitlines(), [output_file])
+        with open(output_file, encoding='cp1252') as output:
+            self.assertIn('Ventil auf', output.read())
+
+        # The translated copy found in the directory is not translated again
+        status, stdout, stderr = self.run_main('translate', '--offline', self.output_dir)
+        self.assertEqual(status, 0, stderr)
+        self.assertEqual(stdout.splitlines(), [output_file])
+
+
+if __name__ == '__main__':
+    unittest.main()
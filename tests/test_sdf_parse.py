@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from App.S7_Parse.SDF_Parse import SDF_Parse, parse_symbols
+
+SAMPLE_SDF = os.path.join(os.path.dirname(__file__), '..', 'S7_Data', 'B3Z11502.sdf')
+
+
+class SDF_Parse_Test(unittest.TestCase):
+
+    def test_quoted_comment(self):
+        symbols = parse_symbols('"Eins                    ","M       2.1 ","BOOL      ",'
+                                '"Always signal "1"                     "\r\n')
+        self.assertEqual(len(symbols), 1)
+        self.assertEqual(symbols[0].comment, 'Alwayssignal"1"')
+        self.assertEqual(symbols[0].address, ('M', 2, 1))
+
+    def test_quoted_name(self):
+        symbols = parse_symbols('"Valve "A"               ","Q      24.5 ","BOOL      ","open"\r\n')
+        self.assertEqual([symbol.name for symbol in symbols], ['Valve"A"'])
+
+    def test_sample_quoted_comment(self):
+        self.assertEqual(SDF_Parse(SAMPLE_SDF).lookup_name('Eins').comment, 'Alwayssignal"1"')
+
+    def test_unmatched_rows_are_kept(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.sdf', encoding='cp1252', newline='', delete=False) as sdf:
+            sdf.write('"Motor_On","Q 4.0 ","BOOL","Motor on"\r\n"Broken","no address","BOOL",""\r\n')
+        try:
+            with self.assertLogs('App.S7_Parse.SDF_Parse', 'WARNING'):
+                parsed = SDF_Parse(sdf.name)
+        finally:
+            os.remove(sdf.name)
+        self.assertEqual([symbol.name for symbol in parsed.symbol_data], ['Motor_On'])
+        self.assertEqual(parsed.unmatched_rows, ['"Broken","no address","BOOL",""'])
+
+
+if __name__ == "__main__":
+    unittest.main()
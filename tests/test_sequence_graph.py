@@ -0,0 +1,63 @@
+import unittest
+
+from App.S7_Parse.GR7_Parse import Sequence, Step, Transition
+from App.S7_Parse.Sequence_Graph import Sequence_Graph, find_operands, normalize_operand
+
+
+def build_sequences():
+    """ FB1: S1 branches to S2 or S3, both join in S4 which jumps back to S1. FB2 reuses the step names. """
+    first = Sequence('FB1')
+    first.step_data = [Step('S1', '1', condition=['DB320.DBX152.0   (N)'], initial=True),
+                       Step('S2', '2', supervision='S002.U > DB320.DBD220'), Step('S3', '3'), Step('S4', '4')]
+    first.transition_data = [Transition('T1', '1', ['S1'], ['S2'], 'I4.0 AND M2.1'),
+                             Transition('T2', '2', ['S1'], ['S3'], 'I4.1'),
+                             Transition('T3', '3', ['S2'], ['S4'], 'M2.1'),
+                             Transition('T4', '4', ['S3'], ['S4'], 'NOT M2.1'),
+                             Transition('T5', '5', ['S4'], ['S1'], 'I4.0 OR T002.TT')]
+    second = Sequence('FB2')
+    second.step_data = [Step('S1', '1', initial=True), Step('S9', '9')]
+    second.transition_data = [Transition('T1', '1', ['S1'], ['S9'], 'I4.0')]
+    return [first, second]
+
+
+class Sequence_Graph_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = Sequence_Graph(build_sequences())
+
+    def test_branch_and_join(self):
+        self.assertEqual(self.graph.successors('FB1', 'S1'), ['S2', 'S3'])
+        self.assertEqual(self.graph.predecessors('FB1', 'S4'), ['S2', 'S3'])
+        self.assertEqual([transition.name for transition in self.graph.transitions_to('FB1', 'S4')], ['T3', 'T4'])
+
+    def test_jump_back(self):
+        self.assertEqual(self.graph.successors('FB1', 'S4'), ['S1'])
+        self.assertEqual(self.graph.predecessors('FB1', 'S1'), ['S4'])
+        self.assertEqual(self.graph.reachable('FB1', 'S3'), ['S3', 'S4', 'S1', 'S2'])
+
+    def test_sequences_are_separate(self):
+        self.assertEqual(self.graph.successors('FB2', 'S1'), ['S9'])
+        self.assertEqual(self.graph.reachable('FB2', 'S1'), ['S1', 'S9'])
+        self.assertEqual(self.graph.transitions_from('FB2', 'S9'), [])
+        self.assertIsNone(self.graph.step('FB2', 'S2'))
+
+    def test_step_lookup(self):
+        self.assertEqual(self.graph.step('FB1', 'S2').number, '2')
+        self.assertEqual(self.graph.step('FB1', 3).name, 'S3')
+        self.assertEqual(self.graph.step('FB1', '4').name, 'S4')
+
+    def test_operand_references(self):
+        references = [(fb_name, record.name) for fb_name, record in self.graph.references('i 4.0')]
+        self.assertEqual(references, [('FB1', 'T1'), ('FB1', 'T5'), ('FB2', 'T1')])
+        self.assertEqual([record.name for fb_name, record in self.graph.references('M2.1')], ['T1', 'T3', 'T4'])
+        self.assertEqual([record.name for fb_name, record in self.graph.references('DB320.DBX152.0')], ['S1'])
+        self.assertEqual([record.name for fb_name, record in self.graph.references('DB320.DBD220')], ['S2'])
+
+    def test_operand_helpers(self):
+        self.assertEqual(normalize_operand('db320.dbx 152.1'), 'DB320.DBX152.1')
+        self.assertEqual(find_operands('S002.U > DB320.DBD220 AND NOT T002.TT AND S002.U > 0'),
+                         ['S002.U', 'DB320.DBD220', 'T002.TT'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import threading
+import time
+import unittest
+
+from App.S7_Parse import Instrumentation
+from App.S7_Translator.Translation_Scheduler import Translation_Scheduler
+from App.S7_Translator.Translator_Backend import Stub_Backend
+
+TEXTS = ['Text ' + str(number) for number in range(20)]
+
+
+class Slow_First_Backend(Stub_Backend):
+    """ Earlier batches take longer so they complete after later ones, and the most batches in flight at once
+    is tracked.
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.running = 0
+        self.max_running = 0
+        self.running_lock = threading.Lock()
+
+    def translate_batch(self, texts):
+        with self.running_lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(0.002 * (len(TEXTS) - TEXTS.index(texts[0])))
+            return super().translate_batch(texts)
+        finally:
+            with self.running_lock:
+                self.running -= 1
+
+
+class Translation_Scheduler_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.instrumentation = Instrumentation.enable()
+
+    def tearDown(self):
+        Instrumentation.disable()
+
+    def test_results_in_input_order(self):
+        backend = Slow_First_Backend()
+        scheduler = Translation_Scheduler(backend, concurrency=3, rate=None, max_items=2)
+        self.assertEqual(scheduler.translate(TEXTS), ['[en] ' + text for text in TEXTS])
+        self.assertEqual(backend.calls, 10)
+        self.assertLessEqual(backend.max_running, 3)
+        self.assertGreater(backend.max_running, 1)
+
+    def test_failed_batches_are_retried(self):
+        backend = Stub_Backend(latency=0.001, fail_every=3)
+        scheduler = Translation_Scheduler(backend, concurrency=4, rate=None, max_items=2, backoff=0.001)
+        self.assertEqual(scheduler.translate(TEXTS), ['[en] ' + text for text in TEXTS])
+        self.assertEqual(sorted(backend.translated), sorted(TEXTS))
+        self.assertEqual(backend.calls, 10 + backend.calls // 3)
+        self.assertEqual(self.instrumentation.counters['translator.errors'], backend.calls // 3)
+        self.assertEqual(self.instrumentation.counters['translator.batches'], 10)
+
+    def test_retries_are_limited(self):
+        backend = Stub_Backend(fail_every=1)
+        scheduler = Translation_Scheduler(backend, rate=None, retries=2, backoff=0.001)
+        with self.assertRaises(ConnectionError):
+            scheduler.translate(TEXTS[:1])
+        self.assertEqual(backend.calls, 3)
+
+    def test_rate_limit(self):
+        backend = Stub_Backend()
+        scheduler = Translation_Scheduler(backend, concurrency=6, rate=20.0, burst=1.0, max_items=1)
+        start = time.monotonic()
+        scheduler.translate(TEXTS[:6])
+        # One request starts at once, the other five wait 1/20 s each for a token
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 20.0 - 0.01)
+        self.assertEqual(backend.calls, 6)
+        self.assertEqual(self.instrumentation.histograms['translator.rate_limit_wait_seconds'].count, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()